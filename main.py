@@ -9,9 +9,134 @@ def run_demo():
     df = loader.get_global_score(countries=["France", "Germany", "Finland"])
     print(df.head())
 
+def run_ingest(args):
+    # Usage : python main.py ingest 2025=data/SDR2025-data.xlsx 2024=data/SDR2024_Data.csv [--force]
+    import argparse
+    from src.sdg_ingest import SDGStore
+
+    def source(value):
+        edition, sep, path = value.partition("=")
+        if not sep or not path or not edition.isdigit():
+            raise argparse.ArgumentTypeError(f"attendu EDITION=CHEMIN (ex. 2025=data/SDR2025-data.xlsx), reçu {value!r}")
+        return int(edition), path
+
+    parser = argparse.ArgumentParser(prog="main.py ingest")
+    parser.add_argument("sources", nargs="+", type=source, metavar="EDITION=CHEMIN")
+    parser.add_argument("--chunksize", type=int, default=50_000)
+    parser.add_argument("--force", action="store_true")
+    options = parser.parse_args(args)
+    store = SDGStore()
+    store.ingest_all(dict(options.sources), chunksize=options.chunksize, force=options.force)
+    print("Éditions dans le store :", store.editions())
+
+def run_serve(args):
+    # Usage : python main.py serve [--host 127.0.0.1] [--port 8000] [--workers 2] [--max-pending 64]
+    import argparse
+    from src.server import run_server
+    parser = argparse.ArgumentParser(prog="main.py serve")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--max-pending", type=int, default=64)
+    options = parser.parse_args(args)
+    run_server(host=options.host, port=options.port, max_workers=options.workers, max_pending=options.max_pending)
+
+def run_bench_ann(args):
+    # Usage : python main.py bench-ann [--passages 100000] [--dim 384] [--queries 1000] [--top-k 10] [--backend ivf]
+    import argparse
+    from src.passage_index import ANN_BACKEND, benchmark_ann
+    parser = argparse.ArgumentParser(prog="main.py bench-ann")
+    parser.add_argument("--passages", type=int, default=100000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--backend", choices=["ivf", "hnsw"], default=ANN_BACKEND)
+    options = parser.parse_args(args)
+    results = benchmark_ann(n=options.passages, dim=options.dim, queries=options.queries,
+                            top_k=options.top_k, backend=options.backend)
+    for key, value in results.items():
+        print(f"{key:>14} : {value}")
+
+def run_bench_onnx(args):
+    # Usage : python main.py bench-onnx [--queries 200] [--generations 5] [--skip-parity]
+    import argparse
+    from src.onnx_backend import benchmark_backends, parity_check
+    parser = argparse.ArgumentParser(prog="main.py bench-onnx")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--generations", type=int, default=5)
+    parser.add_argument("--skip-parity", action="store_true")
+    options = parser.parse_args(args)
+    if not options.skip_parity:
+        parity = parity_check(generations=min(options.generations, 3))
+        for key, value in parity.items():
+            if key != "generations":
+                print(f"{key:>20} : {value}")
+        for sample in parity["generations"]:
+            print(f"\n❓ {sample['question']}\n  torch : {sample['torch']}\n  onnx  : {sample['onnx']}")
+    for row in benchmark_backends(queries=options.queries, generations=options.generations):
+        print(row)
+
+def run_bench_model_load(args):
+    # Usage : python main.py bench-model-load [--workers 2] [--model-id all-MiniLM-L6-v2]
+    import argparse
+    from src.model_cache import model_cache
+    from src.model_snapshot import benchmark_model_loading
+    parser = argparse.ArgumentParser(prog="main.py bench-model-load")
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--model-id", default="all-MiniLM-L6-v2")
+    options = parser.parse_args(args)
+    model_dir = model_cache.model_path(options.model_id)
+    if model_dir is None:
+        from sentence_transformers import SentenceTransformer
+        model_cache.save_model(SentenceTransformer(options.model_id, device="cpu"), options.model_id)
+        model_dir = model_cache.model_path(options.model_id)
+    for row in benchmark_model_loading(model_dir, workers=options.workers):
+        print(row)
+
+def run_build_index(args):
+    # Usage : python main.py build-index [--output bundle] [--data-file odd_data_enriched.json]
+    #         [--workbook data/SDR2025-data.xlsx] [--force] [--check]
+    import argparse
+    import os
+    parser = argparse.ArgumentParser(prog="main.py build-index")
+    parser.add_argument("--output", default=None, help="Dossier des bundles (défaut : ODD_BUNDLE_DIR ou bundle/)")
+    parser.add_argument("--data-file", default=None)
+    parser.add_argument("--workbook", default=os.path.join("data", "SDR2025-data.xlsx"))
+    parser.add_argument("--force", action="store_true")
+    parser.add_argument("--check", action="store_true", help="Vérifie le bundle actif sans reconstruire")
+    options = parser.parse_args(args)
+    if options.data_file:
+        os.environ["ODD_DATA_FILE"] = options.data_file
+    from src.index_bundle import BUNDLE_DIR, build_bundle, open_bundle
+    output = options.output or BUNDLE_DIR
+    if options.check:
+        bundle = open_bundle(output)
+        if bundle is None:
+            print(f"❌ Aucun bundle actif dans {output}")
+            sys.exit(1)
+        stale = bundle.verify_sources()
+        for rel in stale:
+            print(f"⚠️  Source modifiée depuis la construction : {rel}")
+        print(f"{'❌' if stale else '✅'} Bundle {bundle.version} ({bundle.path})")
+        sys.exit(1 if stale else 0)
+    bundle = build_bundle(output, data_file=options.data_file, workbook=options.workbook, force=options.force)
+    print(f"📦 Bundle actif : {bundle.version} ({bundle.manifest['documents']} documents)")
+
 if __name__ == "__main__":
     if len(sys.argv) > 1 and sys.argv[1] == "demo":
         run_demo()
+    elif len(sys.argv) > 1 and sys.argv[1] == "ingest":
+        run_ingest(sys.argv[2:])
+    elif len(sys.argv) > 1 and sys.argv[1] == "serve":
+        run_serve(sys.argv[2:])
+    elif len(sys.argv) > 1 and sys.argv[1] == "bench-ann":
+        run_bench_ann(sys.argv[2:])
+    elif len(sys.argv) > 1 and sys.argv[1] == "bench-onnx":
+        run_bench_onnx(sys.argv[2:])
+    elif len(sys.argv) > 1 and sys.argv[1] == "bench-model-load":
+        run_bench_model_load(sys.argv[2:])
+    elif len(sys.argv) > 1 and sys.argv[1] == "build-index":
+        run_build_index(sys.argv[2:])
     else:
         # Importe et exécute l'app Streamlit (src/app.py) si lancé via streamlit run main.py
         import src.app
@@ -39,11 +39,21 @@ Fonctions principales :
 """
 
 import streamlit as st
-from src.chat_bot import chercher_odd, formater_reponse_odd, clear_cache, get_cache_info
-from sentence_transformers import SentenceTransformer, util
+from src.chat_bot import ChatbotEngine, get_engine, clear_cache, get_cache_info
 import os
 
 
+@st.cache_resource
+def get_chatbot_engine() -> ChatbotEngine:
+    """
+    Moteur du chatbot partagé par toutes les sessions du processus.
+    Son initialisation (modèles, index) est lancée en arrière-plan : la page s'affiche sans l'attendre.
+    """
+    return get_engine().start()
+
+engine = get_chatbot_engine()
+
+
 # Page config
 st.set_page_config(
     page_title="SDG Chatbot / Chatbot ODD",
@@ -172,33 +182,53 @@ else:
 
 
 
-# Classement dynamique des pays (connexion API/CSV/JSON)
+# Classement des pays : cube du bundle d'index, sinon classeur SDR local, sinon CSV SDSN distant
 
+import hashlib
+import io
+from typing import Optional
 import pandas as pd
-import requests
 import plotly.express as px
+from src.remote_fetch import remote_fetcher
+from src.sdg_data import SDGCube, SDGDataLoader
+from src.sdg_ingest import normaliser_edition
+from src.sdg_ranking import SDGRankingEngine
 
 
 # URL officielle du SDG Index 2024 (SDSN) - lien direct RAW
 CLASSEMENT_URL = "https://raw.githubusercontent.com/sdsna/SDG-Index-Data/main/2024/SDR2024_Data.csv"
+CLASSEMENT_EDITION = 2024
+
+
+@st.cache_resource
+def moteur_depuis_csv(data_hash: str, _data: bytes, edition: int) -> SDGRankingEngine:
+    """
+    Construit (une fois par contenu du CSV) le moteur de classement d'une édition téléchargée.
+    Args:
+        data_hash (str): Hash du contenu, clé du cache.
+        _data (bytes): Contenu du CSV (non haché par Streamlit).
+        edition (int): Année de l'édition.
+    """
+    df = normaliser_edition(pd.read_csv(io.BytesIO(_data), encoding_errors='replace'), edition)
+    return SDGRankingEngine(SDGCube.from_frame(df))
 
 
-def charger_classement(url: str) -> pd.DataFrame:
+def charger_classement(url: str, deadline: float = 3.0) -> Optional[SDGRankingEngine]:
     """
-    Tente de charger le classement ODD mondial depuis le CSV officiel SDSN. Retourne un DataFrame ou None.
+    Charge le classement ODD mondial depuis le CSV officiel SDSN. Retourne un moteur de classement ou None.
+    Le CSV passe par le cache disque de `remote_fetcher` : la dernière copie valide est servie
+    immédiatement et revalidée en arrière-plan, et l'attente réseau est bornée par `deadline`.
     """
     try:
-        df = pd.read_csv(url)
-        # Le CSV SDSN contient les colonnes 'Country' et 'SDG Index Score'
-        if 'Country' in df.columns and 'SDG Index Score' in df.columns:
-            df = df.rename(columns={"Country": "Pays", "SDG Index Score": "Indice ODD"})
-            df = df[["Pays", "Indice ODD"]]
-            df = df.dropna(subset=["Indice ODD"])
-            df = df.sort_values("Indice ODD", ascending=False)
-            return df
-        else:
+        data = remote_fetcher.get(url, deadline=deadline)
+        if data is None:
+            st.warning("Classement dynamique indisponible pour le moment (délai dépassé).")
+            return None
+        moteur = moteur_depuis_csv(hashlib.sha256(data).hexdigest(), data, CLASSEMENT_EDITION)
+        if 'sdgi_s' not in moteur.cube.column_index:
             st.warning("Colonnes attendues non trouvées dans le CSV SDSN.")
             return None
+        return moteur
     except Exception as e:
         st.warning(f"Impossible de charger le classement dynamique : {e}")
         return None
@@ -208,40 +238,73 @@ st.markdown(
     unsafe_allow_html=True
 )
 
-# Utilisation exclusive des données Excel pour le classement ODD
-from src.sdg_data import SDGDataLoader
 excel_path = os.path.join(PROJECT_ROOT, "data", "SDR2025-data.xlsx")
-loader = SDGDataLoader(excel_path)
-latest_year = max(loader.get_years())
-classement_df = loader.get_global_score(years=[latest_year])
-classement_df = classement_df.rename(columns={"sdgi_s": "Indice ODD", "Country": "Pays"})
-st.markdown(f"<b>{'Country selection (exactly 5)' if lang == 'English' else 'Sélection de 5 pays'}:</b>", unsafe_allow_html=True)
-pays_options = sorted(classement_df['Pays'].tolist())
-default_selection = pays_options[:5] if len(pays_options) > 5 else pays_options
-selected_pays = st.multiselect(
-    'Select exactly 5 countries to compare' if lang == 'English' else 'Sélectionne exactement 5 pays à comparer',
-    options=pays_options,
-    default=default_selection,
-    key='select_countries'
-)
-if len(selected_pays) != 5:
-    st.warning('Please select exactly 5 countries.' if lang == 'English' else 'Merci de sélectionner exactement 5 pays.')
-    filtered_df = pd.DataFrame(columns=classement_df.columns)
-else:
-    filtered_df = classement_df[classement_df['Pays'].isin(selected_pays)]
-fig = px.bar(
-    filtered_df,
-    x="Indice ODD",
-    y="Pays",
-    orientation="h",
-    color="Indice ODD",
-    color_continuous_scale="Blues",
-    labels={"Indice ODD": "Score ODD", "Pays": "Pays"},
-    title="SDG Index Ranking (real-time data)" if lang == "English" else "Classement ODD (données en temps réel)"
-)
-fig.update_layout(yaxis={'categoryorder':'total ascending'}, height=600, margin=dict(l=0, r=0, t=40, b=0))
-st.plotly_chart(fig, use_container_width=True, config={"displayModeBar": True, "displaylogo": False})
-st.dataframe(filtered_df, hide_index=True, use_container_width=True)
+
+def signature_classeur(path: str) -> tuple:
+    """
+    Taille et date de modification du classeur : toute modification du fichier change la clé du cache.
+    """
+    try:
+        stat = os.stat(path)
+        return stat.st_size, stat.st_mtime_ns
+    except OSError:
+        return None, None
+
+@st.cache_resource
+def charger_moteur_classement(path: str, signature: tuple) -> Optional[SDGRankingEngine]:
+    """
+    Construit une seule fois par processus et par version du classeur le moteur de classement
+    précalculé (depuis le cube du bundle d'index s'il existe, sans relire le classeur).
+    Args:
+        path (str): Chemin du classeur SDR.
+        signature (tuple): `signature_classeur(path)`, utilisée seulement comme clé du cache.
+    Returns:
+        Optional[SDGRankingEngine]: Le moteur, ou None sans bundle ni classeur local.
+    """
+    from src.index_bundle import open_bundle
+    bundle = open_bundle()
+    cube = bundle.sdr_cube() if bundle is not None else None
+    if cube is not None:
+        return SDGRankingEngine(cube)
+    if signature == (None, None):
+        return None
+    return SDGRankingEngine.from_loader(SDGDataLoader(path))
+
+moteur_classement = charger_moteur_classement(excel_path, signature_classeur(excel_path))
+if moteur_classement is None:
+    # Pas de classeur local : édition 2024 téléchargée (cache disque, attente bornée)
+    moteur_classement = charger_classement(CLASSEMENT_URL)
+if moteur_classement is not None:
+    latest_year = moteur_classement.latest_year
+    colonnes_classement = {"sdgi_s": "Indice ODD", "Country": "Pays", "rank": "Rang"}
+    st.markdown(f"<b>{'Country selection (exactly 5)' if lang == 'English' else 'Sélection de 5 pays'}:</b>", unsafe_allow_html=True)
+    pays_options = moteur_classement.ranked_countries(latest_year)
+    default_selection = pays_options[:5] if len(pays_options) > 5 else pays_options
+    selected_pays = st.multiselect(
+        'Select exactly 5 countries to compare' if lang == 'English' else 'Sélectionne exactement 5 pays à comparer',
+        options=pays_options,
+        default=default_selection,
+        key='select_countries'
+    )
+    if len(selected_pays) != 5:
+        st.warning('Please select exactly 5 countries.' if lang == 'English' else 'Merci de sélectionner exactement 5 pays.')
+        filtered_df = pd.DataFrame(columns=["Pays", "year", "Indice ODD", "Rang"])
+    else:
+        filtered_df = moteur_classement.classement(latest_year, countries=selected_pays)
+        filtered_df = filtered_df[["Country", "year", "sdgi_s", "rank"]].rename(columns=colonnes_classement)
+    fig = px.bar(
+        filtered_df,
+        x="Indice ODD",
+        y="Pays",
+        orientation="h",
+        color="Indice ODD",
+        color_continuous_scale="Blues",
+        labels={"Indice ODD": "Score ODD", "Pays": "Pays"},
+        title="SDG Index Ranking (real-time data)" if lang == "English" else "Classement ODD (données en temps réel)"
+    )
+    fig.update_layout(yaxis={'categoryorder':'total ascending'}, height=600, margin=dict(l=0, r=0, t=40, b=0))
+    st.plotly_chart(fig, use_container_width=True, config={"displayModeBar": True, "displaylogo": False})
+    st.dataframe(filtered_df, hide_index=True, use_container_width=True)
 
 st.markdown(f"## {'Ask your question 👇' if lang == 'English' else 'Pose ta question 👇'}")
 
@@ -316,13 +379,15 @@ def process_user_question(question: str) -> None:
             st.markdown(f"<div style='background:#f5f5f5; border-radius:8px; padding:10px; margin-bottom:2px;'><b>👤 Toi :</b> {question}</div>", unsafe_allow_html=True)
     with st.chat_message("assistant"):
         spinner_text = "🤖 Thinking about your question..." if lang == "English" else "🤖 Je réfléchis à ta question..."
+        # Le spinner ne couvre que le chargement des données : les modèles encore en cours de
+        # chargement rejoignent les réponses suivantes, la réponse s'affiche ensuite en flux
         with st.spinner(spinner_text):
-            result = chercher_odd(question, lang=lang)
-            formatted_response = formater_reponse_odd(result, question, lang=lang)
-            if lang == "English":
-                st.markdown(f"<div style='background:#e6f7ff; border-radius:8px; padding:10px;'><b>🤖 SDGbot:</b><br>{formatted_response}</div>", unsafe_allow_html=True)
-            else:
-                st.markdown(f"<div style='background:#e6f7ff; border-radius:8px; padding:10px;'><b>🤖 ODDbot :</b><br>{formatted_response}</div>", unsafe_allow_html=True)
+            engine.wait_stage("data")
+        st.markdown("<b>🤖 SDGbot:</b>" if lang == "English" else "<b>🤖 ODDbot :</b>", unsafe_allow_html=True)
+        if hasattr(st, "write_stream"):
+            st.write_stream(engine.repondre_stream(question, lang=lang))
+        else:
+            st.markdown(engine.repondre(question, lang=lang)["answer"])
         feedback_buttons(idx)
 
 if search:
@@ -361,6 +426,14 @@ st.sidebar.markdown("- Objectif 2030")
 
 # Gestion du cache dans la sidebar
 st.sidebar.markdown("---")
+if engine.status == "ready":
+    st.sidebar.success(f"✅ Modèles prêts ({engine.init_seconds:.1f} s)")
+elif engine.status == "error":
+    st.sidebar.error(f"❌ Initialisation échouée : {engine.error}")
+else:
+    ready_stages = [name for name, info in engine.stages().items() if info["status"] == "ready"]
+    st.sidebar.info("⏳ Chargement des modèles en arrière-plan..."
+                    + (f" (prêts : {', '.join(ready_stages)})" if ready_stages else ""))
 
 
 # Section importante et valorisante pour les utilisateurs
@@ -0,0 +1,137 @@
+"""
+batching.py - Regroupement en micro-lots des appels de modèle
+
+Ce module fournit `MicroBatcher`, un ordonnanceur qui regroupe les requêtes concurrentes
+(encodage de questions, génération...) : il attend au plus `max_batch_size` éléments ou
+`max_wait_ms` millisecondes après le premier, appelle une seule fois la fonction de lot,
+puis rend à chaque appelant sa propre ligne de résultat. Des métriques de remplissage des
+lots et de temps d'attente sont tenues à jour.
+"""
+
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+
+class MicroBatcher:
+    """
+    Regroupe des appels individuels en appels par lot sur un thread dédié.
+    La fonction de lot reçoit une liste d'éléments et doit retourner une séquence de même longueur.
+    """
+    def __init__(self, batch_fn: Callable[[List[Any]], Sequence[Any]], max_batch_size: int = 32,
+                 max_wait_ms: float = 5.0, name: str = "micro-batcher") -> None:
+        """
+        Args:
+            batch_fn (Callable): Fonction appliquée à chaque lot.
+            max_batch_size (int): Taille maximale d'un lot.
+            max_wait_ms (float): Attente maximale après le premier élément avant de lancer le lot.
+            name (str): Nom du thread (pour les logs).
+        """
+        self.batch_fn = batch_fn
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000.0
+        self.name = name
+        self._queue: "queue.Queue[Optional[Tuple[Any, Future, float]]]" = queue.Queue()
+        self._stats_lock = threading.Lock()
+        self._batches = 0
+        self._items = 0
+        self._queue_delay_total = 0.0
+        self._queue_delay_max = 0.0
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def submit(self, item: Any) -> Future:
+        """
+        Ajoute un élément au prochain lot.
+        Returns:
+            Future: Résolu avec la ligne de résultat correspondant à l'élément.
+        """
+        if self._closed:
+            raise RuntimeError(f"{self.name} est fermé")
+        future: Future = Future()
+        self._queue.put((item, future, time.perf_counter()))
+        return future
+
+    def __call__(self, item: Any, timeout: Optional[float] = None) -> Any:
+        """
+        Soumet un élément et attend son résultat (appel bloquant).
+        """
+        return self.submit(item).result(timeout=timeout)
+
+    def _collect(self) -> Optional[List[Tuple[Any, Future, float]]]:
+        """
+        Attend le premier élément puis complète le lot jusqu'à la taille ou au délai maximal.
+        Retourne None quand l'ordonnanceur est fermé.
+        """
+        first = self._queue.get()
+        if first is None:
+            return None
+        batch = [first]
+        deadline = first[2] + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                entry = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if entry is None:
+                self._queue.put(None)
+                break
+            batch.append(entry)
+        return batch
+
+    def _run(self) -> None:
+        """
+        Boucle du thread : collecte un lot, appelle la fonction de lot, distribue les résultats.
+        """
+        while True:
+            batch = self._collect()
+            if batch is None:
+                return
+            started = time.perf_counter()
+            delays = [started - enqueued for _, _, enqueued in batch]
+            with self._stats_lock:
+                self._batches += 1
+                self._items += len(batch)
+                self._queue_delay_total += sum(delays)
+                self._queue_delay_max = max(self._queue_delay_max, max(delays))
+            try:
+                results = self.batch_fn([item for item, _, _ in batch])
+                if len(results) != len(batch):
+                    raise ValueError(f"{self.name} : {len(results)} résultats pour {len(batch)} éléments")
+                for (_, future, _), result in zip(batch, results):
+                    future.set_result(result)
+            except Exception as e:
+                for _, future, _ in batch:
+                    if not future.done():
+                        future.set_exception(e)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Métriques cumulées : nombre de lots et d'éléments, taille et remplissage moyens,
+        attente moyenne et maximale en file (ms).
+        """
+        with self._stats_lock:
+            batches, items = self._batches, self._items
+            avg_size = items / batches if batches else 0.0
+            return {
+                "batches": batches,
+                "items": items,
+                "avg_batch_size": round(avg_size, 2),
+                "avg_fill_ratio": round(avg_size / self.max_batch_size, 3),
+                "avg_queue_ms": round(1000 * self._queue_delay_total / items, 3) if items else 0.0,
+                "max_queue_ms": round(1000 * self._queue_delay_max, 3),
+                "pending": self._queue.qsize(),
+            }
+
+    def close(self) -> None:
+        """
+        Arrête le thread après traitement des éléments déjà soumis.
+        """
+        if not self._closed:
+            self._closed = True
+            self._queue.put(None)
+            self._thread.join(timeout=5)
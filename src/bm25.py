@@ -0,0 +1,186 @@
+"""
+bm25.py - Moteur BM25 autonome (NumPy/SciPy), sans Haystack
+
+Les documents sont analysés par langue (minuscules, accents retirés, mots vides retirés,
+racinisation légère FR/EN) puis stockés sous forme de matrice creuse CSR documents x termes dont
+chaque cellule porte déjà le poids BM25 du terme dans le document. Noter une question revient à un
+seul produit creux matrice-vecteur. L'index se sérialise dans un `.npz` compact.
+"""
+
+import re
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+from scipy import sparse
+
+from src.keyword_matcher import normaliser_texte
+
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+# Mots vides (déjà normalisés : minuscules, sans accents)
+STOPWORDS: Dict[str, frozenset] = {
+    "fr": frozenset("""
+        a au aux avec ce ces cet cette comme d dans de des du elle en est et etre eux il ils je l la le
+        les leur leurs lui m ma mais me meme mes moi mon n ne ni nos notre nous on ont ou par pas pour
+        qu que quel quelle quelles quels qui s sa sans se ses son sont sur ta te tes toi ton tu un une
+        vos votre vous y c j t quoi comment pourquoi quand combien dont ete sont peut faire fait
+        sera tout tous toute toutes tres plus
+    """.split()),
+    "en": frozenset("""
+        a about an and are as at be been but by can do does for from has have how i if in into is it
+        its me my no not of on or our so than that the their them then there these they this to was
+        we were what when where which who why will with you your
+    """.split()),
+}
+
+# Suffixes retirés par la racinisation légère, du plus long au plus court
+_SUFFIXES: Dict[str, Tuple[str, ...]] = {
+    "fr": ("issements", "issement", "atrices", "atrice", "ateurs", "ateur", "ations", "ation",
+           "ements", "ement", "ments", "ment", "ites", "ite", "euses", "euse", "eux", "iques", "ique",
+           "elles", "elle", "aux", "es", "s", "x", "e"),
+    "en": ("ational", "ations", "ation", "ments", "ment", "ness", "ities", "ity", "ings", "ing",
+           "ies", "ied", "ed", "es", "ly", "s"),
+}
+_MIN_STEM = 3
+
+
+def raciniser(token: str, lang: str = "fr") -> str:
+    """
+    Racinisation légère : retire le plus long suffixe connu en gardant au moins `_MIN_STEM` caractères.
+    """
+    for suffix in _SUFFIXES.get(lang, ()):
+        if token.endswith(suffix) and len(token) - len(suffix) >= _MIN_STEM:
+            return token[:-len(suffix)]
+    return token
+
+
+def analyser(text: str, lang: str = "fr") -> List[str]:
+    """
+    Découpe un texte en termes : normalisation, mots vides retirés, racinisation légère.
+    Args:
+        text (str): Texte à analyser.
+        lang (str): Code langue ("fr" ou "en").
+    Returns:
+        List[str]: Termes du texte.
+    """
+    stopwords = STOPWORDS.get(lang, frozenset())
+    return [raciniser(token, lang) for token in _TOKEN_RE.findall(normaliser_texte(text))
+            if token not in stopwords]
+
+
+class BM25Index:
+    """
+    Index BM25 d'un corpus, avec une matrice de poids par langue.
+    """
+    def __init__(self, matrices: Dict[str, sparse.csr_matrix], vocabularies: Dict[str, Dict[str, int]]) -> None:
+        """
+        Args:
+            matrices (Dict[str, csr_matrix]): Par code langue, poids BM25 (documents x termes).
+            vocabularies (Dict[str, Dict[str, int]]): Par code langue, terme -> colonne.
+        """
+        self.matrices = matrices
+        self.vocabularies = vocabularies
+
+    @property
+    def n_documents(self) -> int:
+        return next(iter(self.matrices.values())).shape[0] if self.matrices else 0
+
+    @staticmethod
+    def _weights(texts: Sequence[str], lang: str, k1: float, b: float) -> Tuple[sparse.csr_matrix, Dict[str, int]]:
+        """
+        Construit la matrice CSR des poids BM25 d'une langue.
+        """
+        vocabulary: Dict[str, int] = {}
+        indptr, indices, counts = [0], [], []
+        for text in texts:
+            tf: Dict[int, int] = {}
+            for term in analyser(text, lang):
+                column = vocabulary.setdefault(term, len(vocabulary))
+                tf[column] = tf.get(column, 0) + 1
+            indices.extend(tf.keys())
+            counts.extend(tf.values())
+            indptr.append(len(indices))
+        shape = (len(texts), len(vocabulary))
+        tf_matrix = sparse.csr_matrix((np.asarray(counts, dtype=np.float32),
+                                       np.asarray(indices, dtype=np.int32),
+                                       np.asarray(indptr, dtype=np.int32)), shape=shape)
+        lengths = np.asarray(tf_matrix.sum(axis=1)).ravel()
+        avg_length = lengths.mean() if len(lengths) and lengths.mean() > 0 else 1.0
+        df = np.bincount(tf_matrix.indices, minlength=shape[1])
+        idf = np.log1p((shape[0] - df + 0.5) / (df + 0.5)).astype(np.float32)
+        # Normalisation de longueur par ligne, puis saturation et pondération idf par cellule
+        row_norm = np.repeat(k1 * (1 - b + b * lengths / avg_length), np.diff(tf_matrix.indptr)).astype(np.float32)
+        tf = tf_matrix.data
+        tf_matrix.data = idf[tf_matrix.indices] * tf * (k1 + 1) / (tf + row_norm)
+        return tf_matrix, vocabulary
+
+    @classmethod
+    def build(cls, texts_by_lang: Dict[str, Sequence[str]], k1: float = BM25_K1, b: float = BM25_B) -> "BM25Index":
+        """
+        Construit l'index à partir des textes des documents, dans chaque langue (même ordre partout).
+        Args:
+            texts_by_lang (Dict[str, Sequence[str]]): Par code langue, texte de chaque document.
+        Returns:
+            BM25Index: L'index prêt à interroger.
+        """
+        matrices, vocabularies = {}, {}
+        for lang, texts in texts_by_lang.items():
+            matrices[lang], vocabularies[lang] = cls._weights(texts, lang, k1, b)
+        return cls(matrices, vocabularies)
+
+    def scores(self, question: str, lang: str = "fr") -> np.ndarray:
+        """
+        Score BM25 de chaque document pour la question (un produit creux matrice-vecteur).
+        """
+        if lang not in self.matrices:
+            lang = next(iter(self.matrices))
+        matrix, vocabulary = self.matrices[lang], self.vocabularies[lang]
+        columns = [vocabulary[t] for t in analyser(question, lang) if t in vocabulary]
+        if not columns:
+            return np.zeros(matrix.shape[0], dtype=np.float32)
+        query = np.bincount(columns, minlength=matrix.shape[1]).astype(np.float32)
+        return matrix @ query
+
+    def search(self, question: str, top_k: int = 3, lang: str = "fr") -> List[Tuple[int, float]]:
+        """
+        Documents les mieux notés (score strictement positif).
+        Returns:
+            List[Tuple[int, float]]: (indice du document, score) par score décroissant.
+        """
+        scores = self.scores(question, lang)
+        candidates = np.flatnonzero(scores > 0)
+        top = candidates[np.argsort(-scores[candidates], kind="stable")[:top_k]]
+        return [(int(i), float(scores[i])) for i in top]
+
+    def save(self, path: str) -> None:
+        """
+        Sérialise l'index dans un fichier `.npz` compressé.
+        """
+        arrays = {}
+        for lang, matrix in self.matrices.items():
+            vocabulary = self.vocabularies[lang]
+            terms = sorted(vocabulary, key=vocabulary.get)
+            arrays[f"{lang}_data"] = matrix.data
+            arrays[f"{lang}_indices"] = matrix.indices
+            arrays[f"{lang}_indptr"] = matrix.indptr
+            arrays[f"{lang}_shape"] = np.asarray(matrix.shape, dtype=np.int64)
+            arrays[f"{lang}_terms"] = np.asarray(terms, dtype=str)
+        arrays["langs"] = np.asarray(list(self.matrices), dtype=str)
+        np.savez_compressed(path, **arrays)
+
+    @classmethod
+    def load(cls, path: str) -> "BM25Index":
+        """
+        Recharge un index sérialisé par `save`.
+        """
+        matrices, vocabularies = {}, {}
+        with np.load(path, allow_pickle=False) as archive:
+            for lang in archive["langs"].tolist():
+                shape = tuple(int(v) for v in archive[f"{lang}_shape"])
+                matrices[lang] = sparse.csr_matrix((archive[f"{lang}_data"], archive[f"{lang}_indices"],
+                                                    archive[f"{lang}_indptr"]), shape=shape)
+                vocabularies[lang] = {term: i for i, term in enumerate(archive[f"{lang}_terms"].tolist())}
+        return cls(matrices, vocabularies)
@@ -1,81 +1,93 @@
 """
 chat_bot.py - Logique principale du Chatbot ODD
 
-Ce module gère la logique de recherche, le matching, le fallback, la gestion du cache et l'intégration avec Haystack et Sentence Transformers.
+Ce module gère la logique de recherche, le matching, le fallback, la gestion du cache et l'intégration avec Sentence Transformers.
+La recherche lexicale utilise l'index BM25 autonome de `src.bm25` ; Haystack n'est plus importé à
+l'exécution et reste optionnel (`create_haystack_store`).
+
+L'état (modèles, données, index) est porté par un objet `ChatbotEngine` unique par processus,
+obtenu via `get_engine()`. Importer ce module est léger : les bibliothèques lourdes et les modèles
+ne sont chargés qu'à l'initialisation du moteur, qui peut tourner en arrière-plan (`start()`)
+pendant que l'interface s'affiche. L'initialisation est un graphe d'étapes (`src.warmup`) : le
+modèle d'embeddings, l'index BM25 et le LLM se chargent en parallèle, et le moteur répond dès que
+les données sont lues (routeur et mots-clés), puis avec BM25, les embeddings et le LLM à mesure
+qu'ils sont prêts. Si un bundle d'index a été construit (`python main.py build-index`, voir
+`src.index_bundle`), ces étapes ouvrent ses fichiers en lecture seule au lieu de calculer les index.
 
 Fonctions principales :
-- initialize_chatbot : Initialise tous les modèles, données et caches nécessaires.
+- get_engine : Retourne le moteur partagé du processus.
+- initialize_chatbot : Initialise (de manière bloquante) tous les modèles, données et caches nécessaires.
 - chercher_odd : Recherche la réponse la plus pertinente à une question utilisateur.
 - formater_reponse_odd : Formate la réponse à afficher à l'utilisateur.
+- repondre : Recherche et formate la réponse, avec cache des questions répétées.
 - clear_cache : Vide le cache local.
 - get_cache_info : Retourne des infos sur le cache.
-
-Variables globales :
-- model, document_store, retriever, odds, faq, odd_documents, odd_embeddings
 """
+import contextlib
 import json
-import re
 import os
+import threading
 import time
-from typing import Any, Dict, Optional, List, Union
+from typing import Any, Dict, Iterator, Optional, List, Tuple, Union
+
+import numpy as np
 
 # Détermine la racine du projet (dossier contenant main.py)
 PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
 
 try:
-    from sentence_transformers import SentenceTransformer, util
-except ImportError:
-    SentenceTransformer = None
-    util = None
-try:
-    from haystack.document_stores import InMemoryDocumentStore
-    from haystack.nodes import BM25Retriever
-except ImportError:
-    InMemoryDocumentStore = None
-    BM25Retriever = None
-try:
-    from transformers import pipeline
-except ImportError:
-    pipeline = None
-
-try:
-    from llm_integration import llm_integration
-except ImportError:
-    llm_integration = None
-try:
-    from model_cache import model_cache
+    from src.model_cache import model_cache
 except ImportError:
     model_cache = None
+from src.batching import MicroBatcher
+from src.bm25 import BM25Index
+from src.embedding_store import EmbeddingStore
+from src.index_bundle import IndexBundle, open_bundle
+from src.hybrid_retrieval import HybridRetriever, normaliser_lignes
+from src.keyword_matcher import LANG_CODES, KeywordMatcher
+from src.lru_cache import LRUCache, normaliser_question
+from src.semantic_cache import SemanticCache
+from src.passage_index import PassageIndex, build_ann, construire_passages
+from src.query_router import QueryRouter
+from src.model_registry import model_registry
+from src.warmup import WarmupGraph
+
+def _build_lock(key: str) -> Any:
+    """
+    Verrou inter-processus de construction d'un artefact du cache (sans effet si le cache est indisponible).
+    """
+    if model_cache and hasattr(model_cache, 'build_lock'):
+        return model_cache.build_lock(key)
+    return contextlib.nullcontext()
+
+EMBEDDING_MODEL_ID = "all-MiniLM-L6-v2"
+LLM_MODEL_ID = "google/flan-t5-small"
+LLM_TASK = "text2text-generation"
+
+# Micro-lots d'encodage des questions (configurables par variables d'environnement)
+EMBED_BATCH_SIZE = int(os.environ.get("ODD_EMBED_BATCH_SIZE", "16"))
+EMBED_MAX_WAIT_MS = float(os.environ.get("ODD_EMBED_MAX_WAIT_MS", "5"))
+# Caches des questions répétées : embeddings et réponses mises en forme (taille, durée de vie en s)
+EMBED_CACHE_SIZE = int(os.environ.get("ODD_EMBED_CACHE_SIZE", "1024"))
+EMBED_CACHE_TTL = float(os.environ.get("ODD_EMBED_CACHE_TTL", "86400"))
+ANSWER_CACHE_SIZE = int(os.environ.get("ODD_ANSWER_CACHE_SIZE", "256"))
+ANSWER_CACHE_TTL = float(os.environ.get("ODD_ANSWER_CACHE_TTL", "3600"))
+# Niveau disque des caches (survit aux redémarrages), désactivé par défaut
+CACHE_DISK = os.environ.get("ODD_CACHE_DISK", "0") == "1"
+QUERY_CACHE_DIR = os.path.join(PROJECT_ROOT, "cache", "queries")
+# Nombre de passages transmis au LLM comme contexte
+PASSAGE_TOP_K = int(os.environ.get("ODD_PASSAGE_TOP_K", "4"))
+# Fichier de données chargé par le moteur (dans data/), monolingue ou bilingue {'fr', 'en'}
+DATA_FILE = os.environ.get("ODD_DATA_FILE", "odd_data_enriched.json")
 
-# Variables globales pour les modèles et données
-model: Optional[Any] = None
-document_store: Optional[Any] = None
-retriever: Optional[Any] = None
-odds: Optional[List[Dict[str, Any]]] = None
-faq: Optional[List[Dict[str, Any]]] = None
-odd_documents: Optional[List[str]] = None
-odd_embeddings: Any = None
-
-# Charger le pipeline LLM local une seule fois
-_llm_pipeline = None
 def get_llm_pipeline() -> any:
     """
-    Charge et retourne le pipeline LLM local (modèle text2text-generation).
+    Retourne le pipeline LLM local (modèle text2text-generation), partagé via le registre de modèles :
+    c'est le même objet que celui utilisé par `llm_integration`.
     Returns:
         pipeline ou None : pipeline transformers prêt à l'emploi ou None si indisponible.
     """
-    global _llm_pipeline
-    if pipeline is None:
-        print("[ERREUR] transformers n'est pas installé. Réponse LLM désactivée.")
-        return None
-    if _llm_pipeline is None:
-        try:
-            # Modèle ultra-léger pour CPU
-            _llm_pipeline = pipeline("text2text-generation", model="google/flan-t5-small", device=-1)
-        except Exception as e:
-            print(f"[ERREUR] Impossible de charger le pipeline LLM: {e}")
-            _llm_pipeline = None
-    return _llm_pipeline
+    return model_registry.get_pipeline(LLM_MODEL_ID, LLM_TASK)
 
 def generer_reponse_llm(question: str) -> str:
     """
@@ -94,251 +106,778 @@ def generer_reponse_llm(question: str) -> str:
     except Exception as e:
         return f"[ERREUR LLM] {e}"
 
-def initialize_chatbot() -> None:
-    """
-    Initialise le chatbot avec le système de cache pour accélérer le chargement.
-    Charge les données, le modèle, le document store, le retriever et les embeddings.
-    Variables globales modifiées : model, document_store, retriever, odds, faq, odd_documents, odd_embeddings
+class ChatbotEngine:
     """
+    Moteur du chatbot : données ODD/FAQ, modèle SentenceTransformer, index BM25, embeddings
+    et intégration LLM. Une seule instance par processus (voir `get_engine`).
+    L'état de préparation est exposé par `status` ("idle", "loading", "ready", "error"), et celui
+    de chaque étape du démarrage par `stages()`.
     """
-    Initialise le chatbot avec le système de cache pour accélérer le chargement.
-    Charge les données, le modèle, le document store, le retriever et les embeddings.
-    """
-    global model, document_store, retriever, odds, faq, odd_documents, odd_embeddings
-    print("🚀 Initialisation du chatbot ODD...")
-    start_time = time.time()
-    # Chargement des données ODD et FAQ enrichies
-    data_path = os.path.join(PROJECT_ROOT, "data", "odd_data_enriched.json")
-    try:
-        with open(data_path, "r", encoding="utf-8") as f:
-            data = json.load(f)
-        odds = data.get("odds", [])
-        faq = data.get("faq", [])
-    except Exception as e:
-        print(f"❌ Fichier de données introuvable ou corrompu : {data_path}\nErreur : {e}")
-        odds = []
-        faq = []
-    if not odds:
-        print("[ERREUR] Aucune donnée ODD chargée. Le chatbot ne pourra pas répondre correctement.")
-    # Générer le hash des données pour le cache
-    if model_cache and hasattr(model_cache, '_get_data_hash'):
-        data_hash = model_cache._get_data_hash({"odds": odds, "faq": faq})
-    else:
-        data_hash = "nohash"
-    # Tentative de chargement du modèle depuis le cache
-    if model_cache and hasattr(model_cache, 'load_model'):
-        print("🤖 Chargement du modèle SentenceTransformer...")
-        model = model_cache.load_model()
-    else:
-        model = None
-    if model is None and SentenceTransformer is not None:
+    def __init__(self, use_bundle: bool = True) -> None:
+        """
+        Crée un moteur vide ; rien n'est chargé avant `initialize()` ou `start()`.
+        Args:
+            use_bundle (bool): Ouvre le bundle d'index actif s'il existe (voir `src.index_bundle`)
+                au lieu de construire les index ; False pour construire le bundle lui-même.
+        """
+        self.use_bundle = use_bundle
+        self.bundle: Optional[IndexBundle] = None
+        self._use_model = False
+        self.bm25: Optional[BM25Index] = None
+        self.odds: Optional[List[Dict[str, Any]]] = None
+        self.faq: Optional[List[Dict[str, Any]]] = None
+        self.corpus: List[Dict[str, Any]] = []
+        self.corpus_texts: Dict[str, List[str]] = {}
+        self.corpus_ids: List[str] = []
+        self.corpus_embeddings: Dict[str, Any] = {}
+        self.embedding_stores: Dict[str, EmbeddingStore] = {}
+        self.hybrid: Optional[HybridRetriever] = None
+        self.passage_indexes: Dict[str, PassageIndex] = {}
+        self.corpus_version = ""
+        self.embedding_cache = LRUCache(EMBED_CACHE_SIZE, EMBED_CACHE_TTL, name="query-embeddings",
+                                        disk_dir=os.path.join(QUERY_CACHE_DIR, "embeddings") if CACHE_DISK else None)
+        self.answer_cache = LRUCache(ANSWER_CACHE_SIZE, ANSWER_CACHE_TTL, name="answers",
+                                     disk_dir=os.path.join(QUERY_CACHE_DIR, "answers") if CACHE_DISK else None)
+        self.semantic_cache = SemanticCache()
+        self.llm: Optional[Any] = None
+        self.query_encoder: Optional[MicroBatcher] = None
+        self.keyword_matcher: Optional[KeywordMatcher] = None
+        self.router: Optional[QueryRouter] = None
+        self.status = "idle"
+        self.error: Optional[str] = None
+        self.init_seconds: Optional[float] = None
+        self._ready = threading.Event()
+        self._lock = threading.Lock()
+        self._hybrid_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        # Étapes de démarrage : modèle et LLM se chargent en parallèle des données et des index
+        self.warmup = WarmupGraph(name="chatbot-warmup")
+        self.warmup.add("data", self._stage_data)
+        self.warmup.add("model", self._stage_model)
+        self.warmup.add("llm", self._stage_llm)
+        self.warmup.add("bm25", self._stage_bm25, deps=("data",))
+        self.warmup.add("embeddings", self._stage_embeddings, deps=("data", "model"))
+        self.warmup.add("passages", self._stage_passages, deps=("data", "model"))
+
+    @property
+    def model(self) -> Optional[Any]:
+        """
+        SentenceTransformer partagé, obtenu depuis le registre (rechargé s'il a été déchargé).
+        """
+        if not self._use_model:
+            return None
+        return model_registry.get_sentence_transformer(EMBEDDING_MODEL_ID)
+
+    @property
+    def is_ready(self) -> bool:
+        """
+        True une fois l'initialisation terminée (avec ou sans erreur).
+        """
+        return self._ready.is_set()
+
+    def wait_ready(self, timeout: Optional[float] = None) -> bool:
+        """
+        Attend la fin de l'initialisation (lancée si besoin en arrière-plan).
+        Args:
+            timeout (float): Attente maximale en secondes (None = illimitée).
+        Returns:
+            bool: True si le moteur est prêt.
+        """
+        self.start()
+        return self._ready.wait(timeout)
+
+    def wait_stage(self, name: str = "data", timeout: Optional[float] = None) -> bool:
+        """
+        Attend qu'une étape du démarrage soit terminée (initialisation lancée si besoin en
+        arrière-plan). Après l'étape "data", le moteur répond déjà (routeur et mots-clés), puis
+        passe à BM25, aux embeddings et au LLM au fur et à mesure de leur chargement.
+        Args:
+            name (str): Étape attendue ("data", "model", "bm25", "embeddings", "passages", "llm").
+            timeout (float): Attente maximale en secondes (None = illimitée).
+        Returns:
+            bool: True si l'étape s'est terminée avec succès.
+        """
+        self.start()
+        return self.warmup.wait(name, timeout)
+
+    def stages(self) -> Dict[str, Dict[str, Any]]:
+        """
+        État de chaque étape du démarrage (voir `WarmupGraph.status`).
+        """
+        return self.warmup.status()
+
+    def start(self) -> "ChatbotEngine":
+        """
+        Lance l'initialisation dans un thread d'arrière-plan (une seule fois par processus).
+        Returns:
+            ChatbotEngine: Le moteur lui-même, pour chaîner les appels.
+        """
+        with self._lock:
+            if self.status == "idle" and self._thread is None:
+                self._thread = threading.Thread(target=self.initialize, name="chatbot-init", daemon=True)
+                self._thread.start()
+        return self
+
+    def initialize(self) -> None:
+        """
+        Initialise le chatbot avec le système de cache pour accélérer le chargement.
+        Charge les données, le modèle, l'index BM25, les embeddings et le LLM, en parallèle quand
+        les étapes sont indépendantes (voir `self.warmup`).
+        Si l'initialisation est déjà faite ou en cours dans un autre thread, attend simplement sa fin.
+        """
+        with self._lock:
+            owner = self.status == "idle"
+            if owner:
+                self.status = "loading"
+        if not owner:
+            self._ready.wait()
+            return
         try:
-            print("📥 Téléchargement du modèle ultra-léger depuis HuggingFace...")
-            model = SentenceTransformer("all-MiniLM-L6-v2")
-            if model_cache and hasattr(model_cache, 'save_model'):
-                model_cache.save_model(model)
+            self._initialize()
+            self.status = "ready"
         except Exception as e:
-            print(f"[ERREUR] Impossible de charger le modèle SentenceTransformer : {e}")
-            model = None
-    if model is None:
-        print("[ERREUR] SentenceTransformer non disponible. Les recherches avancées sont désactivées.")
-    # Tentative de chargement du document store depuis le cache
-    if model_cache and hasattr(model_cache, 'load_document_store'):
-        print("📚 Chargement du document store...")
-        document_store = model_cache.load_document_store(data_hash)
-    else:
-        document_store = None
-    if document_store is None and InMemoryDocumentStore is not None:
+            print(f"[ERREUR] Initialisation du chatbot échouée : {e}")
+            self.error = str(e)
+            self.status = "error"
+        finally:
+            self._ready.set()
+
+    def _initialize(self) -> None:
+        """
+        Corps de l'initialisation (voir `initialize`) : exécute le graphe des étapes de démarrage.
+        """
+        print("🚀 Initialisation du chatbot ODD...")
+        start_time = time.time()
+        self.warmup.run()
+        self.init_seconds = time.time() - start_time
+        timings = ", ".join(f"{name} {info['seconds']:.2f}s" for name, info in self.warmup.status().items()
+                            if info["seconds"] is not None)
+        print(f"✅ Chatbot initialisé en {self.init_seconds:.2f} secondes ({timings})")
+        # Afficher les informations du cache
+        if model_cache and hasattr(model_cache, 'get_cache_info'):
+            cache_info = model_cache.get_cache_info()
+            print(f"📊 Cache: {cache_info.get('file_count', 0)} fichiers, {cache_info.get('total_size_mb', 0)} MB")
+
+    def _stage_data(self) -> None:
+        """
+        Étape "data" : données ODD et FAQ, automate de mots-clés, routeur et corpus. Dès sa fin,
+        `chercher_odd` répond par le routeur et les mots-clés.
+        """
+        # Bundle d'index construit par `main.py build-index` : corpus et index déjà calculés
+        self.bundle = open_bundle(data_file=DATA_FILE) if self.use_bundle else None
+        corpus: Dict[str, Any] = {}
+        if self.bundle is not None:
+            print(f"📦 Bundle d'index {self.bundle.version} : {self.bundle.path}")
+            corpus = self.bundle.corpus()
+            odds, faq = corpus["odds"], corpus["faq"]
+        else:
+            # Chargement des données ODD et FAQ enrichies
+            data_path = os.path.join(PROJECT_ROOT, "data", DATA_FILE)
+            try:
+                with open(data_path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                odds = data.get("odds", [])
+                faq = data.get("faq", [])
+            except Exception as e:
+                print(f"❌ Fichier de données introuvable ou corrompu : {data_path}\nErreur : {e}")
+                odds = []
+                faq = []
+        if not odds:
+            print("[ERREUR] Aucune donnée ODD chargée. Le chatbot ne pourra pas répondre correctement.")
+        self.faq = faq
+        self.keyword_matcher = KeywordMatcher.from_corpus(odds, faq)
+        self.router = QueryRouter.from_corpus(odds)
+        self.odds = odds
+        if self.bundle is not None:
+            self.corpus, self.corpus_ids, self.corpus_texts = corpus["documents"], corpus["ids"], corpus["texts"]
+            self.corpus_version = self.bundle.data_hash
+            return
+        self._build_corpus()
+        # Générer le hash des données pour le cache
+        if model_cache and hasattr(model_cache, '_get_data_hash'):
+            self.corpus_version = model_cache._get_data_hash({"odds": self.odds, "faq": self.faq})
+        else:
+            self.corpus_version = "nohash"
+
+    def _stage_model(self) -> None:
+        """
+        Étape "model" : SentenceTransformer via le registre partagé (cache local puis HuggingFace).
+        """
         try:
-            print("🔨 Création du document store...")
-            document_store = create_haystack_store()
-            if model_cache and hasattr(model_cache, 'save_document_store'):
-                model_cache.save_document_store(document_store, data_hash)
-        except Exception as e:
-            print(f"[ERREUR] Impossible de créer le document store : {e}")
-            document_store = None
-    # Tentative de chargement du retriever depuis le cache
-    if model_cache and hasattr(model_cache, 'load_retriever'):
-        print("🔍 Chargement du retriever...")
-        retriever = model_cache.load_retriever(data_hash)
-    else:
-        retriever = None
-    if retriever is None and BM25Retriever is not None and document_store is not None:
+            from sentence_transformers import SentenceTransformer
+        except ImportError:
+            SentenceTransformer = None
+        if SentenceTransformer is not None or model_registry.resolve_backend(None) == "onnx":
+            print("🤖 Chargement du modèle SentenceTransformer...")
+            self._use_model = model_registry.get_sentence_transformer(EMBEDDING_MODEL_ID) is not None
+        if self.model is None:
+            print("[ERREUR] SentenceTransformer non disponible. Les recherches avancées sont désactivées.")
+        else:
+            self.query_encoder = MicroBatcher(self._encode_batch, max_batch_size=EMBED_BATCH_SIZE,
+                                              max_wait_ms=EMBED_MAX_WAIT_MS, name="query-encoder")
+
+    def _stage_bm25(self) -> None:
+        """
+        Étape "bm25" : index BM25 depuis le cache, sinon construit (un seul worker le construit).
+        """
+        if self.bundle is not None:
+            self.bm25 = self.bundle.bm25()
+            self._rebuild_hybrid()
+            return
+        data_hash = self.corpus_version
+        with _build_lock(f"bm25:{data_hash}"):
+            bm25 = None
+            if model_cache and hasattr(model_cache, 'load_bm25_index'):
+                print("🔍 Chargement de l'index BM25...")
+                bm25 = model_cache.load_bm25_index(data_hash)
+                if bm25 is not None and bm25.n_documents != len(self.corpus):
+                    bm25 = None
+            if bm25 is None and self.corpus:
+                try:
+                    print("🔨 Création de l'index BM25...")
+                    bm25 = BM25Index.build(self.corpus_texts)
+                    if model_cache and hasattr(model_cache, 'save_bm25_index'):
+                        model_cache.save_bm25_index(bm25, data_hash)
+                except Exception as e:
+                    print(f"[ERREUR] Impossible de créer l'index BM25 : {e}")
+                    bm25 = None
+        self.bm25 = bm25
+        self._rebuild_hybrid()
+
+    def _stage_embeddings(self) -> None:
+        """
+        Étape "embeddings" : matrices d'embeddings normalisés (float16) de tous les documents, une par langue.
+        """
+        if self.bundle is not None:
+            self.embedding_stores = self.bundle.embedding_stores()
+            self.corpus_embeddings = {code: store.matrix for code, store in self.embedding_stores.items()}
+        else:
+            print("🧮 Pré-calcul des embeddings...")
+            with _build_lock(f"embeddings:{self.corpus_version}"):
+                self.corpus_embeddings = self._load_embeddings(self.corpus_version)
+        self._rebuild_hybrid()
+
+    def _stage_passages(self) -> None:
+        """
+        Étape "passages" : index de passages (cibles, indicateurs, actions, FAQ) pour un contexte LLM réduit.
+        """
+        if self.bundle is not None:
+            self.passage_indexes = self.bundle.passage_indexes()
+        elif self.model is not None and self.corpus:
+            print("🧩 Chargement des index de passages...")
+            with _build_lock(f"passages:{self.corpus_version}"):
+                self.passage_indexes = self._load_passage_indexes(self.corpus_version)
+
+    def _stage_llm(self) -> None:
+        """
+        Étape "llm" : intégration LLM (reformulation des réponses).
+        """
         try:
-            print("🔨 Création du retriever...")
-            retriever = BM25Retriever(document_store=document_store, top_k=3)
-            if model_cache and hasattr(model_cache, 'save_retriever'):
-                model_cache.save_retriever(retriever, data_hash)
+            from src.llm_integration import llm_integration
+            # Préchargement du pipeline partagé pour que la première question ne l'attende pas
+            self.llm = llm_integration if llm_integration.generator is not None else None
         except Exception as e:
-            print(f"[ERREUR] Impossible de créer le retriever : {e}")
-            retriever = None
-    # Pré-calculer les embeddings pour les ODD (fallback)
-    if model_cache and hasattr(model_cache, 'load_embeddings'):
-        print("🧮 Pré-calcul des embeddings...")
-        embeddings_cache = model_cache.load_embeddings(data_hash)
-    else:
-        embeddings_cache = None
-    if embeddings_cache is None and model is not None and odds:
+            print(f"[ERREUR] Intégration LLM indisponible : {e}")
+            self.llm = None
+
+    def prepare_indexes(self) -> None:
+        """
+        Exécute de manière bloquante les étapes de démarrage sauf le LLM (données, modèle, BM25,
+        embeddings, passages), pour construire un bundle d'index.
+        """
+        for stage in (self._stage_data, self._stage_model, self._stage_bm25, self._stage_embeddings,
+                      self._stage_passages):
+            stage()
+
+    def _rebuild_hybrid(self) -> None:
+        """
+        Reconstruit le moteur hybride avec les composants disponibles (BM25 et/ou embeddings).
+        Appelé à la fin des étapes "bm25" et "embeddings", dans l'ordre où elles se terminent.
+        """
+        with self._hybrid_lock:
+            if self.bm25 is None and not self.corpus_embeddings:
+                return
+            self.hybrid = HybridRetriever(
+                self.corpus,
+                embeddings=self.corpus_embeddings,
+                sparse_search=self._bm25_search if self.bm25 is not None else None,
+            )
+
+    def _build_corpus(self) -> None:
+        """
+        Construit la liste unique des documents recherchables (ODD puis FAQ), leurs identifiants
+        ("odd:4", "faq:0"...) et leurs textes dans chaque langue (titre, description, cibles, actions...), utilisés par l'index BM25 et l'encodage dense.
+        """
+        self.corpus = []
+        self.corpus_ids = []
+        self.corpus_texts = {code: [] for code in LANG_CODES.values()}
+        for odd in self.odds or []:
+            self.corpus.append(odd)
+            self.corpus_ids.append(f"odd:{odd.get('odd')}")
+            for lang, code in LANG_CODES.items():
+                self.corpus_texts[code].append(self._odd_text(odd, lang))
+        for position, faq_item in enumerate(self.faq or []):
+            self.corpus_ids.append(f"faq:{position}")
+            # On retourne une structure FAQ bilingue compatible
+            self.corpus.append({
+                "type": "faq",
+                "question": faq_item.get("question", {}),
+                "answer": faq_item.get("answer", {}),
+                "keywords": faq_item.get("keywords", {}),
+                "category": faq_item.get("category", "général")
+            })
+            for lang, code in LANG_CODES.items():
+                self.corpus_texts[code].append(self._faq_text(faq_item, lang))
+
+    def _load_embeddings(self, data_hash: str) -> Dict[str, Any]:
+        """
+        Ouvre depuis le cache, ou calcule et sauvegarde, la matrice d'embeddings de chaque langue.
+        Les lignes sont normalisées (norme L2 = 1) et stockées en float16 : la similarité cosinus
+        est un simple produit scalaire. Les matrices sont projetées en mémoire depuis le cache
+        (`EmbeddingStore`) : tous les workers de la machine partagent les mêmes pages. Une langue
+        dont les textes sont identiques à une autre (données monolingues) partage sa matrice au lieu
+        d'être réencodée.
+        Returns:
+            Dict[str, np.ndarray]: Par code langue, matrice (documents x dimensions).
+        """
+        matrices: Dict[str, Any] = {}
+        self.embedding_stores = {}
+        for code, texts in self.corpus_texts.items():
+            store = None
+            if model_cache and hasattr(model_cache, 'load_embedding_store'):
+                store = model_cache.load_embedding_store(data_hash, code)
+                if store is not None and not store.matches(self.corpus_ids):
+                    store = None
+            if store is None and self.model is not None and texts:
+                same = next((other for other, other_texts in self.corpus_texts.items()
+                             if other in self.embedding_stores and other_texts == texts), None)
+                try:
+                    if same is not None:
+                        matrix = self.embedding_stores[same].matrix
+                    else:
+                        print(f"🔨 Calcul des embeddings ({code})...")
+                        matrix = normaliser_lignes(self.model.encode(texts, convert_to_numpy=True)).astype(np.float16)
+                    store = EmbeddingStore(matrix, self.corpus_ids, texts)
+                    if model_cache and hasattr(model_cache, 'save_embedding_store'):
+                        model_cache.save_embedding_store(store, data_hash, code)
+                        # Relecture projetée : ce processus partage aussi les pages du cache
+                        store = model_cache.load_embedding_store(data_hash, code) or store
+                except Exception as e:
+                    print(f"[ERREUR] Impossible de calculer les embeddings ({code}) : {e}")
+                    store = None
+            if store is not None:
+                self.embedding_stores[code] = store
+                matrices[code] = store.matrix
+        return matrices
+
+    def _load_passage_indexes(self, data_hash: str) -> Dict[str, PassageIndex]:
+        """
+        Charge depuis le cache, ou construit et sauvegarde, l'index de passages de chaque langue.
+        Returns:
+            Dict[str, PassageIndex]: Par code langue, passages et index ANN.
+        """
+        indexes: Dict[str, PassageIndex] = {}
+        for lang, code in LANG_CODES.items():
+            index = None
+            if model_cache and hasattr(model_cache, 'load_passage_index'):
+                index = model_cache.load_passage_index(data_hash, code)
+            if index is None:
+                try:
+                    passages = construire_passages(self.odds, self.faq, lang)
+                    print(f"🔨 Calcul de l'index de passages ({code}, {len(passages)} passages)...")
+                    vectors = self.model.encode([p["text"] for p in passages], convert_to_numpy=True)
+                    index = PassageIndex(passages, build_ann(vectors))
+                    if model_cache and hasattr(model_cache, 'save_passage_index'):
+                        model_cache.save_passage_index(index, data_hash, code)
+                except Exception as e:
+                    print(f"[ERREUR] Impossible de construire l'index de passages ({code}) : {e}")
+                    continue
+            indexes[code] = index
+        return indexes
+
+    def contexte(self, question: str, odd_data: Dict[str, Any], lang: str = "Français",
+                 top_k: int = PASSAGE_TOP_K) -> Optional[str]:
+        """
+        Contexte court pour le LLM : les passages de l'ODD retenu les plus proches de la question.
+        Args:
+            question (str): La question de l'utilisateur.
+            odd_data (Dict[str, Any]): Document retenu par `chercher_odd`.
+            lang (str): "English" ou "Français".
+            top_k (int): Nombre de passages.
+        Returns:
+            Optional[str]: Passages, un par ligne ; None si l'index n'est pas disponible ou si le
+            document n'est pas un ODD complet (cible, FAQ et ODD liés sont déjà courts).
+        """
+        index = self.passage_indexes.get(LANG_CODES.get(lang, "fr"))
+        if index is None or self.model is None or odd_data.get("type", "odd") != "odd" or "odd" not in odd_data:
+            return None
         try:
-            print("🔨 Calcul des embeddings...")
-            odd_documents = [f"ODD {d['odd']}: {d['title']} - {d['description']} - {' '.join(d.get('keywords', []))}" for d in odds]
-            embeddings_cache = {
-                "documents": odd_documents,
-                "embeddings": model.encode(odd_documents, convert_to_tensor=True)
-            }
-            if model_cache and hasattr(model_cache, 'save_embeddings'):
-                model_cache.save_embeddings(embeddings_cache, data_hash)
+            passages = index.search(self.encode_query(question, lang), top_k=top_k, odd=odd_data.get("odd"))
         except Exception as e:
-            print(f"[ERREUR] Impossible de calculer les embeddings : {e}")
-            embeddings_cache = {"documents": [], "embeddings": []}
-    if embeddings_cache:
-        odd_documents = embeddings_cache.get("documents", [])
-        odd_embeddings = embeddings_cache.get("embeddings", [])
-    elapsed_time = time.time() - start_time
-    print(f"✅ Chatbot initialisé en {elapsed_time:.2f} secondes")
-    # Afficher les informations du cache
-    if model_cache and hasattr(model_cache, 'get_cache_info'):
-        cache_info = model_cache.get_cache_info()
-        print(f"📊 Cache: {cache_info.get('file_count', 0)} fichiers, {cache_info.get('total_size_mb', 0)} MB")
+            print(f"[ERREUR] Recherche de passages échouée : {e}")
+            return None
+        return "\n".join(p["text"] for p in passages) or None
+
+    @staticmethod
+    def _odd_text(odd: Dict[str, Any], lang: str = "Français") -> str:
+        """
+        Texte indexé d'un ODD (titre, description, statistiques, mots-clés, cibles, actions).
+        """
+        en = lang == "English"
+        doc_text = f"{'SDG' if en else 'ODD'} {odd['odd']}: {localiser(odd['title'], lang)}. {localiser(odd['description'], lang)}. "
+        doc_text += f"{'Statistics' if en else 'Statistiques'}: {localiser(odd.get('statistics', ''), lang)}. "
+        doc_text += f"{'Keywords' if en else 'Mots-clés'}: {', '.join(localiser(odd.get('keywords', []), lang))}. "
+        if odd.get('cibles'):
+            cibles_text = "; ".join([f"{c.get('code', '')}: {localiser(c.get('description', ''), lang)}" for c in odd.get('cibles', [])])
+            doc_text += f"{'Targets' if en else 'Cibles'}: {cibles_text}. "
+        if odd.get('actions'):
+            actions_text = "; ".join(localiser(odd.get('actions', []), lang))
+            doc_text += f"Actions: {actions_text}."
+        return doc_text
+
+    @staticmethod
+    def _faq_text(faq_item: Dict[str, Any], lang: str = "Français") -> str:
+        """
+        Texte indexé d'une entrée FAQ (question, réponse, mots-clés).
+        """
+        doc_text = f"{localiser(faq_item.get('question', ''), lang)} {localiser(faq_item.get('answer', ''), lang)}"
+        if faq_item.get('keywords'):
+            doc_text += f" {'Keywords' if lang == 'English' else 'Mots-clés'}: {', '.join(localiser(faq_item.get('keywords', []), lang))}"
+        return doc_text
+
+    def _bm25_search(self, question: str, top_k: int, lang: str = "Français") -> List[int]:
+        """
+        Classement BM25 de la question, exprimé en indices du corpus.
+        """
+        return [index for index, _ in self.bm25.search(question, top_k=top_k, lang=LANG_CODES.get(lang, "fr"))]
+
+    def _encode_batch(self, texts: List[str]) -> List[Any]:
+        """
+        Encode un lot de questions en un seul appel au modèle et retourne une ligne par question.
+        """
+        return list(self.model.encode(texts, batch_size=len(texts), convert_to_numpy=True, normalize_embeddings=True))
+
+    def encode_query(self, question: str, lang: str = "Français") -> Any:
+        """
+        Encode une question ; les questions déjà vues sont servies par le cache d'embeddings et les
+        appels concurrents sont regroupés en micro-lots.
+        Args:
+            question (str): La question de l'utilisateur.
+            lang (str): "English" ou "Français".
+        Returns:
+            np.ndarray: Embedding normalisé de la question.
+        """
+        key = (normaliser_question(question), lang)
+        embedding = self.embedding_cache.get(key)
+        if embedding is None:
+            if self.query_encoder is not None:
+                embedding = self.query_encoder(question)
+            else:
+                embedding = self.model.encode(question, convert_to_numpy=True, normalize_embeddings=True)
+            self.embedding_cache.put(key, embedding)
+        return embedding
+
+    def rechercher(self, question: str, top_k: int = 3, dense_weight: Optional[float] = None,
+                   lang: str = "Français") -> List[Dict[str, Any]]:
+        """
+        Recherche hybride (BM25 + embeddings, fusion RRF) sur tous les documents ODD et FAQ.
+        Args:
+            question (str): La question de l'utilisateur.
+            top_k (int): Nombre de résultats.
+            dense_weight (float): Poids du classement dense (0 = BM25 seul, 1 = embeddings seuls).
+            lang (str): "English" ou "Français".
+        Returns:
+            List[Dict[str, Any]]: Résultats {"document", "score", ...} par score décroissant.
+        """
+        if self.hybrid is None:
+            return []
+        query_embedding = None
+        if self.hybrid.has_dense and self.model is not None:
+            try:
+                query_embedding = self.encode_query(question, lang)
+            except Exception as e:
+                print(f"[ERREUR] Encodage de la question échoué : {e}")
+        return self.hybrid.search(question, query_embedding, top_k=top_k, dense_weight=dense_weight, lang=lang)
+
+    def create_haystack_store(self, store_cls: Any = None) -> Any:
+        """
+        Crée et retourne un InMemoryDocumentStore Haystack à partir des données ODD et FAQ chargées.
+        Optionnel : le moteur n'en a pas besoin (voir `src.bm25`), Haystack n'est importé qu'ici.
+        Args:
+            store_cls (type): Classe de document store à utiliser (InMemoryDocumentStore par défaut).
+        Returns:
+            InMemoryDocumentStore ou None : Le document store prêt à l'emploi ou None si indisponible.
+        """
+        if store_cls is None:
+            try:
+                from haystack.document_stores import InMemoryDocumentStore as store_cls
+            except ImportError:
+                print("[ERREUR] Haystack n'est pas installé. Document store désactivé.")
+                return None
+        documents = []
+        # Documents ODD enrichis
+        for odd in self.odds or []:
+            try:
+                documents.append({
+                    "content": self._odd_text(odd),
+                    "meta": {
+                        "odd_number": odd.get("odd", ""),
+                        "title": odd.get("title", ""),
+                        "description": odd.get("description", ""),
+                        "keywords": odd.get("keywords", []),
+                        "statistics": odd.get("statistics", ""),
+                        "related_odds": odd.get("related_odds", []),
+                        "cibles": odd.get("cibles", []),
+                        "actions": odd.get("actions", []),
+                        "type": "odd"
+                    }
+                })
+            except Exception as e:
+                print(f"[ERREUR] Impossible d'ajouter un ODD au document store : {e}")
+        # Documents FAQ enrichis
+        for faq_item in self.faq or []:
+            try:
+                documents.append({
+                    "content": self._faq_text(faq_item),
+                    "meta": {
+                        "type": "faq",
+                        "question": faq_item.get("question", ""),
+                        "answer": faq_item.get("answer", ""),
+                        "keywords": faq_item.get("keywords", []),
+                        "category": faq_item.get("category", "général")
+                    }
+                })
+            except Exception as e:
+                print(f"[ERREUR] Impossible d'ajouter une FAQ au document store : {e}")
+        document_store = store_cls(use_bm25=True)
+        document_store.write_documents(documents)
+        return document_store
+
+    def chercher_odd(self, question: str, lang: str = "Français") -> Dict[str, Any]:
+        """
+        Recherche l'ODD ou la FAQ la plus pertinente pour la question donnée, version bilingue.
+        Args:
+            question (str): La question de l'utilisateur.
+            lang (str): "English" ou "Français".
+        Returns:
+            Dict[str, Any]: Les données de l'ODD ou de la FAQ la plus pertinente.
+        """
+        if not self.odds:
+            print("[LOG] Aucune donnée ODD disponible.")
+            return {"error": "Aucune donnée ODD disponible."}
+        # Questions structurées (ODD, cible, objectifs liés) : réponse directe depuis les index
+        if self.router is not None:
+            routed = self.router.route(question)
+            if routed is not None:
+                return routed
+        # Mots-clés trouvés en mots entiers (automate construit au chargement) : réponse directe,
+        # avant tout retriever ou modèle
+        hit = self.keyword_matcher.best(question, lang, whole_word=True) if self.keyword_matcher is not None else None
+        if hit is None:
+            # Recherche hybride : BM25 et embeddings fusionnés par rang réciproque
+            results = self.rechercher(question, top_k=1, lang=lang)
+            if results:
+                return results[0]["document"]
+            # Dernier recours : mots-clés trouvés à l'intérieur d'un mot
+            hit = self.keyword_matcher.best(question, lang) if self.keyword_matcher is not None else None
+        if hit is not None:
+            kind, index = hit
+            return self.corpus[index if kind == "odd" else len(self.odds) + index]
+        return {"error": "Aucune correspondance trouvée pour la question."}
+
+    def _preparer_reponse(self, question: str, lang: str) -> Tuple[Optional[Dict[str, Any]], Dict[str, Any]]:
+        """
+        Étapes communes à `repondre` et `repondre_stream` avant la mise en forme : cache exact,
+        recherche, puis cache sémantique.
+        Returns:
+            Tuple: (réponse en cache ou None, contexte {"key", "result", "embedding", "scope"}).
+        """
+        key = (normaliser_question(question), lang, self.corpus_version)
+        cached = self.answer_cache.get(key)
+        if cached is not None:
+            return dict(cached, cached=True), {}
+        result = self.chercher_odd(question, lang=lang)
+        # Cache sémantique devant la mise en forme : utile seulement quand le LLM est actif
+        embedding, scope = None, None
+        if self.llm is not None and self.model is not None and not result.get("error"):
+            try:
+                embedding = self.encode_query(question, lang)
+            except Exception as e:
+                print(f"[ERREUR] Encodage de la question échoué : {e}")
+            scope = (self._document_key(result), lang, self.corpus_version)
+        if embedding is not None:
+            found = self.semantic_cache.get(embedding, scope)
+            if found is not None:
+                response, similarity = found
+                self.answer_cache.put(key, response)
+                return dict(response, cached=True, similarity=round(similarity, 4)), {}
+        return None, {"key": key, "result": result, "embedding": embedding, "scope": scope}
+
+    def _memoriser_reponse(self, pending: Dict[str, Any], answer: str, llm_failed: bool = False) -> Dict[str, Any]:
+        """
+        Enregistre une réponse produite dans les caches exact et sémantique.
+        Args:
+            pending (Dict[str, Any]): Contexte retourné par `_preparer_reponse`.
+            answer (str): Réponse mise en forme.
+            llm_failed (bool): La reformulation LLM a échoué (réponse dégradée, non mise en cache).
+        """
+        result = pending["result"]
+        response = {
+            "answer": answer,
+            "type": result.get("type", "odd") if not result.get("error") else "error",
+            "odd": result.get("odd"),
+        }
+        # Pendant le démarrage, la réponse peut être dégradée (sans BM25, embeddings ou LLM) : pas de mise en cache
+        # Idem après un échec du LLM : la question suivante retentera la génération
+        if not self.is_ready or llm_failed:
+            return dict(response, cached=False, degraded=True)
+        self.answer_cache.put(pending["key"], response)
+        if pending["embedding"] is not None:
+            self.semantic_cache.put(pending["embedding"], pending["scope"], response)
+        return dict(response, cached=False)
+
+    def repondre(self, question: str, lang: str = "Français") -> Dict[str, Any]:
+        """
+        Recherche et met en forme la réponse à une question. Les réponses sont mises en cache par
+        (question normalisée, langue, version du corpus) : une question répétée ne relance ni la
+        recherche, ni l'encodeur, ni le LLM. Une question reformulée, proche d'une question déjà
+        traitée et menant au même document, réutilise sa réponse (cache sémantique) sans appel au LLM.
+        Args:
+            question (str): La question de l'utilisateur.
+            lang (str): "English" ou "Français".
+        Returns:
+            Dict[str, Any]: {"answer", "type", "odd", "cached"} (+ "similarity" pour un succès sémantique,
+            "degraded" pour une réponse produite avant la fin du démarrage ou sans le LLM en échec).
+        """
+        cached, pending = self._preparer_reponse(question, lang)
+        if cached is not None:
+            return cached
+        etat: Dict[str, Any] = {}
+        answer = formater_reponse_odd(pending["result"], question, lang=lang, etat=etat)
+        return self._memoriser_reponse(pending, answer, llm_failed="llm_error" in etat)
+
+    def repondre_stream(self, question: str, lang: str = "Français") -> Iterator[str]:
+        """
+        Variante en flux de `repondre` : la réponse structurée arrive immédiatement, la reformulation
+        LLM au fil de la génération. Une réponse en cache est produite en un seul morceau.
+        Args:
+            question (str): La question de l'utilisateur.
+            lang (str): "English" ou "Français".
+        Yields:
+            str: Morceaux successifs de la réponse.
+        """
+        cached, pending = self._preparer_reponse(question, lang)
+        if cached is not None:
+            yield cached["answer"]
+            return
+        chunks: List[str] = []
+        etat: Dict[str, Any] = {}
+        for chunk in formater_reponse_odd_stream(pending["result"], question, lang=lang, etat=etat):
+            chunks.append(chunk)
+            yield chunk
+        self._memoriser_reponse(pending, "".join(chunks), llm_failed="llm_error" in etat)
+
+    @staticmethod
+    def _document_key(result: Dict[str, Any]) -> Tuple[str, str, str]:
+        """
+        Identifie le document retenu par la recherche (type, ODD, cible ou question de FAQ).
+        """
+        detail = result.get("target") or result.get("question") or ""
+        return (result.get("type", "odd"), str(result.get("odd", "")), str(detail))
+
+    def cache_stats(self) -> Dict[str, Any]:
+        """
+        Statistiques des caches de questions (embeddings, réponses exactes et sémantiques).
+        """
+        return {"embeddings": self.embedding_cache.stats(), "answers": self.answer_cache.stats(),
+                "semantic": self.semantic_cache.stats()}
+
+
+# Moteur partagé par tout le processus (toutes les sessions Streamlit, le serveur, etc.)
+_engine: Optional[ChatbotEngine] = None
+_engine_lock = threading.Lock()
+
+def get_engine() -> ChatbotEngine:
+    """
+    Retourne le moteur unique du processus (créé à la première demande, non initialisé).
+    Returns:
+        ChatbotEngine: Le moteur partagé.
+    """
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = ChatbotEngine()
+    return _engine
+
+def initialize_chatbot() -> ChatbotEngine:
+    """
+    Initialise de manière bloquante le moteur partagé (sans effet s'il l'est déjà).
+    Returns:
+        ChatbotEngine: Le moteur initialisé.
+    """
+    engine = get_engine()
+    engine.initialize()
+    return engine
 
 def create_haystack_store() -> Any:
     """
-    Crée et retourne un InMemoryDocumentStore Haystack à partir des données ODD et FAQ chargées.
+    Crée un InMemoryDocumentStore Haystack à partir des données du moteur partagé.
     Returns:
         InMemoryDocumentStore ou None : Le document store prêt à l'emploi ou None si indisponible.
     """
+    return get_engine().create_haystack_store()
+
+def chercher_odd(question: str, lang: str = "Français") -> Dict[str, Any]:
     """
-    Crée et retourne un InMemoryDocumentStore Haystack à partir des données ODD et FAQ chargées.
-    Retourne :
-        InMemoryDocumentStore : Le document store prêt à l'emploi.
+    Recherche l'ODD ou la FAQ la plus pertinente pour la question donnée (voir `ChatbotEngine.chercher_odd`).
+    N'attend que le chargement des données : pendant le reste du démarrage, la réponse est dégradée.
     """
-    if InMemoryDocumentStore is None:
-        print("[ERREUR] Haystack n'est pas installé. Document store désactivé.")
-        return None
-    documents = []
-    # Documents ODD enrichis
-    for odd in odds or []:
-        try:
-            doc_text = f"ODD {odd['odd']}: {odd['title']}. {odd['description']}. "
-            doc_text += f"Statistiques: {odd.get('statistics', '')}. "
-            doc_text += f"Mots-clés: {', '.join(odd.get('keywords', []))}. "
-            if odd.get('cibles'):
-                cibles_text = "; ".join([f"{c.get('code', '')}: {c.get('description', '')}" for c in odd.get('cibles', [])])
-                doc_text += f"Cibles: {cibles_text}. "
-            if odd.get('actions'):
-                actions_text = "; ".join(odd.get('actions', []))
-                doc_text += f"Actions: {actions_text}."
-            documents.append({
-                "content": doc_text,
-                "meta": {
-                    "odd_number": odd.get("odd", ""),
-                    "title": odd.get("title", ""),
-                    "description": odd.get("description", ""),
-                    "keywords": odd.get("keywords", []),
-                    "statistics": odd.get("statistics", ""),
-                    "related_odds": odd.get("related_odds", []),
-                    "cibles": odd.get("cibles", []),
-                    "actions": odd.get("actions", []),
-                    "type": "odd"
-                }
-            })
-        except Exception as e:
-            print(f"[ERREUR] Impossible d'ajouter un ODD au document store : {e}")
-    # Documents FAQ enrichis
-    for faq_item in faq or []:
-        try:
-            doc_text = f"{faq_item.get('answer', '')}"
-            if faq_item.get('keywords'):
-                doc_text += f" Mots-clés: {', '.join(faq_item.get('keywords', []))}"
-            documents.append({
-                "content": doc_text,
-                "meta": {
-                    "type": "faq",
-                    "question": faq_item.get("question", ""),
-                    "answer": faq_item.get("answer", ""),
-                    "keywords": faq_item.get("keywords", []),
-                    "category": faq_item.get("category", "général")
-                }
-            })
-        except Exception as e:
-            print(f"[ERREUR] Impossible d'ajouter une FAQ au document store : {e}")
-    document_store = InMemoryDocumentStore(use_bm25=True)
-    document_store.write_documents(documents)
-    return document_store
+    engine = get_engine()
+    engine.wait_stage("data")
+    return engine.chercher_odd(question, lang=lang)
 
-def chercher_odd(question: str, lang: str = "Français") -> Dict[str, Any]:
+def repondre(question: str, lang: str = "Français") -> Dict[str, Any]:
+    """
+    Réponse mise en forme à une question (voir `ChatbotEngine.repondre`).
+    N'attend que le chargement des données : pendant le reste du démarrage, la réponse est dégradée.
+    """
+    engine = get_engine()
+    engine.wait_stage("data")
+    return engine.repondre(question, lang=lang)
+
+def repondre_stream(question: str, lang: str = "Français") -> Iterator[str]:
+    """
+    Réponse en flux à une question (voir `ChatbotEngine.repondre_stream`).
+    N'attend que le chargement des données : pendant le reste du démarrage, la réponse est dégradée.
+    """
+    engine = get_engine()
+    engine.wait_stage("data")
+    yield from engine.repondre_stream(question, lang=lang)
+
+def localiser(value: Any, lang: str = "Français") -> Any:
     """
-    Recherche l'ODD ou la FAQ la plus pertinente pour la question donnée, version bilingue.
+    Retourne la version d'un champ dans la langue demandée.
+    Les champs bilingues sont des dictionnaires {'fr': ..., 'en': ...} ; les champs monolingues
+    (odd_data_enriched.json) sont retournés tels quels.
     Args:
-        question (str): La question de l'utilisateur.
+        value (Any): Champ bilingue ou monolingue.
         lang (str): "English" ou "Français".
     Returns:
-        Dict[str, Any]: Les données de l'ODD ou de la FAQ la plus pertinente.
-    """
-    if not odds:
-        print("[LOG] Aucune donnée ODD disponible.")
-        return {"error": "Aucune donnée ODD disponible."}
-    match = re.search(r"odd\s*(\d+)", question.lower())
-    if match:
-        num = int(match.group(1))
-        for d in odds:
-            if d.get("odd") == num:
-                return d
-    if question.strip().isdigit():
-        num = int(question.strip())
-        for d in odds:
-            if d.get("odd") == num:
-                return d
-    # Recherche BM25 (recherche sémantique sur le texte)
-    if retriever is not None:
-        try:
-            results = retriever.retrieve(query=question, top_k=3)
-        except Exception as e:
-            print(f"[ERREUR] Recherche BM25 échouée : {e}")
-            results = []
-        if results:
-            best_result = results[0]
-            if best_result.meta.get("type") == "odd":
-                return best_result.meta
-            elif best_result.meta.get("type") == "faq":
-                return best_result.meta
-    # Recherche par mots-clés dynamiques (bilingue)
-    question_lower = question.lower()
-    for odd in odds:
-        for keyword in odd.get("keywords", {}).get("en" if lang == "English" else "fr", []):
-            if keyword.lower() in question_lower:
-                return odd
-    for faq_item in faq or []:
-        for keyword in faq_item.get("keywords", {}).get("en" if lang == "English" else "fr", []):
-            if keyword.lower() in question_lower:
-                # On retourne une structure FAQ bilingue compatible
-                return {
-                    "type": "faq",
-                    "question": faq_item.get("question", {}),
-                    "answer": faq_item.get("answer", {}),
-                    "keywords": faq_item.get("keywords", {}),
-                    "category": faq_item.get("category", "général")
-                }
-    # Recherche sémantique par embeddings (fallback)
-    if model is not None and util is not None and odd_embeddings is not None and odds:
-        try:
-            question_embedding = model.encode(question, convert_to_tensor=True)
-            scores = util.pytorch_cos_sim(question_embedding, odd_embeddings)[0]
-            best_match_idx = scores.argmax()
-            return odds[best_match_idx]
-        except Exception as e:
-            print(f"[ERREUR] Recherche par embeddings échouée : {e}")
-    return {"error": "Aucune correspondance trouvée pour la question."}
+        Any: Valeur dans la langue demandée.
+    """
+    if isinstance(value, dict):
+        return value.get('en' if lang == 'English' else 'fr', value)
+    return value
 
-def formater_reponse_odd(odd_data: Dict[str, Any], question: str = "", lang: str = "Français") -> str:
+def formater_base(odd_data: Dict[str, Any], lang: str = "Français") -> str:
     """
-    Formate la réponse pour un ODD ou une FAQ avec toutes les données enrichies, version bilingue.
+    Réponse structurée (sans LLM) pour un ODD, une cible, des ODD liés ou une FAQ, version bilingue.
     Args:
         odd_data (Dict[str, Any]): Les données de l'ODD ou de la FAQ.
-        question (str): La question de l'utilisateur (pour le prompt LLM).
         lang (str): "English" ou "Français".
     Returns:
-        str: La réponse formatée à afficher.
+        str: La réponse structurée.
     """
     if odd_data.get("error"):
         return f"[ERROR] {odd_data['error']}" if lang == "English" else f"[ERREUR] {odd_data['error']}"
@@ -346,46 +885,112 @@ def formater_reponse_odd(odd_data: Dict[str, Any], question: str = "", lang: str
     if odd_data.get("type") == "faq":
         q = odd_data.get('question', {})
         a = odd_data.get('answer', {})
-        question_txt = q.get('en', q) if lang == 'English' else q.get('fr', q)
-        answer_txt = a.get('en', a) if lang == 'English' else a.get('fr', a)
+        question_txt = localiser(q, lang)
+        answer_txt = localiser(a, lang)
         base = f"FAQ: {question_txt}\n"
         base += f"Answer: {answer_txt}" if lang == "English" else f"Réponse : {answer_txt}"
+    elif odd_data.get("type") == "related":
+        label = 'SDG' if lang == 'English' else 'ODD'
+        base = f"{label} {odd_data.get('odd', '')} : {localiser(odd_data.get('title', ''), lang)}\n"
+        related = ", ".join(f"{label} {r['odd']} ({localiser(r.get('title', ''), lang)})" for r in odd_data.get('related', []))
+        base += f"{'Related goals' if lang == 'English' else 'ODD liés'} : {related or '-'}"
     else:
         title = odd_data.get('title', {})
         desc = odd_data.get('description', {})
         stats = odd_data.get('statistics', {})
         actions = odd_data.get('actions', {})
-        base = f"{'SDG' if lang == 'English' else 'ODD'} {odd_data.get('odd', '')} : {title.get('en', title) if lang == 'English' else title.get('fr', title)}\n"
-        base += f"{desc.get('en', desc) if lang == 'English' else desc.get('fr', desc)}"
+        base = f"{'SDG' if lang == 'English' else 'ODD'} {odd_data.get('odd', '')} : {localiser(title, lang)}\n"
+        base += f"{localiser(desc, lang)}"
         if stats:
-            stat_txt = stats.get('en', stats) if lang == 'English' else stats.get('fr', stats)
+            stat_txt = localiser(stats, lang)
             base += f"\n{'Statistics' if lang == 'English' else 'Statistiques'} : {stat_txt}"
         if odd_data.get('cibles'):
             cibles = ", ".join([
-                f"{c.get('code', '')}: {c.get('description', {}).get('en', c.get('description', '')) if lang == 'English' else c.get('description', {}).get('fr', c.get('description', ''))}"
+                f"{c.get('code', '')}: {localiser(c.get('description', ''), lang)}"
                 for c in odd_data.get('cibles', [])
             ])
             base += f"\n{'Targets' if lang == 'English' else 'Cibles'} : {cibles}"
         if actions:
-            act_list = actions.get('en', actions) if lang == 'English' else actions.get('fr', actions)
+            act_list = localiser(actions, lang)
             if isinstance(act_list, list):
                 base += f"\n{'Actions' if lang == 'English' else 'Actions'} : {', '.join(act_list)}"
             else:
                 base += f"\n{'Actions' if lang == 'English' else 'Actions'} : {act_list}"
+    return base
+
+def _prompt_llm(base: str, odd_data: Dict[str, Any], question: str, lang: str) -> str:
+    """
+    Prompt de reformulation ; le contexte est réduit aux passages pertinents quand l'index de
+    passages est disponible.
+    """
+    context = get_engine().contexte(question, odd_data, lang) or base
+    if lang == "English":
+        return f"Here is information about an SDG or FAQ:\n{context}\n\nUser question: {question}\n\nWrite a clear and concise answer for a human in English."
+    return f"Voici des informations sur un ODD ou une FAQ :\n{context}\n\nQuestion utilisateur : {question}\n\nFais une réponse claire et synthétique pour un humain en français."
+
+def formater_reponse_odd(odd_data: Dict[str, Any], question: str = "", lang: str = "Français",
+                         etat: Optional[Dict[str, Any]] = None) -> str:
+    """
+    Formate la réponse pour un ODD ou une FAQ avec toutes les données enrichies, version bilingue.
+    Args:
+        odd_data (Dict[str, Any]): Les données de l'ODD ou de la FAQ.
+        question (str): La question de l'utilisateur (pour le prompt LLM).
+        lang (str): "English" ou "Français".
+        etat (Dict[str, Any]): Si fourni, reçoit "llm_error" quand la reformulation LLM a échoué.
+    Returns:
+        str: La réponse formatée à afficher.
+    """
+    base = formater_base(odd_data, lang)
+    if odd_data.get("error"):
+        return base
     # Optionnel : reformulation LLM si dispo
+    llm_integration = get_engine().llm
     if llm_integration and hasattr(llm_integration, 'generate_response'):
         try:
-            if lang == "English":
-                prompt = f"Here is information about an SDG or FAQ:\n{base}\n\nUser question: {question}\n\nWrite a clear and concise answer for a human in English."
-            else:
-                prompt = f"Voici des informations sur un ODD ou une FAQ :\n{base}\n\nQuestion utilisateur : {question}\n\nFais une réponse claire et synthétique pour un humain en français."
-            llm_resp = llm_integration.generate_response(prompt)
+            llm_resp = llm_integration.generate_response(_prompt_llm(base, odd_data, question, lang))
             if llm_resp and isinstance(llm_resp, str) and len(llm_resp.strip()) > 10:
                 return f"{base}\n\n{'🤖 AI reformulation:' if lang == 'English' else '🤖 Reformulation IA :'}\n{llm_resp.strip()}"
         except Exception as e:
+            if etat is not None:
+                etat["llm_error"] = str(e)
             return f"{base}\n[LLM ERROR] {e}" if lang == "English" else f"{base}\n[ERREUR LLM integration] {e}"
     return base
 
+def formater_reponse_odd_stream(odd_data: Dict[str, Any], question: str = "", lang: str = "Français",
+                                etat: Optional[Dict[str, Any]] = None) -> Iterator[str]:
+    """
+    Variante en flux de `formater_reponse_odd` : la réponse structurée est produite immédiatement,
+    puis la reformulation LLM morceau par morceau, au fil de la génération.
+    Args:
+        odd_data (Dict[str, Any]): Les données de l'ODD ou de la FAQ.
+        question (str): La question de l'utilisateur (pour le prompt LLM).
+        lang (str): "English" ou "Français".
+        etat (Dict[str, Any]): Si fourni, reçoit "llm_error" quand la reformulation LLM a échoué.
+    Yields:
+        str: Morceaux successifs de la réponse ; leur concaténation est la réponse complète.
+    """
+    base = formater_base(odd_data, lang)
+    yield base
+    if odd_data.get("error"):
+        return
+    llm_integration = get_engine().llm
+    if not (llm_integration and hasattr(llm_integration, 'stream_response')):
+        return
+    header = f"\n\n{'🤖 AI reformulation:' if lang == 'English' else '🤖 Reformulation IA :'}\n"
+    try:
+        started = False
+        for token in llm_integration.stream_response(_prompt_llm(base, odd_data, question, lang)):
+            if not token:
+                continue
+            if not started:
+                yield header
+                started = True
+            yield token
+    except Exception as e:
+        if etat is not None:
+            etat["llm_error"] = str(e)
+        yield f"\n[LLM ERROR] {e}" if lang == "English" else f"\n[ERREUR LLM integration] {e}"
+
 def clear_cache() -> None:
     """
     Efface le cache pour forcer le rechargement des modèles et données.
@@ -393,6 +998,10 @@ def clear_cache() -> None:
     """
     Efface le cache pour forcer le rechargement des modèles et données.
     """
+    if _engine is not None:
+        _engine.embedding_cache.clear()
+        _engine.answer_cache.clear()
+        _engine.semantic_cache.clear()
     if model_cache and hasattr(model_cache, 'clear_cache'):
         model_cache.clear_cache()
         print("🗑️ Cache effacé. Le prochain démarrage sera plus lent.")
@@ -413,6 +1022,3 @@ def get_cache_info() -> Dict[str, Any]:
     if model_cache and hasattr(model_cache, 'get_cache_info'):
         return model_cache.get_cache_info()
     return {"error": "model_cache non disponible"}
-
-# Initialisation automatique au chargement du module
-initialize_chatbot()
\ No newline at end of file
@@ -0,0 +1,141 @@
+"""
+embedding_store.py - Matrice d'embeddings sur disque, projetée en mémoire sans copie
+
+Un `EmbeddingStore` est un dossier contenant :
+- `embeddings.npy` : la matrice (documents x dimensions), normalisée, en `.npy` brut ;
+- `documents.json` : identifiants et textes des documents, dans l'ordre des lignes.
+
+Au chargement, la matrice est ouverte avec `np.load(mmap_mode='r')` : les pages viennent du cache
+de fichiers du système et sont communes à tous les processus (workers Streamlit ou serveur) qui
+ouvrent le même fichier. La mémoire des embeddings ne dépend donc pas du nombre de workers.
+`tensor()` expose la même matrice en tenseur PyTorch, sans copie.
+
+`MappedRecords` applique le même principe à une liste de dictionnaires (ex. les passages) : un
+fichier d'enregistrements JSON concaténés et un tableau d'offsets, projetés en mémoire ; seuls les
+enregistrements lus sont décodés.
+"""
+
+import json
+import os
+import warnings
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+import numpy as np
+
+MATRIX_FILE = "embeddings.npy"
+DOCUMENTS_FILE = "documents.json"
+
+
+class MappedRecords:
+    """
+    Séquence en lecture seule de dictionnaires stockés sur disque et projetés en mémoire.
+    """
+    def __init__(self, data: np.ndarray, offsets: np.ndarray) -> None:
+        """
+        Args:
+            data (np.ndarray): Octets des enregistrements JSON concaténés (uint8).
+            offsets (np.ndarray): Début de chaque enregistrement, plus la fin du dernier (n + 1 valeurs).
+        """
+        self._data = data
+        self._offsets = offsets
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def __getitem__(self, i: int) -> Dict[str, Any]:
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        start, end = int(self._offsets[i]), int(self._offsets[i + 1])
+        return json.loads(self._data[start:end].tobytes().decode("utf-8"))
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        return (self[i] for i in range(len(self)))
+
+    @staticmethod
+    def write(prefix: str, records: Iterable[Dict[str, Any]]) -> None:
+        """
+        Écrit `{prefix}.bin` (enregistrements) et `{prefix}.offsets.npy`.
+        """
+        offsets = [0]
+        with open(f"{prefix}.bin", "wb") as f:
+            for record in records:
+                offsets.append(offsets[-1] + f.write(json.dumps(record, ensure_ascii=False).encode("utf-8")))
+        np.save(f"{prefix}.offsets.npy", np.asarray(offsets, dtype=np.int64))
+
+    @classmethod
+    def open(cls, prefix: str) -> "MappedRecords":
+        """
+        Projette en mémoire des enregistrements écrits par `write`.
+        """
+        offsets = np.load(f"{prefix}.offsets.npy", mmap_mode="r")
+        size = int(offsets[-1])
+        data = np.memmap(f"{prefix}.bin", dtype=np.uint8, mode="r") if size else np.zeros(0, dtype=np.uint8)
+        return cls(data, offsets)
+
+
+class EmbeddingStore:
+    """
+    Matrice d'embeddings (éventuellement projetée en mémoire) et ses documents.
+    """
+    def __init__(self, matrix: np.ndarray, ids: List[str], texts: Optional[List[str]] = None) -> None:
+        """
+        Args:
+            matrix (np.ndarray): Matrice (documents x dimensions), une ligne par document.
+            ids (List[str]): Identifiant de chaque document.
+            texts (List[str]): Texte encodé de chaque document (optionnel).
+        """
+        if len(ids) != matrix.shape[0]:
+            raise ValueError("Le nombre d'identifiants ne correspond pas au nombre de lignes.")
+        self.matrix = matrix
+        self.ids = list(ids)
+        self.texts = list(texts) if texts is not None else None
+
+    def __len__(self) -> int:
+        return self.matrix.shape[0]
+
+    @property
+    def is_mapped(self) -> bool:
+        return isinstance(self.matrix, np.memmap)
+
+    def tensor(self) -> Any:
+        """
+        La matrice en tenseur PyTorch partageant la même mémoire (aucune copie).
+        Le tenseur est en lecture seule de fait : il ne doit pas être modifié en place.
+        """
+        import torch
+        with warnings.catch_warnings():
+            # torch signale qu'un tableau non inscriptible (mmap en lecture seule) est partagé tel quel
+            warnings.simplefilter("ignore", UserWarning)
+            return torch.from_numpy(self.matrix)
+
+    def matches(self, ids: List[str]) -> bool:
+        """
+        Indique si le store couvre exactement ces documents, dans cet ordre.
+        """
+        return self.ids == list(ids)
+
+    def save(self, directory: str) -> None:
+        """
+        Écrit la matrice (`.npy`) et les documents (`.json`) dans un dossier.
+        """
+        os.makedirs(directory, exist_ok=True)
+        np.save(os.path.join(directory, MATRIX_FILE), np.ascontiguousarray(self.matrix))
+        meta: Dict[str, Any] = {"ids": self.ids, "texts": self.texts,
+                                "shape": list(self.matrix.shape), "dtype": str(self.matrix.dtype)}
+        with open(os.path.join(directory, DOCUMENTS_FILE), "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, directory: str, mmap: bool = True) -> "EmbeddingStore":
+        """
+        Ouvre un store sauvegardé par `save` ; la matrice est projetée en mémoire (lecture seule).
+        Args:
+            directory (str): Dossier du store.
+            mmap (bool): False pour charger la matrice en mémoire privée.
+        """
+        matrix = np.load(os.path.join(directory, MATRIX_FILE), mmap_mode="r" if mmap else None)
+        with open(os.path.join(directory, DOCUMENTS_FILE), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        return cls(matrix, meta["ids"], meta.get("texts"))
@@ -0,0 +1,84 @@
+"""
+file_lock.py - Verrou exclusif inter-processus basé sur un fichier
+
+`FileLock` pose un verrou exclusif sur un fichier (`fcntl.flock` sous Linux/macOS,
+`msvcrt.locking` sous Windows). Le verrou est libéré par le système si le processus meurt.
+Il exclut aussi les threads d'un même processus : chaque acquisition ouvre son propre descripteur.
+"""
+
+import os
+import time
+from typing import Any, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+class FileLock:
+    """
+    Verrou exclusif sur `path`, utilisable comme gestionnaire de contexte.
+    """
+    def __init__(self, path: str, timeout: Optional[float] = None, poll_interval: float = 0.05) -> None:
+        """
+        Args:
+            path (str): Fichier de verrou (créé si besoin).
+            timeout (float): Attente maximale en secondes (None = attente illimitée).
+            poll_interval (float): Intervalle entre deux tentatives.
+        """
+        self.path = path
+        self.timeout = timeout
+        self.poll_interval = poll_interval
+        self._fd: Optional[int] = None
+
+    def _try_lock(self, fd: int) -> bool:
+        try:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            else:
+                os.lseek(fd, 0, os.SEEK_SET)
+                msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+            return True
+        except OSError:
+            return False
+
+    def acquire(self) -> None:
+        """
+        Attend et prend le verrou.
+        Raises:
+            TimeoutError: Si le verrou n'a pas pu être pris avant `timeout`.
+        """
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        deadline = None if self.timeout is None else time.monotonic() + self.timeout
+        while not self._try_lock(fd):
+            if deadline is not None and time.monotonic() >= deadline:
+                os.close(fd)
+                raise TimeoutError(f"Verrou non obtenu : {self.path}")
+            time.sleep(self.poll_interval)
+        self._fd = fd
+
+    def release(self) -> None:
+        """
+        Libère le verrou (sans effet s'il n'est pas tenu).
+        """
+        if self._fd is None:
+            return
+        try:
+            if fcntl is not None:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+            else:
+                os.lseek(self._fd, 0, os.SEEK_SET)
+                msvcrt.locking(self._fd, msvcrt.LK_UNLCK, 1)
+        finally:
+            os.close(self._fd)
+            self._fd = None
+
+    def __enter__(self) -> "FileLock":
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.release()
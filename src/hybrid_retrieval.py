@@ -0,0 +1,135 @@
+"""
+hybrid_retrieval.py - Recherche hybride BM25 + embeddings avec fusion par rang réciproque
+
+Tous les documents (ODD et FAQ) sont notés en densité par un unique produit matrice-vecteur sur
+la matrice d'embeddings normalisés de la langue de la question (similarité cosinus = produit
+scalaire ; les matrices peuvent être stockées en float16 et sont alors notées en float32 par
+blocs). Le classement dense
+est fusionné avec le classement BM25 par Reciprocal Rank Fusion (RRF) :
+
+    score(d) = w_dense / (k + rang_dense(d)) + w_sparse / (k + rang_bm25(d))
+
+avec w_dense = `dense_weight` et w_sparse = 1 - `dense_weight`. Le même encodage de la question
+sert au classement dense : aucun passage de modèle supplémentaire par requête.
+"""
+
+import os
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+from src.keyword_matcher import LANG_CODES
+
+DENSE_WEIGHT = float(os.environ.get("ODD_DENSE_WEIGHT", "0.5"))
+RRF_K = 60
+# Lignes converties en float32 à la fois pour le score dense d'une matrice float16
+SCORE_CHUNK_ROWS = 8192
+
+
+def normaliser_lignes(matrix: Any) -> np.ndarray:
+    """
+    Convertit une matrice d'embeddings en float32 et normalise chaque ligne (norme L2 = 1).
+    """
+    matrix = np.asarray(matrix, dtype=np.float32)
+    if matrix.ndim == 1:
+        matrix = matrix[None, :]
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.maximum(norms, 1e-12)
+
+
+class HybridRetriever:
+    """
+    Recherche hybride sur un corpus fixe de documents.
+    """
+    def __init__(self, documents: List[Dict[str, Any]], embeddings: Optional[Dict[str, np.ndarray]] = None,
+                 sparse_search: Optional[Callable[[str, int, str], List[int]]] = None,
+                 dense_weight: float = DENSE_WEIGHT, rrf_k: int = RRF_K) -> None:
+        """
+        Args:
+            documents (List[Dict[str, Any]]): Documents retournés (données ODD ou FAQ), dans l'ordre des lignes.
+            embeddings (Dict[str, np.ndarray]): Par code langue, matrice (N, d) des embeddings
+                normalisés des documents.
+            sparse_search (Callable): Fonction (question, top_k, lang) -> indices de documents classés par BM25.
+            dense_weight (float): Poids du classement dense entre 0 (BM25 seul) et 1 (dense seul).
+            rrf_k (int): Constante de lissage de la fusion RRF.
+        """
+        self.documents = documents
+        self.embeddings = {code: matrix for code, matrix in (embeddings or {}).items() if len(matrix)}
+        self.sparse_search = sparse_search
+        self.dense_weight = dense_weight
+        self.rrf_k = rrf_k
+
+    @property
+    def has_dense(self) -> bool:
+        return bool(self.embeddings)
+
+    def dense_scores(self, query_embedding: Any, lang: str = "Français") -> np.ndarray:
+        """
+        Similarités cosinus de la question avec tous les documents de l'index de sa langue
+        (un produit matrice-vecteur en float32 ; une matrice float16 est convertie par blocs).
+        """
+        matrix = self.embeddings.get(LANG_CODES.get(lang, "fr"))
+        if matrix is None:
+            matrix = next(iter(self.embeddings.values()))
+        query = normaliser_lignes(query_embedding)[0]
+        if matrix.dtype == np.float32:
+            return matrix @ query
+        # NumPy n'a pas de chemin BLAS en float16 : on convertit par blocs et on score en float32
+        scores = np.empty(matrix.shape[0], dtype=np.float32)
+        for start in range(0, matrix.shape[0], SCORE_CHUNK_ROWS):
+            block = matrix[start:start + SCORE_CHUNK_ROWS]
+            np.matmul(block.astype(np.float32), query, out=scores[start:start + len(block)])
+        return scores
+
+    def search(self, question: str, query_embedding: Optional[Any] = None, top_k: int = 3,
+               dense_weight: Optional[float] = None, lang: str = "Français") -> List[Dict[str, Any]]:
+        """
+        Classe les documents par fusion RRF des rangs dense et BM25.
+        Args:
+            question (str): Texte de la question (pour BM25).
+            query_embedding (Any): Embedding de la question (pour le classement dense), optionnel.
+            top_k (int): Nombre de résultats.
+            dense_weight (float): Remplace ponctuellement le poids dense configuré.
+            lang (str): "English" ou "Français" (index d'embeddings et analyseur BM25 utilisés).
+        Returns:
+            List[Dict[str, Any]]: Résultats {"index", "document", "score", "dense_rank", "sparse_rank",
+            "dense_score"} par score décroissant.
+        """
+        n = len(self.documents)
+        if n == 0:
+            return []
+        weight = self.dense_weight if dense_weight is None else dense_weight
+        fused = np.zeros(n, dtype=np.float64)
+        dense_rank = np.zeros(n, dtype=np.int32)
+        sparse_rank = np.zeros(n, dtype=np.int32)
+        dense = None
+        if self.has_dense and query_embedding is not None and weight > 0:
+            dense = self.dense_scores(query_embedding, lang)
+            order = np.argsort(-dense, kind="stable")
+            dense_rank[order] = np.arange(1, n + 1)
+            fused += weight / (self.rrf_k + dense_rank)
+        if self.sparse_search is not None and weight < 1:
+            try:
+                ranked = self.sparse_search(question, n, lang)
+            except Exception as e:
+                print(f"[ERREUR] Recherche BM25 échouée : {e}")
+                ranked = []
+            for rank, index in enumerate(ranked, start=1):
+                if 0 <= index < n and not sparse_rank[index]:
+                    sparse_rank[index] = rank
+                    fused[index] += (1 - weight) / (self.rrf_k + rank)
+        candidates = np.flatnonzero(fused > 0)
+        if candidates.size == 0:
+            return []
+        top = candidates[np.argsort(-fused[candidates], kind="stable")[:top_k]]
+        return [
+            {
+                "index": int(i),
+                "document": self.documents[i],
+                "score": float(fused[i]),
+                "dense_rank": int(dense_rank[i]) or None,
+                "sparse_rank": int(sparse_rank[i]) or None,
+                "dense_score": float(dense[i]) if dense is not None else None,
+            }
+            for i in top
+        ]
@@ -0,0 +1,289 @@
+"""
+index_bundle.py - Bundle d'index versionné, construit hors ligne et ouvert en lecture seule
+
+`python main.py build-index` produit, à partir de `data/*.json` et du classeur SDR, un dossier
+`bundle/<version>/` contenant tout ce que le moteur calculerait sinon au premier démarrage :
+- `corpus.json` : ODD, FAQ, documents recherchables, identifiants et textes par langue ;
+- `bm25.npz` : index BM25 (voir `src.bm25`) ;
+- `embeddings/<langue>/` : matrices d'embeddings normalisés (voir `src.embedding_store`) ;
+- `passages/<langue>/` : index de passages et index ANN (voir `src.passage_index`) ;
+- `sdr/` : cube SDR pays × année × score (voir `src.sdg_data.SDGCube`), si le classeur est présent ;
+- `model/` : instantané safetensors du modèle d'embeddings (voir `src.model_snapshot`) ;
+- `manifest.json` : hash sha256 des sources, du modèle et de chaque fichier du bundle.
+
+La version est dérivée des hash des sources : mêmes sources, même version. Le bundle est écrit
+dans un dossier temporaire renommé à la fin, ses fichiers sont mis en lecture seule, et
+`bundle/CURRENT` désigne la version active. Au démarrage, le moteur ouvre le bundle actif (fichiers
+projetés en mémoire) au lieu de construire ses index ; sans bundle, il garde le cache habituel.
+"""
+
+import glob
+import hashlib
+import json
+import os
+import shutil
+import stat
+import tempfile
+import time
+from typing import Any, Dict, List, Optional
+
+from src.keyword_matcher import LANG_CODES
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+BUNDLE_DIR = os.environ.get("ODD_BUNDLE_DIR", os.path.join(PROJECT_ROOT, "bundle"))
+USE_BUNDLE = os.environ.get("ODD_USE_BUNDLE", "1") == "1"
+BUNDLE_FORMAT = 1
+CURRENT_FILE = "CURRENT"
+MANIFEST_FILE = "manifest.json"
+DEFAULT_WORKBOOK = os.path.join("data", "SDR2025-data.xlsx")
+
+
+def _file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _source_entry(path: str) -> Dict[str, Any]:
+    return {"sha256": _file_sha256(path), "size": os.path.getsize(path)}
+
+
+def _fichiers(directory: str) -> List[str]:
+    """
+    Chemins relatifs (séparateur "/") de tous les fichiers d'un dossier, triés.
+    """
+    return sorted(os.path.relpath(os.path.join(root, name), directory).replace(os.sep, "/")
+                  for root, _, names in os.walk(directory) for name in names)
+
+
+def _lecture_seule(directory: str) -> None:
+    """
+    Retire les droits d'écriture sur tout le contenu d'un dossier.
+    """
+    for root, _, files in os.walk(directory):
+        for name in files:
+            os.chmod(os.path.join(root, name), stat.S_IRUSR | stat.S_IRGRP | stat.S_IROTH)
+    for root, dirs, _ in os.walk(directory, topdown=False):
+        for name in dirs:
+            os.chmod(os.path.join(root, name), 0o555)
+    os.chmod(directory, 0o555)
+
+
+def _supprimer(directory: str) -> None:
+    """
+    Supprime un dossier, y compris en lecture seule.
+    """
+    for root, _, _ in os.walk(directory):
+        os.chmod(root, 0o755)
+    shutil.rmtree(directory)
+
+
+class IndexBundle:
+    """
+    Bundle d'index ouvert en lecture seule (les artefacts sont chargés à la demande).
+    """
+    def __init__(self, path: str, manifest: Dict[str, Any]) -> None:
+        """
+        Args:
+            path (str): Dossier de la version du bundle.
+            manifest (Dict[str, Any]): Contenu de `manifest.json`.
+        """
+        self.path = path
+        self.manifest = manifest
+
+    @property
+    def version(self) -> str:
+        return self.manifest["version"]
+
+    @property
+    def data_hash(self) -> str:
+        """
+        Version du corpus (même rôle que le hash des données du cache).
+        """
+        return self.manifest["data_hash"]
+
+    @property
+    def model_dir(self) -> Optional[str]:
+        """
+        Dossier de l'instantané du modèle d'embeddings, ou None s'il n'est pas inclus.
+        """
+        directory = os.path.join(self.path, "model")
+        return directory if os.path.isdir(directory) else None
+
+    def corpus(self) -> Dict[str, Any]:
+        """
+        Corpus : {"odds", "faq", "documents", "ids", "texts" (par code langue)}.
+        """
+        with open(os.path.join(self.path, "corpus.json"), "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def bm25(self) -> Any:
+        from src.bm25 import BM25Index
+        return BM25Index.load(os.path.join(self.path, "bm25.npz"))
+
+    def embedding_stores(self) -> Dict[str, Any]:
+        """
+        Par code langue, matrice d'embeddings projetée en mémoire (`EmbeddingStore`).
+        """
+        from src.embedding_store import EmbeddingStore
+        root = os.path.join(self.path, "embeddings")
+        return {code: EmbeddingStore.load(os.path.join(root, code)) for code in sorted(os.listdir(root))}
+
+    def passage_indexes(self) -> Dict[str, Any]:
+        """
+        Par code langue, index de passages (passages et codes ANN projetés en mémoire).
+        """
+        from src.passage_index import PassageIndex
+        root = os.path.join(self.path, "passages")
+        if not os.path.isdir(root):
+            return {}
+        return {code: PassageIndex.load(os.path.join(root, code)) for code in sorted(os.listdir(root))}
+
+    def sdr_cube(self) -> Optional[Any]:
+        """
+        Cube SDR projeté en mémoire, ou None si le classeur n'a pas été inclus.
+        """
+        from src.sdg_data import SDGCube
+        stem = self.manifest.get("sdr_cube")
+        return SDGCube.load(os.path.join(self.path, stem)) if stem else None
+
+    def verify_sources(self, root: str = PROJECT_ROOT) -> List[str]:
+        """
+        Compare les sources actuelles aux hash du manifeste (lecture complète des fichiers :
+        réservé à la vérification hors démarrage).
+        Returns:
+            List[str]: Sources modifiées ou absentes (vide si le bundle est à jour).
+        """
+        stale = []
+        for rel, entry in self.manifest["sources"].items():
+            path = os.path.join(root, rel)
+            if not os.path.exists(path) or _file_sha256(path) != entry["sha256"]:
+                stale.append(rel)
+        return stale
+
+
+def open_bundle(bundle_dir: str = BUNDLE_DIR, data_file: Optional[str] = None) -> Optional[IndexBundle]:
+    """
+    Ouvre la version active du bundle (aucun calcul : lecture de `CURRENT` et du manifeste).
+    Args:
+        bundle_dir (str): Dossier racine des bundles.
+        data_file (str): Fichier de données attendu (ex. "odd_data_enriched.json") ; un bundle
+            construit pour un autre fichier est ignoré.
+    Returns:
+        Optional[IndexBundle]: Le bundle, ou None s'il est absent, désactivé ou incompatible.
+    """
+    if not USE_BUNDLE:
+        return None
+    try:
+        with open(os.path.join(bundle_dir, CURRENT_FILE), "r", encoding="utf-8") as f:
+            path = os.path.join(bundle_dir, f.read().strip())
+        with open(os.path.join(path, MANIFEST_FILE), "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if manifest.get("format") != BUNDLE_FORMAT:
+        print(f"⚠️  Bundle d'index ignoré (format {manifest.get('format')} ≠ {BUNDLE_FORMAT})")
+        return None
+    if data_file is not None and manifest.get("data_file") != data_file:
+        print(f"⚠️  Bundle d'index ignoré (construit pour {manifest.get('data_file')})")
+        return None
+    return IndexBundle(path, manifest)
+
+
+def build_bundle(output_dir: str = BUNDLE_DIR, data_file: Optional[str] = None,
+                 workbook: Optional[str] = DEFAULT_WORKBOOK, force: bool = False) -> IndexBundle:
+    """
+    Construit le bundle d'index et l'active (`CURRENT`).
+    Args:
+        output_dir (str): Dossier racine des bundles.
+        data_file (str): Fichier de `data/` indexé par le moteur (par défaut `ODD_DATA_FILE`).
+        workbook (str): Classeur SDR (relatif à la racine du projet) ; ignoré s'il est absent.
+        force (bool): Reconstruit même si cette version existe déjà.
+    Returns:
+        IndexBundle: Le bundle construit.
+    Raises:
+        ValueError: Si `data_file` diffère du fichier lu par le moteur (`ODD_DATA_FILE`).
+        RuntimeError: Si le modèle d'embeddings ou les données sont indisponibles.
+    """
+    from src.chat_bot import DATA_FILE, EMBEDDING_MODEL_ID, ChatbotEngine
+
+    data_file = data_file or DATA_FILE
+    if data_file != DATA_FILE:
+        # Le moteur lit `ODD_DATA_FILE` à l'import : il doit être défini avant
+        raise ValueError(f"Le moteur indexe data/{DATA_FILE} : définir ODD_DATA_FILE={data_file}.")
+    sources = {f"data/{os.path.basename(path)}": _source_entry(path)
+               for path in sorted(glob.glob(os.path.join(PROJECT_ROOT, "data", "*.json")))}
+    workbook_path = os.path.join(PROJECT_ROOT, workbook) if workbook else None
+    if workbook_path and os.path.exists(workbook_path):
+        sources[workbook.replace(os.sep, "/")] = _source_entry(workbook_path)
+    elif workbook:
+        print(f"⚠️  Classeur SDR absent ({workbook_path}) : bundle construit sans cube SDR")
+    key = json.dumps({"format": BUNDLE_FORMAT, "data_file": data_file, "model": EMBEDDING_MODEL_ID,
+                      "sources": {rel: entry["sha256"] for rel, entry in sources.items()}}, sort_keys=True)
+    version = hashlib.sha256(key.encode("utf-8")).hexdigest()[:16]
+    target = os.path.join(output_dir, version)
+    os.makedirs(output_dir, exist_ok=True)
+
+    if os.path.isdir(target) and not force:
+        print(f"✅ Bundle {version} déjà construit : {target}")
+    else:
+        engine = ChatbotEngine(use_bundle=False)
+        engine.prepare_indexes()
+        if not engine.odds:
+            raise RuntimeError(f"Aucune donnée ODD dans data/{data_file}.")
+        if engine.model is None or not engine.embedding_stores:
+            raise RuntimeError("Modèle d'embeddings indisponible : impossible de calculer les matrices denses.")
+        tmp_dir = tempfile.mkdtemp(prefix=".tmp-", dir=output_dir)
+        try:
+            print(f"📦 Écriture du bundle {version}...")
+            with open(os.path.join(tmp_dir, "corpus.json"), "w", encoding="utf-8") as f:
+                json.dump({"odds": engine.odds, "faq": engine.faq, "documents": engine.corpus,
+                           "ids": engine.corpus_ids, "texts": engine.corpus_texts}, f, ensure_ascii=False)
+            engine.bm25.save(os.path.join(tmp_dir, "bm25.npz"))
+            for code, store in engine.embedding_stores.items():
+                store.save(os.path.join(tmp_dir, "embeddings", code))
+            for code, index in engine.passage_indexes.items():
+                index.save(os.path.join(tmp_dir, "passages", code))
+            if hasattr(engine.model, "save"):
+                from src.model_snapshot import save_sentence_transformer
+                save_sentence_transformer(engine.model, os.path.join(tmp_dir, "model"))
+            sdr_cube = None
+            if workbook_path and os.path.exists(workbook_path):
+                from src.sdg_data import SDGDataLoader
+                with tempfile.TemporaryDirectory() as scratch:
+                    cube = SDGDataLoader(workbook_path, cache_dir=scratch).cube
+                    sdr_cube = f"sdr/{os.path.splitext(os.path.basename(workbook_path))[0]}"
+                    os.makedirs(os.path.join(tmp_dir, "sdr"))
+                    cube.save(os.path.join(tmp_dir, sdr_cube))
+            manifest = {
+                "format": BUNDLE_FORMAT,
+                "version": version,
+                "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+                "data_file": data_file,
+                "data_hash": engine.corpus_version,
+                "model": {"id": EMBEDDING_MODEL_ID, "included": os.path.isdir(os.path.join(tmp_dir, "model"))},
+                "langs": sorted(LANG_CODES.values()),
+                "documents": len(engine.corpus),
+                "sdr_cube": sdr_cube,
+                "sources": sources,
+                "files": {rel: _source_entry(os.path.join(tmp_dir, rel)) for rel in _fichiers(tmp_dir)},
+            }
+            with open(os.path.join(tmp_dir, MANIFEST_FILE), "w", encoding="utf-8") as f:
+                json.dump(manifest, f, ensure_ascii=False, indent=1)
+            if os.path.isdir(target):
+                _supprimer(target)
+            _lecture_seule(tmp_dir)
+            os.replace(tmp_dir, target)
+        finally:
+            if os.path.isdir(tmp_dir):
+                _supprimer(tmp_dir)
+        print(f"✅ Bundle {version} écrit : {target}")
+
+    current_tmp = os.path.join(output_dir, f"{CURRENT_FILE}.{os.getpid()}.tmp")
+    with open(current_tmp, "w", encoding="utf-8") as f:
+        f.write(version)
+    os.replace(current_tmp, os.path.join(output_dir, CURRENT_FILE))
+    with open(os.path.join(target, MANIFEST_FILE), "r", encoding="utf-8") as f:
+        return IndexBundle(target, json.load(f))
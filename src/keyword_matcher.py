@@ -0,0 +1,173 @@
+"""
+keyword_matcher.py - Recherche de mots-clés en une passe (automate d'Aho-Corasick)
+
+Les mots-clés des ODD et de la FAQ sont compilés une fois, par langue, dans un automate
+d'Aho-Corasick : toutes les occurrences présentes dans une question sont trouvées en un seul
+parcours du texte, quel que soit le nombre de mots-clés. Textes et mots-clés sont normalisés
+(minuscules, accents retirés) pour que "pauvrete" trouve "pauvreté". Les documents touchés sont
+classés par spécificité (mot-clé le plus long, mots entiers, nombre de mots-clés distincts)
+plutôt que par ordre d'apparition dans les données.
+"""
+
+import unicodedata
+from collections import deque
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+LANG_CODES = {"English": "en", "Français": "fr"}
+
+
+def normaliser_texte(text: str) -> str:
+    """
+    Normalise un texte pour la comparaison : décomposition Unicode, accents retirés, casefold.
+    La longueur peut différer de l'original ; seules les positions dans le texte normalisé comptent.
+    """
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(c for c in decomposed if not unicodedata.combining(c)).casefold()
+
+
+class AhoCorasick:
+    """
+    Automate d'Aho-Corasick sur des chaînes déjà normalisées.
+    """
+    def __init__(self, patterns: Sequence[str]) -> None:
+        """
+        Construit l'automate (transitions, liens d'échec et sorties).
+        Args:
+            patterns (Sequence[str]): Motifs ; l'indice de chaque motif est retourné lors des correspondances.
+        """
+        self.patterns = list(patterns)
+        self.goto: List[Dict[str, int]] = [{}]
+        self.fail: List[int] = [0]
+        self.output: List[List[int]] = [[]]
+        for index, pattern in enumerate(self.patterns):
+            if not pattern:
+                continue
+            state = 0
+            for char in pattern:
+                nxt = self.goto[state].get(char)
+                if nxt is None:
+                    nxt = len(self.goto)
+                    self.goto[state][char] = nxt
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.output.append([])
+                state = nxt
+            self.output[state].append(index)
+        # Parcours en largeur pour calculer les liens d'échec
+        pending = deque(self.goto[0].values())
+        while pending:
+            state = pending.popleft()
+            for char, nxt in self.goto[state].items():
+                pending.append(nxt)
+                fallback = self.fail[state]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[nxt] = self.goto[fallback].get(char, 0)
+                self.output[nxt] = self.output[nxt] + self.output[self.fail[nxt]]
+
+    def find_all(self, text: str) -> List[Tuple[int, int]]:
+        """
+        Retourne toutes les occurrences sous forme (position de fin exclue, indice du motif).
+        """
+        hits: List[Tuple[int, int]] = []
+        state = 0
+        goto, fail, output = self.goto, self.fail, self.output
+        for position, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for index in output[state]:
+                hits.append((position + 1, index))
+        return hits
+
+
+class KeywordMatcher:
+    """
+    Automates de mots-clés par langue, construits depuis les champs `keywords` des ODD et de la FAQ.
+    Chaque mot-clé renvoie vers un document (type "odd" ou "faq", indice dans sa liste).
+    """
+    def __init__(self, entries: Dict[str, List[Tuple[str, Tuple[str, int]]]]) -> None:
+        """
+        Args:
+            entries (Dict): Par code langue, liste de (mot-clé normalisé, (type, indice)).
+        """
+        self.automata: Dict[str, AhoCorasick] = {}
+        self.targets: Dict[str, List[Tuple[str, int]]] = {}
+        for code, items in entries.items():
+            self.automata[code] = AhoCorasick([kw for kw, _ in items])
+            self.targets[code] = [target for _, target in items]
+
+    @staticmethod
+    def _keywords(item: Dict[str, Any], code: str) -> List[str]:
+        """
+        Mots-clés d'un document dans une langue (les listes monolingues valent pour toutes les langues).
+        """
+        keywords = item.get("keywords") or []
+        if isinstance(keywords, dict):
+            keywords = keywords.get(code, [])
+        return [k for k in keywords if isinstance(k, str)]
+
+    @classmethod
+    def from_corpus(cls, odds: List[Dict[str, Any]], faq: Optional[List[Dict[str, Any]]] = None) -> "KeywordMatcher":
+        """
+        Construit les automates FR et EN à partir des ODD et de la FAQ.
+        """
+        entries: Dict[str, List[Tuple[str, Tuple[str, int]]]] = {}
+        for code in LANG_CODES.values():
+            items: List[Tuple[str, Tuple[str, int]]] = []
+            seen = set()
+            for kind, documents in (("odd", odds or []), ("faq", faq or [])):
+                for index, document in enumerate(documents):
+                    for keyword in cls._keywords(document, code):
+                        normalized = normaliser_texte(keyword).strip()
+                        if normalized and (normalized, kind, index) not in seen:
+                            seen.add((normalized, kind, index))
+                            items.append((normalized, (kind, index)))
+            entries[code] = items
+        return cls(entries)
+
+    def match(self, question: str, lang: str = "Français") -> List[Dict[str, Any]]:
+        """
+        Trouve tous les documents dont un mot-clé apparaît dans la question, classés par spécificité.
+        Returns:
+            List[Dict[str, Any]]: Entrées {"type", "index", "keywords", "score"} triées par score décroissant.
+        """
+        code = LANG_CODES.get(lang, "fr")
+        automaton = self.automata.get(code)
+        if automaton is None:
+            return []
+        text = normaliser_texte(question)
+        hits: Dict[Tuple[str, int], Dict[str, Any]] = {}
+        for end, index in automaton.find_all(text):
+            keyword = automaton.patterns[index]
+            start = end - len(keyword)
+            whole_word = (start == 0 or not text[start - 1].isalnum()) and (end == len(text) or not text[end].isalnum())
+            target = self.targets[code][index]
+            hit = hits.setdefault(target, {"type": target[0], "index": target[1], "keywords": set(), "best": (0, 0, 0)})
+            hit["keywords"].add(keyword)
+            # Spécificité : nombre de mots, mot entier, nombre de caractères
+            hit["best"] = max(hit["best"], (len(keyword.split()), int(whole_word), len(keyword)))
+        ranked = []
+        for hit in hits.values():
+            words, whole, chars = hit["best"]
+            hit["score"] = (words, whole, chars, len(hit["keywords"]))
+            hit["keywords"] = sorted(hit["keywords"])
+            del hit["best"]
+            ranked.append(hit)
+        # Ordre des données en dernier critère, ODD avant FAQ à spécificité égale
+        ranked.sort(key=lambda h: (tuple(-v for v in h["score"]), h["type"] != "odd", h["index"]))
+        return ranked
+
+    def best(self, question: str, lang: str = "Français", whole_word: bool = False) -> Optional[Tuple[str, int]]:
+        """
+        Document le plus spécifique trouvé dans la question, ou None.
+        Args:
+            whole_word (bool): Ne retenir que les documents dont un mot-clé apparaît en mot entier
+                ("eau" ne compte pas dans "beaucoup").
+        Returns:
+            Optional[Tuple[str, int]]: (type, indice) du document.
+        """
+        ranked = self.match(question, lang)
+        if whole_word:
+            ranked = [hit for hit in ranked if hit["score"][1]]
+        return (ranked[0]["type"], ranked[0]["index"]) if ranked else None
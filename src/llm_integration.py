@@ -2,21 +2,86 @@
 llm_integration.py - Intégration LLM pour le Chatbot ODD
 
 Ce module gère l'intégration avec un modèle LLM local (google/flan-t5-small) pour générer des réponses naturelles à partir des questions utilisateur.
+
+Les prompts concurrents passent par une file de génération (`MicroBatcher`) : ils sont regroupés
+(au plus `ODD_LLM_BATCH_SIZE` prompts ou `ODD_LLM_MAX_WAIT_MS` ms d'attente), triés par longueur
+en sous-lots homogènes pour limiter le padding, puis générés en un seul appel par sous-lot.
+`stream_response` produit au contraire la réponse d'un prompt morceau par morceau, au fil de la
+génération (`TextIteratorStreamer`), pour l'affichage en flux.
 """
 
-from transformers import pipeline
-from typing import Optional, Any
+import os
+import threading
+from typing import Optional, Any, Iterator, List
+
+from src.batching import MicroBatcher
+from src.model_registry import model_registry
+
+LLM_MODEL_ID = "google/flan-t5-small"
+LLM_TASK = "text2text-generation"
+
+LLM_BATCH_SIZE = int(os.environ.get("ODD_LLM_BATCH_SIZE", "8"))
+LLM_MAX_WAIT_MS = float(os.environ.get("ODD_LLM_MAX_WAIT_MS", "20"))
+# Un sous-lot est coupé dès qu'un prompt dépasse ce multiple de la longueur du plus court
+LLM_LENGTH_RATIO = 1.5
 
 class LLMIntegration:
     """
     Classe d'intégration pour le modèle LLM local (Flan-T5 Small).
     Permet de générer des réponses textuelles à partir de questions utilisateur.
     """
-    def __init__(self) -> None:
+    def __init__(self, max_batch_size: int = LLM_BATCH_SIZE, max_wait_ms: float = LLM_MAX_WAIT_MS) -> None:
+        """
+        Initialise la file de génération. Le pipeline (modèle léger) est obtenu à la demande
+        depuis le registre partagé : il n'est chargé qu'une fois par processus.
+        Args:
+            max_batch_size (int): Nombre maximal de prompts générés ensemble.
+            max_wait_ms (float): Latence maximale ajoutée pour remplir un lot.
+        """
+        self.generation_kwargs = {"max_new_tokens": 64, "do_sample": True, "temperature": 0.7}
+        self.queue = MicroBatcher(self._generate_batch, max_batch_size=max_batch_size,
+                                  max_wait_ms=max_wait_ms, name="llm-generation")
+
+    @property
+    def generator(self) -> Any:
+        """
+        Pipeline text2text-generation partagé (chargé au premier usage).
+        """
+        return model_registry.get_pipeline(LLM_MODEL_ID, LLM_TASK)
+
+    def _group_by_length(self, prompts: List[str]) -> List[List[int]]:
         """
-        Initialise le pipeline de génération textuelle avec un modèle léger.
+        Trie les prompts par nombre de tokens et les découpe en sous-lots de longueurs proches.
+        Returns:
+            List[List[int]]: Indices des prompts de chaque sous-lot.
+        """
+        lengths = [len(ids) for ids in self.generator.tokenizer(prompts)["input_ids"]]
+        order = sorted(range(len(prompts)), key=lambda i: lengths[i])
+        groups: List[List[int]] = []
+        for i in order:
+            if groups and lengths[i] <= LLM_LENGTH_RATIO * lengths[groups[-1][0]]:
+                groups[-1].append(i)
+            else:
+                groups.append([i])
+        return groups
+
+    def _generate_batch(self, prompts: List[str]) -> List[str]:
         """
-        self.generator = pipeline("text2text-generation", model="google/flan-t5-small")
+        Génère les réponses d'un lot de prompts (un appel `generate` par sous-lot de longueur homogène).
+        Returns:
+            List[str]: Une réponse par prompt, dans l'ordre d'entrée.
+        """
+        outputs: List[str] = [""] * len(prompts)
+        generator = self.generator
+        if generator is None:
+            raise RuntimeError("LLM non disponible.")
+        for group in self._group_by_length(prompts):
+            results = generator([prompts[i] for i in group], batch_size=len(group), **self.generation_kwargs)
+            for i, result in zip(group, results):
+                if isinstance(result, list):
+                    result = result[0]
+                outputs[i] = result.get('generated_text', str(result))
+        return outputs
 
     def generate_response(self, question: str, odd_data: Optional[Any] = None) -> str:
         """
@@ -27,7 +92,40 @@ class LLMIntegration:
         Returns:
             str: Réponse générée ou message d'erreur.
         """
-        response = self.generator(question, max_new_tokens=64, do_sample=True, temperature=0.7)
-        return response[0].get('generated_text', str(response[0]))
+        return self.queue(question)
+
+    def stream_response(self, prompt: str) -> Iterator[str]:
+        """
+        Génère une réponse en flux : la génération tourne dans un thread et les morceaux de texte
+        décodés sont produits dès qu'ils sont disponibles.
+        Args:
+            prompt (str): Le prompt complet.
+        Yields:
+            str: Morceaux successifs de la réponse.
+        """
+        generator = self.generator
+        if generator is None:
+            raise RuntimeError("LLM non disponible.")
+        from transformers import TextIteratorStreamer
+        tokenizer, model = generator.tokenizer, generator.model
+        streamer = TextIteratorStreamer(tokenizer, skip_prompt=True, skip_special_tokens=True)
+        inputs = tokenizer(prompt, return_tensors="pt", truncation=True).to(model.device)
+        errors: List[Exception] = []
+
+        def generate() -> None:
+            try:
+                model.generate(**inputs, streamer=streamer, **self.generation_kwargs)
+            except Exception as e:
+                errors.append(e)
+                # Débloque l'itération du streamer si la génération échoue
+                streamer.end()
+
+        thread = threading.Thread(target=generate, name="llm-stream", daemon=True)
+        thread.start()
+        for text in streamer:
+            yield text
+        thread.join()
+        if errors:
+            raise errors[0]
 
-llm_integration = LLMIntegration()
\ No newline at end of file
+llm_integration = LLMIntegration()
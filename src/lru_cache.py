@@ -0,0 +1,170 @@
+"""
+lru_cache.py - Caches LRU bornés (taille et durée de vie) pour les questions répétées
+
+`LRUCache` garde en mémoire les entrées les plus récemment utilisées, dans la limite de `max_size`
+entrées et de `ttl` secondes par entrée, et compte les succès et échecs. Un second niveau optionnel
+sur disque (un fichier pickle par clé, écrit de manière atomique) survit aux redémarrages.
+
+Le moteur l'utilise pour les embeddings des questions (clé : question normalisée, langue) et pour
+les réponses mises en forme (clé : question normalisée, langue, version du corpus).
+"""
+
+import hashlib
+import os
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+_MISSING = object()
+
+
+def normaliser_question(question: str) -> str:
+    """
+    Normalise une question pour servir de clé de cache : casse ignorée, espaces réduits.
+    """
+    return " ".join(question.casefold().split())
+
+
+class LRUCache:
+    """
+    Cache LRU thread-safe borné en nombre d'entrées et en durée de vie, avec niveau disque optionnel.
+    """
+    def __init__(self, max_size: int = 1024, ttl: Optional[float] = 3600.0, disk_dir: Optional[str] = None,
+                 name: str = "cache") -> None:
+        """
+        Args:
+            max_size (int): Nombre maximal d'entrées en mémoire (0 = cache désactivé).
+            ttl (float): Durée de vie d'une entrée en secondes (None = illimitée).
+            disk_dir (str): Dossier du niveau disque (None = mémoire seule).
+            name (str): Nom affiché dans les statistiques.
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self.disk_dir = disk_dir
+        self.name = name
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _expired(self, stored_at: float) -> bool:
+        return self.ttl is not None and time.time() - stored_at > self.ttl
+
+    def _disk_path(self, key: Hashable) -> str:
+        digest = hashlib.sha1(repr(key).encode("utf-8")).hexdigest()
+        return os.path.join(self.disk_dir, f"{digest}.pkl")
+
+    def _disk_get(self, key: Hashable) -> Any:
+        """
+        Lit une entrée du niveau disque (absente, expirée ou illisible : `_MISSING`).
+        """
+        path = self._disk_path(key)
+        try:
+            with open(path, "rb") as f:
+                stored_key, stored_at, value = pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError, ValueError):
+            return _MISSING
+        if stored_key != key or self._expired(stored_at):
+            return _MISSING
+        return stored_at, value
+
+    def _disk_put(self, key: Hashable, stored_at: float, value: Any) -> None:
+        """
+        Écrit une entrée sur disque (fichier temporaire puis renommage atomique).
+        """
+        path = self._disk_path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                pickle.dump((key, stored_at, value), f)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            print(f"❌ Erreur écriture cache disque {self.name}: {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """
+        Retourne la valeur associée à `key` (mémoire puis disque), ou `default`.
+        """
+        if self.max_size <= 0:
+            return default
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if not self._expired(entry[0]):
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[1]
+                del self._entries[key]
+        if self.disk_dir:
+            entry = self._disk_get(key)
+            if entry is not _MISSING:
+                with self._lock:
+                    self.disk_hits += 1
+                    self._store(key, *entry)
+                return entry[1]
+        with self._lock:
+            self.misses += 1
+        return default
+
+    def _store(self, key: Hashable, stored_at: float, value: Any) -> None:
+        """
+        Insère une entrée en mémoire et évince les plus anciennes au-delà de `max_size` (verrou tenu).
+        """
+        self._entries[key] = (stored_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def put(self, key: Hashable, value: Any) -> None:
+        """
+        Enregistre une valeur (en mémoire et, si activé, sur disque).
+        """
+        if self.max_size <= 0:
+            return
+        stored_at = time.time()
+        with self._lock:
+            self._store(key, stored_at, value)
+        if self.disk_dir:
+            self._disk_put(key, stored_at, value)
+
+    def clear(self) -> None:
+        """
+        Vide le cache (mémoire et disque) et remet les compteurs à zéro.
+        """
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.disk_hits = self.misses = self.evictions = 0
+        if self.disk_dir and os.path.isdir(self.disk_dir):
+            for filename in os.listdir(self.disk_dir):
+                if filename.endswith(".pkl"):
+                    os.remove(os.path.join(self.disk_dir, filename))
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Statistiques d'usage du cache.
+        """
+        lookups = self.hits + self.disk_hits + self.misses
+        return {
+            "name": self.name,
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "ttl": self.ttl,
+            "disk": bool(self.disk_dir),
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round((self.hits + self.disk_hits) / lookups, 3) if lookups else None,
+        }
@@ -1,35 +1,121 @@
 """
 model_cache.py - Gestion du cache pour les modèles, embeddings et stores du Chatbot ODD
 
-Ce module gère la sauvegarde, le chargement et la gestion du cache pour les modèles SentenceTransformer, les document stores Haystack, les embeddings et les retrievers BM25.
+Ce module gère la sauvegarde, le chargement et la gestion du cache pour les modèles SentenceTransformer (dossier natif safetensors, voir `src.model_snapshot`), les embeddings (`.npy` projetés en mémoire, voir `src.embedding_store`), les index de passages et les index BM25 autonomes (`.npz`).
+
+Organisation du dossier de cache :
+- `objects/` : les artefacts, nommés par le sha256 de leur contenu (fichier ou dossier), jamais modifiés ;
+- `manifest.json` : pour chaque entrée logique (ex. `bm25:<hash des données>`), l'objet associé,
+  sa taille, sa version des données et ses dates de création et de dernier usage ;
+- `locks/` : fichiers de verrou (manifeste, et construction d'un artefact par un seul worker).
+
+Chaque écriture passe par un fichier temporaire renommé de manière atomique. Quand la taille totale
+dépasse `ODD_CACHE_MAX_MB`, les entrées périmées (versions de données remplacées par une plus
+récente) sont évincées, les moins récemment utilisées d'abord. Les lectures ne réécrivent pas le
+manifeste : leurs dates d'usage sont gardées en mémoire et reportées à la prochaine écriture, ou au
+plus tard toutes les `ODD_CACHE_TOUCH_FLUSH_SECONDS` secondes.
 """
 
+import atexit
+import contextlib
+import copy
 import pickle
 import os
 import json
-from sentence_transformers import SentenceTransformer
-from haystack.document_stores import InMemoryDocumentStore
-from haystack.nodes import BM25Retriever
-from typing import Dict, Any, Optional
+import shutil
+import threading
+import time
+import uuid
+from typing import Callable, Dict, Any, List, Optional, TYPE_CHECKING
 import hashlib
 
+from src.file_lock import FileLock
+
+if TYPE_CHECKING:
+    # Imports lourds réservés au typage : le module reste rapide à importer
+    from sentence_transformers import SentenceTransformer
+    from src.bm25 import BM25Index
+    from src.embedding_store import EmbeddingStore
+    from src.passage_index import PassageIndex
+
+MANIFEST_FILE = "manifest.json"
+OBJECTS_DIR = "objects"
+LOCKS_DIR = "locks"
+CACHE_MAX_MB = float(os.environ.get("ODD_CACHE_MAX_MB", "2048") or 0)
+# Délai maximal avant de reporter dans le manifeste les dates d'usage des lectures
+TOUCH_FLUSH_SECONDS = float(os.environ.get("ODD_CACHE_TOUCH_FLUSH_SECONDS", "30"))
+# Avant l'indexation par identifiant, le seul modèle mis en cache l'était sous ce nom
+LEGACY_MODEL_ID = "all-MiniLM-L6-v2"
+LEGACY_MODEL_NAME = "sentence_transformer"
+
+
+def _sha256(path: str) -> str:
+    """
+    Empreinte sha256 d'un fichier, ou d'un dossier (chemins relatifs triés et contenus).
+    """
+    digest = hashlib.sha256()
+    if os.path.isdir(path):
+        files = sorted(os.path.relpath(os.path.join(root, name), path)
+                       for root, _, names in os.walk(path) for name in names)
+    else:
+        files = [None]
+    for rel in files:
+        if rel is not None:
+            digest.update(rel.replace(os.sep, "/").encode("utf-8") + b"\0")
+        with open(path if rel is None else os.path.join(path, rel), "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _size(path: str) -> int:
+    """
+    Taille en octets d'un fichier ou d'un dossier.
+    """
+    if not os.path.isdir(path):
+        return os.path.getsize(path)
+    return sum(os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(path) for name in names)
+
+
+def _remove(path: str) -> None:
+    """
+    Supprime un fichier ou un dossier (les erreurs, ex. fichier projeté sous Windows, sont ignorées).
+    """
+    try:
+        if os.path.isdir(path):
+            shutil.rmtree(path)
+        elif os.path.exists(path):
+            os.remove(path)
+    except OSError:
+        pass
+
+
 class ModelCache:
     """
-    Classe utilitaire pour la gestion du cache des modèles, embeddings, document stores et retrievers.
+    Classe utilitaire pour la gestion du cache des modèles, embeddings et index (BM25, passages).
     Permet de sauvegarder et recharger rapidement les objets lourds pour accélérer le démarrage du chatbot.
     """
-    def __init__(self, cache_dir: str = None) -> None:
+    def __init__(self, cache_dir: str = None, max_size_mb: float = CACHE_MAX_MB) -> None:
         """
         Initialise le répertoire de cache.
         Args:
             cache_dir (str): Dossier où stocker les fichiers de cache.
+            max_size_mb (float): Taille au-delà de laquelle les versions périmées sont évincées (0 = illimitée).
         """
         if cache_dir is None:
             # Place le cache à la racine du projet
             project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
             cache_dir = os.path.join(project_root, 'cache')
         self.cache_dir = cache_dir
+        self.max_size_mb = max_size_mb
+        self._manifest: Optional[Dict[str, Any]] = None
+        self._manifest_stamp = None
+        # Dates d'usage des lectures, pas encore écrites dans le manifeste
+        self._touches: Dict[str, float] = {}
+        self._touches_lock = threading.Lock()
+        self._last_flush = time.time()
         os.makedirs(self.cache_dir, exist_ok=True)
+        atexit.register(self.flush_touches)
 
     def _get_cache_path(self, filename: str) -> str:
         """
@@ -43,198 +129,407 @@ class ModelCache:
 
     def _get_data_hash(self, data: Dict) -> str:
         """
-        Calcule un hash MD5 à partir d'un dictionnaire de données (pour versionner le cache).
+        Calcule un hash sha256 à partir d'un dictionnaire de données (pour versionner le cache).
         Args:
             data (Dict): Données à hasher.
         Returns:
-            str: Hash MD5.
+            str: Hash sha256.
         """
         data_str = json.dumps(data, sort_keys=True)
-        return hashlib.md5(data_str.encode()).hexdigest()
+        return hashlib.sha256(data_str.encode()).hexdigest()
+
+    # --- Manifeste -----------------------------------------------------------------------------
+
+    def _lock_path(self, name: str) -> str:
+        return self._get_cache_path(os.path.join(LOCKS_DIR, f"{name}.lock"))
+
+    def _read_manifest(self) -> Dict[str, Any]:
+        """
+        Retourne le manifeste ; il n'est relu sur disque que s'il a été remplacé depuis la dernière lecture.
+        """
+        path = self._get_cache_path(MANIFEST_FILE)
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return {"version": 1, "entries": {}, "total_size": 0}
+        stamp = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        if self._manifest is None or stamp != self._manifest_stamp:
+            with open(path, "r", encoding="utf-8") as f:
+                self._manifest = json.load(f)
+            self._manifest_stamp = stamp
+        return self._manifest
+
+    def _write_manifest(self, manifest: Dict[str, Any]) -> None:
+        """
+        Écrit le manifeste (fichier temporaire puis renommage atomique). Verrou du manifeste tenu.
+        """
+        path = self._get_cache_path(MANIFEST_FILE)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=1)
+        os.replace(tmp_path, path)
+
+    def _update_manifest(self, change: Callable[[Dict[str, Any]], Any]) -> Any:
+        """
+        Applique `change` au manifeste sous verrou inter-processus, puis recalcule la taille totale.
+        Les dates d'usage en attente sont reportées avant `change` (l'éviction les voit).
+        Returns:
+            Any: La valeur retournée par `change`.
+        """
+        with FileLock(self._lock_path("manifest")):
+            manifest = copy.deepcopy(self._read_manifest())
+            with self._touches_lock:
+                touches, self._touches = self._touches, {}
+                self._last_flush = time.time()
+            for key, used_at in touches.items():
+                entry = manifest["entries"].get(key)
+                if entry is not None:
+                    entry["last_used"] = max(entry["last_used"], used_at)
+            result = change(manifest)
+            manifest["total_size"] = self._total_size(manifest["entries"])
+            self._write_manifest(manifest)
+        return result
 
-    def save_model(self, model: SentenceTransformer, model_name: str = "sentence_transformer") -> None:
+    @staticmethod
+    def _total_size(entries: Dict[str, Dict[str, Any]]) -> int:
+        # Un même objet peut servir plusieurs entrées (ex. matrices fr/en identiques)
+        return sum({entry["path"]: entry["size"] for entry in entries.values()}.values())
+
+    def _evict(self, manifest: Dict[str, Any], protect: str) -> List[str]:
         """
-        Sauvegarde un modèle SentenceTransformer dans le cache.
+        Évince les entrées périmées les moins récemment utilisées jusqu'à repasser sous la taille maximale.
+        Une entrée est périmée quand une version plus récente des données existe pour le même type.
+        Returns:
+            List[str]: Chemins relatifs des objets éventuellement orphelins.
+        """
+        if self.max_size_mb <= 0:
+            return []
+        entries = manifest["entries"]
+        budget = self.max_size_mb * 1024 * 1024
+        latest: Dict[str, Any] = {}
+        for entry in sorted(entries.values(), key=lambda e: e["created"]):
+            latest[entry["kind"]] = entry.get("version")
+        stale = sorted((key for key, entry in entries.items()
+                        if key != protect and entry.get("version") is not None
+                        and entry["version"] != latest[entry["kind"]]),
+                       key=lambda key: entries[key]["last_used"])
+        removed = []
+        for key in stale:
+            if self._total_size(entries) <= budget:
+                break
+            removed.append(entries.pop(key)["path"])
+            print(f"♻️  Cache : entrée périmée évincée {key}")
+        return removed
+
+    def _drop_orphans(self, paths: List[str]) -> None:
+        """
+        Supprime les objets qui ne sont plus référencés par aucune entrée du manifeste.
+        """
+        referenced = {entry["path"] for entry in self._read_manifest()["entries"].values()}
+        for rel in set(paths) - referenced:
+            _remove(self._get_cache_path(rel))
+
+    def _put(self, key: str, kind: str, version: Optional[str], writer: Callable[[str], None],
+             suffix: str = "") -> str:
+        """
+        Écrit un artefact (via `writer`, vers un chemin temporaire), le range sous son sha256 et
+        l'enregistre dans le manifeste.
+        Args:
+            key (str): Entrée logique (ex. "bm25:<hash>").
+            kind (str): Type d'artefact, pour repérer les versions périmées.
+            version (str): Version des données (None = jamais périmé).
+            writer (Callable[[str], None]): Écrit l'artefact (fichier ou dossier) au chemin donné.
+            suffix (str): Extension du fichier (ex. ".npy").
+        Returns:
+            str: Chemin de l'objet dans le cache.
+        """
+        objects_dir = self._get_cache_path(OBJECTS_DIR)
+        os.makedirs(objects_dir, exist_ok=True)
+        tmp_path = os.path.join(objects_dir, f".tmp-{os.getpid()}-{uuid.uuid4().hex}{suffix}")
+        try:
+            writer(tmp_path)
+            rel = f"{OBJECTS_DIR}/{_sha256(tmp_path)}{suffix}"
+            target = self._get_cache_path(rel)
+            if not os.path.exists(target):
+                try:
+                    os.replace(tmp_path, target)
+                except OSError:
+                    # Un autre worker a rangé le même contenu entre-temps
+                    if not os.path.exists(target):
+                        raise
+            size = _size(target)
+        finally:
+            _remove(tmp_path)
+
+        def change(manifest: Dict[str, Any]) -> List[str]:
+            now = time.time()
+            previous = manifest["entries"].get(key)
+            manifest["entries"][key] = {"kind": kind, "version": version, "path": rel, "size": size,
+                                        "created": now, "last_used": now}
+            orphans = [previous["path"]] if previous else []
+            return orphans + self._evict(manifest, protect=key)
+        self._drop_orphans(self._update_manifest(change))
+        return target
+
+    def _get(self, key: str) -> Optional[str]:
+        """
+        Chemin de l'objet associé à `key`, ou None. La date d'usage est notée en mémoire ; le
+        manifeste n'est réécrit que si l'objet a disparu ou si le dernier report date de plus de
+        `TOUCH_FLUSH_SECONDS`.
+        """
+        entry = self._read_manifest()["entries"].get(key)
+        if entry is None:
+            return None
+        path = self._get_cache_path(entry["path"])
+        if not os.path.exists(path):
+            def change(manifest: Dict[str, Any]) -> None:
+                manifest["entries"].pop(key, None)
+            self._update_manifest(change)
+            return None
+        now = time.time()
+        with self._touches_lock:
+            self._touches[key] = now
+            due = now - self._last_flush >= TOUCH_FLUSH_SECONDS
+        if due:
+            self.flush_touches()
+        return path
+
+    def flush_touches(self) -> None:
+        """
+        Écrit dans le manifeste les dates d'usage en attente (appelée aussi à la sortie du processus).
+        """
+        if not self._touches or not os.path.isdir(self.cache_dir):
+            return
+        try:
+            self._update_manifest(lambda manifest: None)
+        except Exception as e:
+            print(f"❌ Erreur mise à jour des dates d'usage du cache: {e}")
+
+    def build_lock(self, key: str, timeout: Optional[float] = None) -> FileLock:
+        """
+        Verrou à prendre autour de « charger depuis le cache, sinon construire et sauvegarder » :
+        un seul worker construit l'artefact, les autres attendent puis le trouvent dans le cache.
+        Args:
+            key (str): Artefact concerné (ex. "bm25:<hash>").
+            timeout (float): Attente maximale en secondes (None = illimitée).
+        Returns:
+            FileLock: Verrou (gestionnaire de contexte).
+        """
+        return FileLock(self._lock_path("build-" + hashlib.sha256(key.encode()).hexdigest()[:16]), timeout=timeout)
+
+    # --- Artefacts -----------------------------------------------------------------------------
+
+    def save_model(self, model: "SentenceTransformer", model_id: str) -> None:
+        """
+        Sauvegarde un modèle SentenceTransformer dans le cache, au format natif (poids safetensors).
         Args:
             model (SentenceTransformer): Le modèle à sauvegarder.
-            model_name (str): Nom du fichier de cache.
+            model_id (str): Identifiant du modèle (ex. "all-MiniLM-L6-v2"), clé de l'entrée de cache.
         """
-        cache_path = self._get_cache_path(f"{model_name}.pkl")
         try:
-            with open(cache_path, 'wb') as f:
-                pickle.dump(model, f)
+            from src.model_snapshot import save_sentence_transformer
+            cache_path = self._put(f"model:{model_id}", "model", None,
+                                   lambda path: save_sentence_transformer(model, path))
             print(f"✅ Modèle sauvegardé: {cache_path}")
         except Exception as e:
             print(f"❌ Erreur sauvegarde modèle: {e}")
 
-    def load_model(self, model_name: str = "sentence_transformer") -> Optional[SentenceTransformer]:
+    def model_path(self, model_id: str) -> Optional[str]:
+        """
+        Dossier de l'instantané d'un modèle dans le cache, ou None.
+        """
+        path = self._get(f"model:{model_id}")
+        if path is None and model_id == LEGACY_MODEL_ID:
+            path = self._get(f"model:{LEGACY_MODEL_NAME}")
+        return path
+
+    def load_model(self, model_id: str) -> Optional["SentenceTransformer"]:
         """
-        Charge un modèle SentenceTransformer depuis le cache.
+        Charge un modèle SentenceTransformer depuis le cache, hors ligne, poids projetés en mémoire.
+        Un ancien cache pickle (`sentence_transformer.pkl`, toujours all-MiniLM-L6-v2) est converti
+        au format natif puis supprimé.
         Args:
-            model_name (str): Nom du fichier de cache.
+            model_id (str): Identifiant du modèle.
         Returns:
-            Optional[SentenceTransformer]: Le modèle chargé ou None.
+            Optional["SentenceTransformer"]: Le modèle chargé ou None (aucune entrée pour ce modèle).
         """
-        cache_path = self._get_cache_path(f"{model_name}.pkl")
+        legacy_path = self._get_cache_path(f"{LEGACY_MODEL_NAME}.pkl")
         try:
-            if os.path.exists(cache_path):
-                with open(cache_path, 'rb') as f:
-                    model = pickle.load(f)
+            from src.model_snapshot import load_sentence_transformer
+            cache_path = self.model_path(model_id)
+            if cache_path is None and model_id == LEGACY_MODEL_ID and os.path.exists(legacy_path):
+                print(f"🔄 Conversion du cache pickle au format safetensors: {legacy_path}")
+                with open(legacy_path, 'rb') as f:
+                    self.save_model(pickle.load(f), model_id)
+                cache_path = self.model_path(model_id)
+                if cache_path is not None:
+                    os.remove(legacy_path)
+            if cache_path is not None:
+                model = load_sentence_transformer(cache_path)
                 print(f"✅ Modèle chargé depuis le cache: {cache_path}")
                 return model
             else:
-                print("⚠️  Cache modèle non trouvé, chargement depuis HuggingFace...")
+                print(f"⚠️  Cache modèle {model_id} non trouvé, chargement depuis HuggingFace...")
                 return None
         except Exception as e:
             print(f"❌ Erreur chargement modèle: {e}")
             return None
 
-    def save_document_store(self, document_store: InMemoryDocumentStore, data_hash: str) -> None:
+    def save_embedding_store(self, store: "EmbeddingStore", data_hash: str, lang: str) -> None:
         """
-        Sauvegarde un document store Haystack dans le cache.
+        Sauvegarde les embeddings des documents d'une langue (matrice `.npy` + identifiants et textes).
         Args:
-            document_store (InMemoryDocumentStore): Le document store à sauvegarder.
+            store (EmbeddingStore): Matrice normalisée et documents associés.
             data_hash (str): Hash des données pour versionner le cache.
+            lang (str): Code langue ("fr" ou "en").
         """
-        cache_path = self._get_cache_path(f"document_store_{data_hash}.pkl")
         try:
-            with open(cache_path, 'wb') as f:
-                pickle.dump(document_store, f)
-            print(f"✅ Document store sauvegardé: {cache_path}")
+            cache_path = self._put(f"embeddings:{data_hash}:{lang}", f"embeddings_{lang}", data_hash, store.save)
+            print(f"✅ Embeddings ({lang}) sauvegardés: {cache_path}")
         except Exception as e:
-            print(f"❌ Erreur sauvegarde document store: {e}")
+            print(f"❌ Erreur sauvegarde embeddings ({lang}): {e}")
 
-    def load_document_store(self, data_hash: str) -> Optional[InMemoryDocumentStore]:
+    def load_embedding_store(self, data_hash: str, lang: str) -> Optional["EmbeddingStore"]:
         """
-        Charge un document store Haystack depuis le cache.
+        Ouvre les embeddings d'une langue depuis le cache (matrice projetée en mémoire, partagée
+        entre processus).
         Args:
             data_hash (str): Hash des données pour versionner le cache.
+            lang (str): Code langue ("fr" ou "en").
         Returns:
-            Optional[InMemoryDocumentStore]: Le document store chargé ou None.
+            Optional[EmbeddingStore]: Store chargé ou None.
         """
-        cache_path = self._get_cache_path(f"document_store_{data_hash}.pkl")
         try:
-            if os.path.exists(cache_path):
-                with open(cache_path, 'rb') as f:
-                    document_store = pickle.load(f)
-                print(f"✅ Document store chargé depuis le cache: {cache_path}")
-                return document_store
+            cache_path = self._get(f"embeddings:{data_hash}:{lang}")
+            if cache_path is not None:
+                from src.embedding_store import EmbeddingStore
+                store = EmbeddingStore.load(cache_path)
+                print(f"✅ Embeddings ({lang}) chargés depuis le cache: {cache_path}")
+                return store
             else:
-                print("⚠️  Cache document store non trouvé")
+                print(f"⚠️  Cache embeddings ({lang}) non trouvé")
                 return None
         except Exception as e:
-            print(f"❌ Erreur chargement document store: {e}")
+            print(f"❌ Erreur chargement embeddings ({lang}): {e}")
             return None
 
-    def save_embeddings(self, embeddings: Dict[str, Any], data_hash: str) -> None:
+    def save_passage_index(self, index: "PassageIndex", data_hash: str, lang: str) -> None:
         """
-        Sauvegarde les embeddings dans le cache.
+        Sauvegarde l'index de passages d'une langue dans le cache (un dossier).
         Args:
-            embeddings (Dict[str, Any]): Embeddings à sauvegarder.
+            index (PassageIndex): Index à sauvegarder.
             data_hash (str): Hash des données pour versionner le cache.
+            lang (str): Code langue ("fr" ou "en").
         """
-        cache_path = self._get_cache_path(f"embeddings_{data_hash}.pkl")
         try:
-            with open(cache_path, 'wb') as f:
-                pickle.dump(embeddings, f)
-            print(f"✅ Embeddings sauvegardés: {cache_path}")
+            cache_path = self._put(f"passages:{data_hash}:{lang}", f"passages_{lang}", data_hash, index.save)
+            print(f"✅ Index de passages ({lang}) sauvegardé: {cache_path}")
         except Exception as e:
-            print(f"❌ Erreur sauvegarde embeddings: {e}")
+            print(f"❌ Erreur sauvegarde index de passages ({lang}): {e}")
 
-    def load_embeddings(self, data_hash: str) -> Optional[Dict[str, Any]]:
+    def load_passage_index(self, data_hash: str, lang: str) -> Optional["PassageIndex"]:
         """
-        Charge les embeddings depuis le cache.
+        Charge l'index de passages d'une langue depuis le cache (vecteurs projetés en mémoire).
         Args:
             data_hash (str): Hash des données pour versionner le cache.
+            lang (str): Code langue ("fr" ou "en").
         Returns:
-            Optional[Dict[str, Any]]: Embeddings chargés ou None.
+            Optional[PassageIndex]: Index chargé ou None.
         """
-        cache_path = self._get_cache_path(f"embeddings_{data_hash}.pkl")
         try:
-            if os.path.exists(cache_path):
-                with open(cache_path, 'rb') as f:
-                    embeddings = pickle.load(f)
-                print(f"✅ Embeddings chargés depuis le cache: {cache_path}")
-                return embeddings
+            cache_path = self._get(f"passages:{data_hash}:{lang}")
+            if cache_path is not None:
+                from src.passage_index import PassageIndex
+                index = PassageIndex.load(cache_path)
+                print(f"✅ Index de passages ({lang}) chargé depuis le cache: {cache_path}")
+                return index
             else:
-                print("⚠️  Cache embeddings non trouvé")
+                print(f"⚠️  Cache index de passages ({lang}) non trouvé")
                 return None
         except Exception as e:
-            print(f"❌ Erreur chargement embeddings: {e}")
+            print(f"❌ Erreur chargement index de passages ({lang}): {e}")
             return None
 
-    def save_retriever(self, retriever: BM25Retriever, data_hash: str) -> None:
+    def save_bm25_index(self, index: "BM25Index", data_hash: str) -> None:
         """
-        Sauvegarde un retriever BM25 dans le cache.
+        Sauvegarde un index BM25 dans le cache (format `.npz`).
         Args:
-            retriever (BM25Retriever): Retriever à sauvegarder.
+            index (BM25Index): Index à sauvegarder.
             data_hash (str): Hash des données pour versionner le cache.
         """
-        cache_path = self._get_cache_path(f"retriever_{data_hash}.pkl")
         try:
-            with open(cache_path, 'wb') as f:
-                pickle.dump(retriever, f)
-            print(f"✅ Retriever sauvegardé: {cache_path}")
+            cache_path = self._put(f"bm25:{data_hash}", "bm25", data_hash, index.save, suffix=".npz")
+            print(f"✅ Index BM25 sauvegardé: {cache_path}")
         except Exception as e:
-            print(f"❌ Erreur sauvegarde retriever: {e}")
+            print(f"❌ Erreur sauvegarde index BM25: {e}")
 
-    def load_retriever(self, data_hash: str) -> Optional[BM25Retriever]:
+    def load_bm25_index(self, data_hash: str) -> Optional["BM25Index"]:
         """
-        Charge un retriever BM25 depuis le cache.
+        Charge un index BM25 depuis le cache.
         Args:
             data_hash (str): Hash des données pour versionner le cache.
         Returns:
-            Optional[BM25Retriever]: Retriever chargé ou None.
+            Optional["BM25Index"]: Index chargé ou None.
         """
-        cache_path = self._get_cache_path(f"retriever_{data_hash}.pkl")
         try:
-            if os.path.exists(cache_path):
-                with open(cache_path, 'rb') as f:
-                    retriever = pickle.load(f)
-                print(f"✅ Retriever chargé depuis le cache: {cache_path}")
-                return retriever
+            cache_path = self._get(f"bm25:{data_hash}")
+            if cache_path is not None:
+                from src.bm25 import BM25Index
+                index = BM25Index.load(cache_path)
+                print(f"✅ Index BM25 chargé depuis le cache: {cache_path}")
+                return index
             else:
-                print("⚠️  Cache retriever non trouvé")
+                print("⚠️  Cache index BM25 non trouvé")
                 return None
         except Exception as e:
-            print(f"❌ Erreur chargement retriever: {e}")
+            print(f"❌ Erreur chargement index BM25: {e}")
             return None
 
     def clear_cache(self) -> None:
         """
-        Efface tous les fichiers du cache.
+        Efface les objets référencés par le manifeste, puis le manifeste lui-même. Les autres
+        contenus du dossier de cache (store SDG, réponses HTTP, modèles ONNX, cache des questions,
+        sidecars du classeur) et les fichiers de verrou sont conservés.
         """
         try:
-            for filename in os.listdir(self.cache_dir):
-                file_path = os.path.join(self.cache_dir, filename)
-                if os.path.isfile(file_path):
-                    os.remove(file_path)
+            with FileLock(self._lock_path("manifest")):
+                entries = self._read_manifest()["entries"]
+                for rel in {entry["path"] for entry in entries.values()}:
+                    _remove(self._get_cache_path(rel))
+                _remove(self._get_cache_path(MANIFEST_FILE))
+                with contextlib.suppress(OSError):
+                    os.rmdir(self._get_cache_path(OBJECTS_DIR))
+                with self._touches_lock:
+                    self._touches = {}
+                self._manifest, self._manifest_stamp = None, None
             print("✅ Cache effacé")
         except Exception as e:
             print(f"❌ Erreur effacement cache: {e}")
 
     def get_cache_info(self) -> Dict[str, Any]:
         """
-        Retourne des informations sur le cache (nombre de fichiers, taille totale, etc.).
+        Retourne des informations sur le cache (nombre de fichiers, taille totale, etc.), lues dans
+        le manifeste (pas de parcours du dossier).
         Returns:
             Dict[str, Any]: Infos sur le cache.
         """
         cache_info = {
             "cache_dir": self.cache_dir,
             "files": [],
-            "total_size": 0
+            "total_size": 0,
+            "max_size_mb": self.max_size_mb,
         }
         try:
-            for filename in os.listdir(self.cache_dir):
-                file_path = os.path.join(self.cache_dir, filename)
-                if os.path.isfile(file_path):
-                    file_size = os.path.getsize(file_path)
-                    cache_info["files"].append({
-                        "name": filename,
-                        "size": file_size,
-                        "size_mb": round(file_size / (1024 * 1024), 2)
-                    })
-                    cache_info["total_size"] += file_size
+            manifest = self._read_manifest()
+            with self._touches_lock:
+                touches = dict(self._touches)
+            cache_info["files"] = [{
+                "name": key,
+                "size": entry["size"],
+                "size_mb": round(entry["size"] / (1024 * 1024), 2),
+                "last_used": max(entry["last_used"], touches.get(key, 0)),
+            } for key, entry in manifest["entries"].items()]
+            cache_info["total_size"] = manifest["total_size"]
             cache_info["total_size_mb"] = round(cache_info["total_size"] / (1024 * 1024), 2)
             cache_info["file_count"] = len(cache_info["files"])
         except Exception as e:
@@ -242,4 +537,4 @@ class ModelCache:
         return cache_info
 
 # Instance globale
-model_cache = ModelCache()
\ No newline at end of file
+model_cache = ModelCache()
@@ -0,0 +1,275 @@
+"""
+model_registry.py - Registre partagé des modèles du Chatbot ODD
+
+Chaque modèle (pipeline transformers, SentenceTransformer...) est chargé au plus une fois par
+processus, à la première demande, et partagé par tous les modules. Les entrées sont indexées par
+(identifiant du modèle, tâche, device). Le registre mesure la mémoire des poids de chaque modèle,
+et peut décharger les modèles inactifs ou les moins récemment utilisés pour respecter un budget
+mémoire (`ODD_MODEL_MEMORY_BUDGET_MB`) ; avec `ODD_MODEL_IDLE_SECONDS`, un thread de fond décharge
+les modèles inutilisés depuis ce délai. Un modèle déchargé est rechargé à la demande suivante.
+Le backend d'inférence ("torch" ou "onnx" quantifié int8, voir `src.onnx_backend`) est choisi par
+`ODD_INFERENCE_BACKEND` ; il fait partie de la clé des modèles ONNX.
+"""
+
+import gc
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+ModelKey = Tuple[str, str, str]
+
+MEMORY_BUDGET_MB = float(os.environ.get("ODD_MODEL_MEMORY_BUDGET_MB", "0") or 0)
+MAX_IDLE_SECONDS = float(os.environ.get("ODD_MODEL_IDLE_SECONDS", "0") or 0)
+INFERENCE_BACKEND = os.environ.get("ODD_INFERENCE_BACKEND", "torch")
+
+
+def _model_bytes(obj: Any) -> int:
+    """
+    Estime la mémoire occupée par les poids (paramètres + buffers) d'un modèle PyTorch.
+    Pour un pipeline transformers, c'est son attribut `model` qui est mesuré ; les modèles ONNX
+    déclarent leur taille dans `model_bytes`.
+    """
+    declared = getattr(obj, "model_bytes", None)
+    if declared:
+        return int(declared)
+    module = getattr(obj, "model", obj)
+    total = 0
+    for attr in ("parameters", "buffers"):
+        tensors = getattr(module, attr, None)
+        if callable(tensors):
+            try:
+                total += sum(t.numel() * t.element_size() for t in tensors())
+            except Exception:
+                pass
+    return total
+
+
+class _Entry:
+    """
+    Modèle chargé (ou en cours de chargement) et ses statistiques d'usage.
+    """
+    def __init__(self) -> None:
+        self.obj: Any = None
+        self.nbytes = 0
+        self.loads = 0
+        self.last_used = 0.0
+        self.load_seconds = 0.0
+        self.lock = threading.Lock()
+
+
+class ModelRegistry:
+    """
+    Registre des modèles chargés, indexé par (model_id, task, device).
+    """
+    def __init__(self, memory_budget_mb: float = MEMORY_BUDGET_MB, max_idle_seconds: float = MAX_IDLE_SECONDS) -> None:
+        """
+        Args:
+            memory_budget_mb (float): Budget mémoire des poids (0 = illimité).
+            max_idle_seconds (float): Inactivité après laquelle un modèle est déchargé (0 = jamais).
+        """
+        self.memory_budget = int(memory_budget_mb * 1024 * 1024)
+        self.max_idle_seconds = max_idle_seconds
+        self._entries: Dict[ModelKey, _Entry] = {}
+        self._backends: Dict[str, str] = {}
+        self._reaper: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def get(self, model_id: str, task: str, loader: Callable[[], Any], device: str = "cpu") -> Any:
+        """
+        Retourne le modèle demandé, en le chargeant avec `loader` s'il n'est pas déjà en mémoire.
+        Les appels concurrents pour une même clé attendent un unique chargement.
+        Returns:
+            Any: Le modèle, ou None si le chargement a échoué.
+        """
+        key = (model_id, task, device)
+        entry = self._entries.get(key)
+        if entry is not None and entry.obj is not None:
+            entry.last_used = time.time()
+            return entry.obj
+        with self._lock:
+            entry = self._entries.setdefault(key, _Entry())
+        with entry.lock:
+            if entry.obj is None:
+                start_time = time.time()
+                try:
+                    entry.obj = loader()
+                except Exception as e:
+                    print(f"[ERREUR] Chargement du modèle {model_id} ({task}) impossible : {e}")
+                    return None
+                if entry.obj is None:
+                    return None
+                entry.load_seconds = time.time() - start_time
+                entry.nbytes = _model_bytes(entry.obj)
+                entry.loads += 1
+                print(f"✅ Modèle {model_id} ({task}, {device}) chargé en {entry.load_seconds:.2f}s, "
+                      f"{entry.nbytes / (1024 * 1024):.1f} MB")
+            entry.last_used = time.time()
+            obj = entry.obj
+        if self.memory_budget:
+            self.enforce_budget(self.memory_budget, keep=[key])
+        if self.max_idle_seconds and self._reaper is None:
+            self.start_idle_reaper(self.max_idle_seconds)
+        return obj
+
+    def start_idle_reaper(self, max_idle_seconds: float, interval: Optional[float] = None) -> None:
+        """
+        Lance (une seule fois) un thread de fond qui appelle périodiquement `unload_idle`.
+        Args:
+            max_idle_seconds (float): Inactivité après laquelle un modèle est déchargé.
+            interval (float): Période de vérification (par défaut la moitié du délai, au moins 1 s).
+        """
+        interval = interval or max(max_idle_seconds / 2, 1.0)
+
+        def reap() -> None:
+            while True:
+                time.sleep(interval)
+                try:
+                    self.unload_idle(max_idle_seconds)
+                except Exception as e:
+                    print(f"[ERREUR] Déchargement des modèles inactifs : {e}")
+
+        with self._lock:
+            if self._reaper is not None:
+                return
+            self._reaper = threading.Thread(target=reap, name="model-reaper", daemon=True)
+            self._reaper.start()
+
+    def resolve_backend(self, backend: Optional[str] = None) -> str:
+        """
+        Backend effectif : ONNX seulement si onnxruntime et optimum sont installés.
+        Le résultat est mémorisé : la vérification (et l'éventuel message d'erreur) n'a lieu qu'une fois.
+        """
+        backend = backend or INFERENCE_BACKEND
+        resolved = self._backends.get(backend)
+        if resolved is None:
+            resolved = backend
+            if backend == "onnx":
+                from src.onnx_backend import is_available
+                if not is_available():
+                    print("[ERREUR] Backend ONNX demandé mais onnxruntime/optimum non installés : PyTorch utilisé.")
+                    resolved = "torch"
+            self._backends[backend] = resolved
+        return resolved
+
+    def get_pipeline(self, model_id: str, task: str, device: str = "cpu", backend: Optional[str] = None) -> Any:
+        """
+        Retourne un pipeline transformers partagé (PyTorch, ou modèle ONNX int8 si backend="onnx").
+        """
+        if self.resolve_backend(backend) == "onnx":
+            from src.onnx_backend import load_seq2seq_pipeline
+            return self.get(model_id, f"{task}:onnx-int8", lambda: load_seq2seq_pipeline(model_id, task), device)
+
+        def loader() -> Any:
+            from transformers import pipeline
+            return pipeline(task, model=model_id, device=-1 if device == "cpu" else device)
+        return self.get(model_id, task, loader, device)
+
+    def get_sentence_transformer(self, model_id: str, device: str = "cpu", backend: Optional[str] = None) -> Any:
+        """
+        Retourne un SentenceTransformer partagé (depuis le bundle d'index ou l'entrée du cache local
+        de ce modèle si possible), ou l'encodeur ONNX int8 équivalent si backend="onnx".
+        """
+        if self.resolve_backend(backend) == "onnx":
+            from src.onnx_backend import load_sentence_encoder
+            return self.get(model_id, "sentence-embedding:onnx-int8", lambda: load_sentence_encoder(model_id), device)
+
+        def loader() -> Any:
+            from src.index_bundle import open_bundle
+            bundle = open_bundle()
+            if bundle is not None and bundle.model_dir and bundle.manifest["model"]["id"] == model_id:
+                from src.model_snapshot import load_sentence_transformer
+                print(f"📦 Modèle chargé depuis le bundle d'index : {bundle.model_dir}")
+                return load_sentence_transformer(bundle.model_dir, device=device)
+            from src.model_cache import model_cache
+            # Un seul worker télécharge et enregistre le modèle, les autres le relisent du cache
+            with model_cache.build_lock(f"model:{model_id}"):
+                model = model_cache.load_model(model_id)
+                if model is None:
+                    from sentence_transformers import SentenceTransformer
+                    print(f"📥 Téléchargement du modèle {model_id} depuis HuggingFace...")
+                    model = SentenceTransformer(model_id, device=device)
+                    model_cache.save_model(model, model_id)
+            return model
+        return self.get(model_id, "sentence-embedding", loader, device)
+
+    def is_loaded(self, model_id: str, task: str, device: str = "cpu") -> bool:
+        """
+        Indique si le modèle est actuellement en mémoire.
+        """
+        entry = self._entries.get((model_id, task, device))
+        return entry is not None and entry.obj is not None
+
+    def unload(self, model_id: str, task: str, device: str = "cpu") -> bool:
+        """
+        Décharge un modèle (il sera rechargé à la prochaine demande).
+        Returns:
+            bool: True si un modèle a été déchargé.
+        """
+        entry = self._entries.get((model_id, task, device))
+        if entry is None or entry.obj is None:
+            return False
+        with entry.lock:
+            entry.obj = None
+        gc.collect()
+        print(f"♻️  Modèle {model_id} ({task}, {device}) déchargé")
+        return True
+
+    def unload_idle(self, max_idle_seconds: float) -> List[ModelKey]:
+        """
+        Décharge les modèles non utilisés depuis plus de `max_idle_seconds`.
+        Returns:
+            List[ModelKey]: Clés des modèles déchargés.
+        """
+        now = time.time()
+        idle = [key for key, entry in list(self._entries.items())
+                if entry.obj is not None and now - entry.last_used > max_idle_seconds]
+        return [key for key in idle if self.unload(*key)]
+
+    def enforce_budget(self, max_bytes: int, keep: Optional[List[ModelKey]] = None) -> List[ModelKey]:
+        """
+        Décharge les modèles les moins récemment utilisés jusqu'à respecter `max_bytes`.
+        Args:
+            max_bytes (int): Budget mémoire des poids.
+            keep (List[ModelKey]): Modèles à ne pas décharger (ex. celui qui vient d'être chargé).
+        Returns:
+            List[ModelKey]: Clés des modèles déchargés.
+        """
+        keep = set(keep or [])
+        loaded = sorted(((key, entry) for key, entry in list(self._entries.items()) if entry.obj is not None),
+                        key=lambda item: item[1].last_used)
+        total = sum(entry.nbytes for _, entry in loaded)
+        unloaded = []
+        for key, entry in loaded:
+            if total <= max_bytes:
+                break
+            if key in keep:
+                continue
+            nbytes = entry.nbytes
+            if self.unload(*key):
+                total -= nbytes
+                unloaded.append(key)
+        return unloaded
+
+    def memory_report(self) -> List[Dict[str, Any]]:
+        """
+        Retourne, pour chaque modèle connu, sa mémoire, son état et ses statistiques d'usage.
+        """
+        now = time.time()
+        return [
+            {
+                "model_id": key[0],
+                "task": key[1],
+                "device": key[2],
+                "loaded": entry.obj is not None,
+                "size_mb": round(entry.nbytes / (1024 * 1024), 2),
+                "loads": entry.loads,
+                "load_seconds": round(entry.load_seconds, 3),
+                "idle_seconds": round(now - entry.last_used, 1) if entry.last_used else None,
+            }
+            for key, entry in list(self._entries.items())
+        ]
+
+
+# Instance globale
+model_registry = ModelRegistry()
@@ -0,0 +1,259 @@
+"""
+model_snapshot.py - Instantanés des modèles SentenceTransformer au format natif (safetensors)
+
+Le modèle est enregistré dans sa structure de dossier native (modules.json, config, tokenizer)
+avec des poids `model.safetensors`, au lieu d'un pickle de l'objet Python. Au chargement, les
+poids sont projetés en mémoire (mmap privé, copie à l'écriture) et affectés directement aux
+paramètres du modèle : les pages viennent du cache de fichiers du système et sont partagées entre
+les processus workers qui chargent le même instantané. Le chargement se fait entièrement hors
+ligne (aucun appel au Hub HuggingFace).
+
+`benchmark_model_loading` compare pickle et mmap : temps de chargement et mémoire par worker
+(RSS, part privée, part partagée, PSS) avec plusieurs workers chargés simultanément.
+"""
+
+import contextlib
+import json
+import multiprocessing
+import os
+import pickle
+import shutil
+import struct
+import tempfile
+import time
+from typing import Any, Dict, Iterator, List, Optional
+
+SAFETENSORS_FILE = "model.safetensors"
+LEGACY_WEIGHTS_FILE = "pytorch_model.bin"
+
+# Types safetensors -> noms des dtypes torch
+_DTYPES = {
+    "F64": "float64", "F32": "float32", "F16": "float16", "BF16": "bfloat16",
+    "I64": "int64", "I32": "int32", "I16": "int16", "I8": "int8", "U8": "uint8", "BOOL": "bool",
+}
+
+
+@contextlib.contextmanager
+def offline_mode() -> Iterator[None]:
+    """
+    Force transformers / huggingface_hub en mode hors ligne le temps d'un chargement.
+    """
+    names = ("HF_HUB_OFFLINE", "TRANSFORMERS_OFFLINE")
+    previous = {name: os.environ.get(name) for name in names}
+    for name in names:
+        os.environ[name] = "1"
+    try:
+        yield
+    finally:
+        for name, value in previous.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+
+
+def is_snapshot(model_dir: str) -> bool:
+    """
+    Indique si `model_dir` contient un instantané SentenceTransformer au format natif.
+    """
+    return os.path.isfile(os.path.join(model_dir, "modules.json"))
+
+
+def _convert_to_safetensors(model_dir: str) -> None:
+    """
+    Convertit les poids `pytorch_model.bin` (anciennes versions de transformers) en safetensors.
+    """
+    import torch
+    from safetensors.torch import save_file
+    for root, _, files in os.walk(model_dir):
+        if LEGACY_WEIGHTS_FILE in files and SAFETENSORS_FILE not in files:
+            bin_path = os.path.join(root, LEGACY_WEIGHTS_FILE)
+            state_dict = torch.load(bin_path, map_location="cpu")
+            save_file({k: v.contiguous() for k, v in state_dict.items()}, os.path.join(root, SAFETENSORS_FILE),
+                      metadata={"format": "pt"})
+            os.remove(bin_path)
+
+
+def save_sentence_transformer(model: Any, model_dir: str) -> None:
+    """
+    Enregistre un SentenceTransformer dans sa structure native avec des poids safetensors.
+    L'écriture se fait dans un dossier temporaire renommé à la fin (pas d'instantané partiel).
+    Args:
+        model (SentenceTransformer): Modèle à enregistrer.
+        model_dir (str): Dossier de destination.
+    """
+    parent = os.path.dirname(os.path.abspath(model_dir))
+    os.makedirs(parent, exist_ok=True)
+    tmp_dir = tempfile.mkdtemp(prefix=".tmp-", dir=parent)
+    try:
+        model.save(tmp_dir)
+        _convert_to_safetensors(tmp_dir)
+        if os.path.isdir(model_dir):
+            shutil.rmtree(model_dir)
+        os.replace(tmp_dir, model_dir)
+    finally:
+        if os.path.isdir(tmp_dir):
+            shutil.rmtree(tmp_dir)
+
+
+def charger_safetensors_mmap(path: str) -> Dict[str, Any]:
+    """
+    Projette un fichier safetensors en mémoire et retourne des tenseurs qui en sont des vues.
+    Le mapping est privé (copie à l'écriture) : tant que les poids ne sont pas modifiés, les pages
+    restent celles du cache de fichiers, communes à tous les processus.
+    Args:
+        path (str): Chemin du fichier `.safetensors`.
+    Returns:
+        Dict[str, torch.Tensor]: Tenseurs par nom de paramètre.
+    """
+    import torch
+    with open(path, "rb") as f:
+        header_size = struct.unpack("<Q", f.read(8))[0]
+        header = json.loads(f.read(header_size))
+    data_start = 8 + header_size
+    storage = torch.UntypedStorage.from_file(path, shared=False, nbytes=os.path.getsize(path))
+    tensors = {}
+    for name, info in header.items():
+        if name == "__metadata__":
+            continue
+        dtype = getattr(torch, _DTYPES[info["dtype"]])
+        begin, _ = info["data_offsets"]
+        itemsize = torch.empty((), dtype=dtype).element_size()
+        offset = data_start + begin
+        if offset % itemsize:
+            raise ValueError(f"Tenseur {name} non aligné dans {path}")
+        tensor = torch.empty(0, dtype=dtype)
+        tensor.set_(storage, offset // itemsize, tuple(info["shape"]))
+        tensors[name] = tensor
+    return tensors
+
+
+def _map_weights(model: Any, model_dir: str) -> bool:
+    """
+    Remplace les poids du module Transformer (chargés en copie) par les vues mmap du fichier.
+    Returns:
+        bool: True si les poids sont désormais projetés en mémoire.
+    """
+    path = os.path.join(model_dir, SAFETENSORS_FILE)
+    first = model[0] if len(model) else None
+    auto_model = getattr(first, "auto_model", None)
+    if auto_model is None or not os.path.isfile(path):
+        return False
+    try:
+        weights = charger_safetensors_mmap(path)
+        # Vérifié avant l'affectation : un chargement partiel mélangerait vues mmap et poids copiés
+        expected = set(auto_model.state_dict())
+        missing, unexpected = sorted(expected - set(weights)), sorted(set(weights) - expected)
+        if not missing and not unexpected:
+            result = auto_model.load_state_dict(weights, strict=False, assign=True)
+            missing, unexpected = list(result.missing_keys), list(result.unexpected_keys)
+    except (TypeError, ValueError) as e:
+        # torch < 2.1 (pas de `assign`) ou fichier non aligné : on garde les poids copiés
+        print(f"⚠️  Poids non projetés en mémoire ({e}), chargement classique conservé")
+        return False
+    if missing or unexpected:
+        print(f"⚠️  Poids non projetés en mémoire (clés manquantes : {missing[:5]}, "
+              f"inattendues : {unexpected[:5]}), chargement classique conservé")
+        return False
+    auto_model.eval()
+    return True
+
+
+def load_sentence_transformer(model_dir: str, device: str = "cpu") -> Any:
+    """
+    Charge un instantané natif hors ligne, poids projetés en mémoire.
+    Args:
+        model_dir (str): Dossier de l'instantané.
+        device (str): "cpu" (les poids ne sont partagés qu'en mémoire CPU).
+    Returns:
+        SentenceTransformer: Le modèle chargé.
+    """
+    from sentence_transformers import SentenceTransformer
+    with offline_mode():
+        model = SentenceTransformer(model_dir, device="cpu")
+    if device == "cpu":
+        _map_weights(model, model_dir)
+    else:
+        model.to(device)
+    return model
+
+
+def _memoire_processus() -> Dict[str, float]:
+    """
+    Mémoire du processus courant en Mo : RSS, part anonyme (privée), part fichiers (partageable)
+    et PSS (pages partagées divisées par le nombre de processus qui les utilisent). Linux.
+    """
+    fields = {"VmRSS": "rss_mb", "RssAnon": "rss_private_mb", "RssFile": "rss_file_mb"}
+    memory: Dict[str, float] = {}
+    try:
+        with open("/proc/self/status", "r") as f:
+            for line in f:
+                key = line.split(":", 1)[0]
+                if key in fields:
+                    memory[fields[key]] = round(int(line.split()[1]) / 1024, 1)
+        with open("/proc/self/smaps_rollup", "r") as f:
+            for line in f:
+                if line.startswith("Pss:"):
+                    memory["pss_mb"] = round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    return memory
+
+
+def _bench_worker(fmt: str, path: str, barrier: Any, results: Any) -> None:
+    """
+    Charge le modèle (pickle ou mmap) puis mesure la mémoire une fois tous les workers chargés.
+    """
+    try:
+        import torch
+        torch.set_num_threads(1)
+        start_time = time.perf_counter()
+        if fmt == "pickle":
+            with open(path, "rb") as f:
+                model = pickle.load(f)
+        else:
+            model = load_sentence_transformer(path)
+        load_seconds = time.perf_counter() - start_time
+        model.encode("Qu'est-ce que l'ODD 4 ?", convert_to_numpy=True)
+        barrier.wait()
+        row = {"format": fmt, "pid": os.getpid(), "load_seconds": round(load_seconds, 3), **_memoire_processus()}
+        barrier.wait()
+        results.put(row)
+    except Exception as e:
+        barrier.abort()
+        results.put({"format": fmt, "pid": os.getpid(), "error": str(e)})
+
+
+def benchmark_model_loading(model_dir: str, workers: int = 2, model_id: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    Compare le chargement pickle et mmap (safetensors) : `workers` processus chargent le même
+    modèle en même temps ; chacun rapporte son temps de chargement et sa mémoire.
+    Args:
+        model_dir (str): Instantané natif (créé depuis `model_id` s'il n'existe pas).
+        workers (int): Nombre de processus chargés simultanément par format.
+        model_id (str): Modèle HuggingFace à télécharger si l'instantané est absent.
+    Returns:
+        List[Dict[str, Any]]: Une ligne par worker et par format.
+    """
+    if not is_snapshot(model_dir):
+        if model_id is None:
+            raise FileNotFoundError(f"Instantané introuvable : {model_dir}")
+        from sentence_transformers import SentenceTransformer
+        save_sentence_transformer(SentenceTransformer(model_id, device="cpu"), model_dir)
+    context = multiprocessing.get_context("spawn")
+    rows: List[Dict[str, Any]] = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        pickle_path = os.path.join(tmp_dir, "model.pkl")
+        with open(pickle_path, "wb") as f:
+            pickle.dump(load_sentence_transformer(model_dir), f)
+        for fmt, path in (("pickle", pickle_path), ("mmap", model_dir)):
+            barrier = context.Barrier(workers)
+            results = context.Queue()
+            processes = [context.Process(target=_bench_worker, args=(fmt, path, barrier, results))
+                         for _ in range(workers)]
+            for process in processes:
+                process.start()
+            rows.extend(results.get() for _ in processes)
+            for process in processes:
+                process.join()
+    return rows
@@ -0,0 +1,318 @@
+"""
+onnx_backend.py - Inférence CPU quantifiée (ONNX Runtime, int8) pour MiniLM et flan-t5
+
+Backend alternatif à PyTorch, sélectionné par `ODD_INFERENCE_BACKEND=onnx` :
+- les modèles sont exportés en ONNX avec `optimum`, puis quantifiés dynamiquement en int8
+  (poids int8, activations quantifiées à la volée) ; le résultat est conservé dans cache/onnx/ ;
+- l'encodeur de phrases (`OnnxSentenceEncoder`) reproduit `SentenceTransformer.encode`
+  (mean pooling + normalisation) sur une session ONNX Runtime ;
+- le générateur est un pipeline transformers autour d'un `ORTModelForSeq2SeqLM` : même interface
+  que le pipeline PyTorch (lots, tokenizer, `generate` avec streamer).
+`parity_check` compare les résultats de recherche et les générations des deux backends ;
+`benchmark_backends` mesure latence, débit et mémoire résidente de chacun dans un processus séparé.
+"""
+
+import json
+import multiprocessing
+import os
+import time
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+ONNX_CACHE_DIR = os.path.join(PROJECT_ROOT, "cache", "onnx")
+BACKENDS = ("torch", "onnx")
+
+try:
+    import onnxruntime
+except ImportError:
+    onnxruntime = None
+
+
+def is_available() -> bool:
+    """
+    Indique si ONNX Runtime et optimum sont installés.
+    """
+    if onnxruntime is None:
+        return False
+    try:
+        import optimum.onnxruntime  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _model_dir(model_id: str) -> str:
+    """
+    Dossier du modèle quantifié dans le cache.
+    """
+    return os.path.join(ONNX_CACHE_DIR, model_id.replace("/", "__") + "-int8")
+
+
+def _dir_bytes(directory: str) -> int:
+    """
+    Taille des fichiers ONNX d'un dossier (mémoire approximative des poids).
+    """
+    return sum(os.path.getsize(os.path.join(directory, f)) for f in os.listdir(directory) if f.endswith(".onnx"))
+
+
+def _quantization_config() -> Any:
+    """
+    Configuration de quantification dynamique int8 adaptée au processeur.
+    """
+    import platform
+    from optimum.onnxruntime.configuration import AutoQuantizationConfig
+    if platform.machine().lower() in ("arm64", "aarch64"):
+        return AutoQuantizationConfig.arm64(is_static=False, per_channel=False)
+    return AutoQuantizationConfig.avx2(is_static=False, per_channel=False)
+
+
+def export_quantized(model_id: str, seq2seq: bool = False) -> str:
+    """
+    Exporte un modèle en ONNX puis le quantifie en int8 (une seule fois, résultat mis en cache).
+    Args:
+        model_id (str): Identifiant HuggingFace du modèle.
+        seq2seq (bool): True pour un modèle encodeur-décodeur (flan-t5).
+    Returns:
+        str: Dossier du modèle quantifié.
+    """
+    target = _model_dir(model_id)
+    if os.path.exists(os.path.join(target, "quantized.json")):
+        return target
+    from optimum.onnxruntime import ORTModelForFeatureExtraction, ORTModelForSeq2SeqLM, ORTQuantizer
+    from transformers import AutoTokenizer
+    hub_id = model_id if "/" in model_id else f"sentence-transformers/{model_id}"
+    export_dir = target + "-fp32"
+    print(f"📦 Export ONNX de {model_id}...")
+    model_cls = ORTModelForSeq2SeqLM if seq2seq else ORTModelForFeatureExtraction
+    model_cls.from_pretrained(hub_id, export=True).save_pretrained(export_dir)
+    AutoTokenizer.from_pretrained(hub_id).save_pretrained(target)
+    print(f"🗜️  Quantification int8 de {model_id}...")
+    onnx_files = [f for f in os.listdir(export_dir) if f.endswith(".onnx")]
+    for file_name in onnx_files:
+        quantizer = ORTQuantizer.from_pretrained(export_dir, file_name=file_name)
+        quantizer.quantize(save_dir=target, quantization_config=_quantization_config())
+    # Fichiers de configuration (config.json, generation_config.json...) nécessaires au rechargement
+    for file_name in os.listdir(export_dir):
+        if file_name.endswith(".json") and not os.path.exists(os.path.join(target, file_name)):
+            with open(os.path.join(export_dir, file_name), "rb") as src, open(os.path.join(target, file_name), "wb") as dst:
+                dst.write(src.read())
+    with open(os.path.join(target, "quantized.json"), "w", encoding="utf-8") as f:
+        json.dump({"model_id": model_id, "files": sorted(f for f in os.listdir(target) if f.endswith(".onnx"))}, f)
+    return target
+
+
+class OnnxSentenceEncoder:
+    """
+    Encodeur de phrases sur ONNX Runtime, compatible avec les appels `SentenceTransformer.encode` du projet.
+    """
+    def __init__(self, model_dir: str, max_length: int = 256, num_threads: Optional[int] = None) -> None:
+        """
+        Args:
+            model_dir (str): Dossier du modèle quantifié (voir `export_quantized`).
+            max_length (int): Longueur maximale des séquences (comme MiniLM dans sentence-transformers).
+            num_threads (int): Threads intra-opération d'ONNX Runtime (None = défaut).
+        """
+        from transformers import AutoTokenizer
+        self.tokenizer = AutoTokenizer.from_pretrained(model_dir)
+        options = onnxruntime.SessionOptions()
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+        model_file = next(f for f in sorted(os.listdir(model_dir)) if f.endswith(".onnx"))
+        self.session = onnxruntime.InferenceSession(os.path.join(model_dir, model_file), options,
+                                                    providers=["CPUExecutionProvider"])
+        self.input_names = {i.name for i in self.session.get_inputs()}
+        self.max_length = max_length
+        self.model_bytes = _dir_bytes(model_dir)
+
+    def encode(self, sentences: Any, batch_size: int = 32, convert_to_numpy: bool = True,
+               normalize_embeddings: bool = False, **kwargs: Any) -> np.ndarray:
+        """
+        Encode une phrase ou une liste de phrases (mean pooling sur le masque d'attention, puis
+        normalisation L2 comme le modèle all-MiniLM-L6-v2).
+        Returns:
+            np.ndarray: Un vecteur (phrase seule) ou une matrice (liste de phrases).
+        """
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        outputs = []
+        for start in range(0, len(texts), max(1, batch_size)):
+            batch = self.tokenizer(texts[start:start + batch_size], padding=True, truncation=True,
+                                   max_length=self.max_length, return_tensors="np")
+            feeds = {name: value.astype(np.int64) for name, value in batch.items() if name in self.input_names}
+            hidden = self.session.run(None, feeds)[0]
+            mask = batch["attention_mask"][..., None].astype(np.float32)
+            pooled = (hidden * mask).sum(axis=1) / np.maximum(mask.sum(axis=1), 1e-9)
+            outputs.append(pooled / np.maximum(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12))
+        embeddings = np.concatenate(outputs).astype(np.float32) if outputs else np.zeros((0, 0), dtype=np.float32)
+        return embeddings[0] if single else embeddings
+
+
+def load_sentence_encoder(model_id: str) -> OnnxSentenceEncoder:
+    """
+    Charge (en exportant si besoin) l'encodeur de phrases quantifié.
+    """
+    return OnnxSentenceEncoder(export_quantized(model_id))
+
+
+def load_seq2seq_pipeline(model_id: str, task: str) -> Any:
+    """
+    Charge (en exportant si besoin) un pipeline transformers sur le modèle seq2seq quantifié.
+    """
+    from optimum.onnxruntime import ORTModelForSeq2SeqLM
+    from transformers import AutoTokenizer, pipeline
+    model_dir = export_quantized(model_id, seq2seq=True)
+    with open(os.path.join(model_dir, "quantized.json"), "r", encoding="utf-8") as f:
+        files = set(json.load(f)["files"])
+
+    def quantized(stem: str) -> Optional[str]:
+        # ORTQuantizer enregistre chaque fichier sous le nom <stem>_quantized.onnx
+        name = f"{stem}_quantized.onnx"
+        return name if name in files else None
+
+    kwargs = {"encoder_file_name": quantized("encoder_model"),
+              "decoder_file_name": quantized("decoder_model") or quantized("decoder_model_merged")}
+    with_past = quantized("decoder_with_past_model")
+    if with_past:
+        kwargs["decoder_with_past_file_name"] = with_past
+    model = ORTModelForSeq2SeqLM.from_pretrained(model_dir, use_cache=with_past is not None, **kwargs)
+    pipe = pipeline(task, model=model, tokenizer=AutoTokenizer.from_pretrained(model_dir))
+    pipe.model_bytes = _dir_bytes(model_dir)
+    return pipe
+
+
+# --- Parité et benchmark ---
+
+def _evaluation_set() -> Dict[str, List[str]]:
+    """
+    Documents (textes indexés) et questions d'exemple tirés des données du chatbot.
+    """
+    from src.chat_bot import DATA_FILE, ChatbotEngine
+    with open(os.path.join(PROJECT_ROOT, "data", DATA_FILE), "r", encoding="utf-8") as f:
+        data = json.load(f)
+    documents = [ChatbotEngine._odd_text(odd) for odd in data.get("odds", [])]
+    documents += [ChatbotEngine._faq_text(item) for item in data.get("faq", [])]
+    questions: List[str] = []
+    for odd in data.get("odds", []):
+        examples = odd.get("example_questions", [])
+        questions += examples.get("fr", []) if isinstance(examples, dict) else examples
+    questions += [item.get("question", "") for item in data.get("faq", []) if isinstance(item.get("question"), str)]
+    return {"documents": documents, "questions": [q for q in questions if q]}
+
+
+def _load_backend(backend: str) -> Dict[str, Any]:
+    """
+    Charge l'encodeur et le générateur d'un backend (hors registre partagé).
+    """
+    from src.chat_bot import EMBEDDING_MODEL_ID, LLM_MODEL_ID, LLM_TASK
+    if backend == "onnx":
+        return {"encoder": load_sentence_encoder(EMBEDDING_MODEL_ID),
+                "generator": load_seq2seq_pipeline(LLM_MODEL_ID, LLM_TASK)}
+    from sentence_transformers import SentenceTransformer
+    from transformers import pipeline
+    return {"encoder": SentenceTransformer(EMBEDDING_MODEL_ID, device="cpu"),
+            "generator": pipeline(LLM_TASK, model=LLM_MODEL_ID, device=-1)}
+
+
+def parity_check(top_k: int = 3, generations: int = 3) -> Dict[str, Any]:
+    """
+    Compare les backends PyTorch et ONNX int8 : classement des documents pour les questions
+    d'exemple (accord du premier résultat, recouvrement du top-k, cosinus entre embeddings) et
+    générations gloutonnes sur quelques prompts.
+    Returns:
+        Dict[str, Any]: Mesures de parité et exemples de générations.
+    """
+    evaluation = _evaluation_set()
+    documents, questions = evaluation["documents"], evaluation["questions"]
+    models = {backend: _load_backend(backend) for backend in BACKENDS}
+    rankings, query_vectors = {}, {}
+    for backend, loaded in models.items():
+        doc_vectors = np.asarray(loaded["encoder"].encode(documents, convert_to_numpy=True, normalize_embeddings=True))
+        query_vectors[backend] = np.asarray(loaded["encoder"].encode(questions, convert_to_numpy=True, normalize_embeddings=True))
+        rankings[backend] = np.argsort(-(query_vectors[backend] @ doc_vectors.T), axis=1)[:, :top_k]
+    top1 = float(np.mean(rankings["torch"][:, 0] == rankings["onnx"][:, 0]))
+    overlap = float(np.mean([len(set(a) & set(b)) / top_k for a, b in zip(rankings["torch"], rankings["onnx"])]))
+    cosine = float(np.mean(np.sum(query_vectors["torch"] * query_vectors["onnx"], axis=1)))
+    samples = []
+    for question in questions[:generations]:
+        prompt = f"Question utilisateur : {question}\n\nFais une réponse claire et synthétique pour un humain en français."
+        outputs = {backend: loaded["generator"](prompt, max_new_tokens=64, do_sample=False)[0]["generated_text"]
+                   for backend, loaded in models.items()}
+        samples.append({"question": question, **outputs})
+    return {"questions": len(questions), "documents": len(documents), "top1_agreement": round(top1, 3),
+            f"top{top_k}_overlap": round(overlap, 3), "mean_query_cosine": round(cosine, 4), "generations": samples}
+
+
+def _rss_mb() -> float:
+    """
+    Mémoire résidente courante du processus (Linux : /proc, sinon pic via resource).
+    """
+    try:
+        with open("/proc/self/status", "r") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _bench_worker(backend: str, queries: int, generations: int, batch_size: int, results: Any) -> None:
+    """
+    Mesure un backend dans un processus dédié (mémoire résidente non partagée avec l'autre backend).
+    """
+    try:
+        rss_start = _rss_mb()
+        start_time = time.time()
+        loaded = _load_backend(backend)
+        load_seconds = time.time() - start_time
+        rss_loaded = _rss_mb()
+        questions = (_evaluation_set()["questions"] * queries)[:queries] or ["Qu'est-ce que l'ODD 1 ?"] * queries
+        encoder, generator = loaded["encoder"], loaded["generator"]
+        encoder.encode(questions[0], convert_to_numpy=True)
+        latencies = []
+        for question in questions:
+            t0 = time.perf_counter()
+            encoder.encode(question, convert_to_numpy=True)
+            latencies.append((time.perf_counter() - t0) * 1000)
+        t0 = time.perf_counter()
+        encoder.encode(questions, batch_size=batch_size, convert_to_numpy=True)
+        throughput = len(questions) / (time.perf_counter() - t0)
+        gen_latencies = []
+        for question in questions[:generations]:
+            t0 = time.perf_counter()
+            generator(f"Question : {question}\nRéponse :", max_new_tokens=64, do_sample=False)
+            gen_latencies.append((time.perf_counter() - t0) * 1000)
+        results.put({
+            "backend": backend,
+            "load_seconds": round(load_seconds, 2),
+            "encode_p50_ms": round(float(np.percentile(latencies, 50)), 2),
+            "encode_p95_ms": round(float(np.percentile(latencies, 95)), 2),
+            "encode_per_second": round(throughput, 1),
+            "generate_mean_ms": round(float(np.mean(gen_latencies)), 1) if gen_latencies else None,
+            "rss_models_mb": round(rss_loaded - rss_start, 1),
+            "rss_peak_mb": round(_rss_mb(), 1),
+        })
+    except Exception as e:
+        results.put({"backend": backend, "error": str(e)})
+
+
+def benchmark_backends(queries: int = 200, generations: int = 5, batch_size: int = 32,
+                       backends: Sequence[str] = BACKENDS) -> List[Dict[str, Any]]:
+    """
+    Compare latence d'encodage, débit, temps de génération et mémoire des backends, chacun dans
+    un processus séparé.
+    Returns:
+        List[Dict[str, Any]]: Une ligne de mesures par backend.
+    """
+    context = multiprocessing.get_context("spawn")
+    rows = []
+    for backend in backends:
+        results = context.Queue()
+        process = context.Process(target=_bench_worker, args=(backend, queries, generations, batch_size, results))
+        process.start()
+        rows.append(results.get())
+        process.join()
+    return rows
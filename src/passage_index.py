@@ -0,0 +1,345 @@
+"""
+passage_index.py - Index de passages (cibles, indicateurs, actions, FAQ) et recherche approchée
+
+Le corpus est découpé en passages courts : un par ODD (titre et description), par cible, par
+indicateur, par action et par réponse de FAQ. Les embeddings des passages sont indexés par une
+structure de plus proches voisins approchés :
+- `IVFIndex` (NumPy) : partition en listes inversées par k-means ; les vecteurs de chaque liste sont
+  contigus et quantifiés sur 8 bits (une échelle par dimension), une requête ne note que les
+  `nprobe` listes les plus proches. L'index se sauvegarde dans un dossier de `.npy` rechargés en
+  mémoire partagée (`mmap_mode='r'`), comme les passages eux-mêmes (`MappedRecords`).
+- `HNSWIndex` (hnswlib, optionnel) : graphe HNSW, sélectionné par `ODD_ANN_BACKEND=hnsw`.
+Le contexte transmis au LLM se limite ainsi aux quelques passages pertinents.
+"""
+
+import json
+import os
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from src.embedding_store import MappedRecords
+from src.hybrid_retrieval import normaliser_lignes
+
+try:
+    import hnswlib
+except ImportError:
+    hnswlib = None
+
+ANN_BACKEND = os.environ.get("ODD_ANN_BACKEND", "ivf")
+IVF_NPROBE = int(os.environ.get("ODD_IVF_NPROBE", "8"))
+# En dessous de cette taille, une seule liste : la recherche est exacte
+IVF_MIN_LIST_SIZE = 64
+
+
+def construire_passages(odds: List[Dict[str, Any]], faq: Optional[List[Dict[str, Any]]] = None,
+                        lang: str = "Français") -> List[Dict[str, Any]]:
+    """
+    Découpe les ODD et la FAQ en passages dans une langue.
+    Args:
+        odds (List[Dict[str, Any]]): Données ODD (format monolingue ou bilingue).
+        faq (List[Dict[str, Any]]): Entrées FAQ.
+        lang (str): "English" ou "Français".
+    Returns:
+        List[Dict[str, Any]]: Passages {"kind", "doc", "odd", "code", "text"} ; `doc` est l'indice du
+        document d'origine dans le corpus (ODD puis FAQ).
+    """
+    from src.chat_bot import localiser
+    label = "SDG" if lang == "English" else "ODD"
+    passages: List[Dict[str, Any]] = []
+    for doc, odd in enumerate(odds or []):
+        number = odd.get("odd", "")
+        title = localiser(odd.get("title", ""), lang)
+        passages.append({"kind": "goal", "doc": doc, "odd": number, "code": None,
+                         "text": f"{label} {number}: {title}. {localiser(odd.get('description', ''), lang)}"})
+        for cible in odd.get("cibles", []) or []:
+            passages.append({"kind": "target", "doc": doc, "odd": number, "code": cible.get("code"),
+                             "text": f"{label} {number} ({title}) - {cible.get('code', '')}: "
+                                     f"{localiser(cible.get('description', ''), lang)}"})
+        for indicator in odd.get("indicateurs", odd.get("indicators", [])) or []:
+            if isinstance(indicator, dict):
+                code, text = indicator.get("code"), localiser(indicator.get("description", ""), lang)
+            else:
+                code, text = None, localiser(indicator, lang)
+            passages.append({"kind": "indicator", "doc": doc, "odd": number, "code": code,
+                             "text": f"{label} {number} ({title}) - {code or ''}: {text}"})
+        actions = localiser(odd.get("actions", []), lang) or []
+        for action in actions if isinstance(actions, list) else [actions]:
+            passages.append({"kind": "action", "doc": doc, "odd": number, "code": None,
+                             "text": f"{label} {number} ({title}) - Actions: {action}"})
+    for j, faq_item in enumerate(faq or []):
+        passages.append({"kind": "faq", "doc": len(odds or []) + j, "odd": None, "code": None,
+                         "text": f"{localiser(faq_item.get('question', ''), lang)} "
+                                 f"{localiser(faq_item.get('answer', ''), lang)}"})
+    return passages
+
+
+def _kmeans(vectors: np.ndarray, n_lists: int, iterations: int = 10, sample: int = 20000,
+            seed: int = 0) -> np.ndarray:
+    """
+    K-means sphérique (similarité cosinus) sur un échantillon ; retourne les centroïdes normalisés.
+    """
+    rng = np.random.default_rng(seed)
+    if len(vectors) > sample:
+        vectors = vectors[rng.choice(len(vectors), sample, replace=False)]
+    vectors = np.asarray(vectors, dtype=np.float32)
+    centroids = vectors[rng.choice(len(vectors), n_lists, replace=False)].copy()
+    for _ in range(iterations):
+        assign = np.argmax(vectors @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assign, vectors)
+        empty = np.bincount(assign, minlength=n_lists) == 0
+        # Les listes vides sont réamorcées sur des vecteurs tirés au hasard
+        sums[empty] = vectors[rng.choice(len(vectors), int(empty.sum()), replace=False)]
+        centroids = normaliser_lignes(sums)
+    return centroids
+
+
+class IVFIndex:
+    """
+    Index à listes inversées sur des vecteurs normalisés (similarité = produit scalaire).
+    Les codes sont rangés par liste : la liste i occupe les lignes offsets[i]:offsets[i + 1].
+    Un vecteur vaut `codes[ligne] * scale` ; l'échelle est appliquée à la requête plutôt qu'aux codes.
+    """
+    ARRAYS = ("centroids", "codes", "scale", "ids", "offsets")
+
+    def __init__(self, centroids: np.ndarray, codes: np.ndarray, scale: np.ndarray, ids: np.ndarray,
+                 offsets: np.ndarray, nprobe: int = IVF_NPROBE) -> None:
+        """
+        Args:
+            centroids (np.ndarray): Centroïdes normalisés (listes x dimensions).
+            codes (np.ndarray): Vecteurs quantifiés (int8), triés par liste.
+            scale (np.ndarray): Échelle de quantification de chaque dimension.
+            ids (np.ndarray): Identifiant (indice du passage) de chaque ligne de `codes`.
+            offsets (np.ndarray): Début de chaque liste dans `codes` (longueur listes + 1).
+            nprobe (int): Nombre de listes visitées par requête.
+        """
+        self.centroids = centroids
+        self.codes = codes
+        self.scale = scale
+        self.ids = ids
+        self.offsets = offsets
+        self.nprobe = nprobe
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @classmethod
+    def build(cls, vectors: Any, n_lists: Optional[int] = None, nprobe: int = IVF_NPROBE) -> "IVFIndex":
+        """
+        Construit l'index (k-means, rangement des vecteurs par liste, quantification 8 bits).
+        Args:
+            vectors (Any): Embeddings (normalisés ici).
+            n_lists (int): Nombre de listes (par défaut environ 4 * racine du nombre de vecteurs).
+        """
+        vectors = normaliser_lignes(vectors)
+        n = len(vectors)
+        if n_lists is None:
+            n_lists = int(4 * np.sqrt(n)) if n >= IVF_MIN_LIST_SIZE * 4 else 1
+        n_lists = max(1, min(n_lists, n))
+        if n_lists == 1:
+            centroids = normaliser_lignes(vectors.mean(axis=0))
+            assign = np.zeros(n, dtype=np.int64)
+        else:
+            centroids = _kmeans(vectors, n_lists)
+            assign = np.empty(n, dtype=np.int64)
+            for start in range(0, n, 65536):
+                assign[start:start + 65536] = np.argmax(vectors[start:start + 65536] @ centroids.T, axis=1)
+        order = np.argsort(assign, kind="stable")
+        offsets = np.zeros(n_lists + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum(np.bincount(assign, minlength=n_lists))
+        scale = np.maximum(np.abs(vectors).max(axis=0), 1e-12).astype(np.float32) / 127
+        codes = np.rint(vectors[order] / scale).astype(np.int8)
+        return cls(centroids.astype(np.float32), codes, scale, order.astype(np.int64), offsets, nprobe)
+
+    def search(self, query: Any, top_k: int = 5, nprobe: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Plus proches voisins approchés d'une requête.
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: (identifiants, scores) par score décroissant.
+        """
+        query = normaliser_lignes(query)[0]
+        nprobe = min(nprobe or self.nprobe, len(self.centroids))
+        centroid_scores = self.centroids @ query
+        lists = np.argpartition(-centroid_scores, nprobe - 1)[:nprobe] if nprobe < len(centroid_scores) else range(len(centroid_scores))
+        spans = [(self.offsets[i], self.offsets[i + 1]) for i in lists if self.offsets[i + 1] > self.offsets[i]]
+        if not spans:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        # Listes contiguës : des tranches, sans indexation ligne à ligne ; produit scalaire en float32 (BLAS)
+        codes = np.concatenate([self.codes[a:b] for a, b in spans])
+        ids = np.concatenate([self.ids[a:b] for a, b in spans])
+        scores = codes.astype(np.float32) @ (query * self.scale)
+        k = min(top_k, scores.size)
+        best = np.argpartition(-scores, k - 1)[:k] if k < scores.size else np.arange(scores.size)
+        best = best[np.argsort(-scores[best], kind="stable")]
+        return ids[best], scores[best]
+
+    def save(self, directory: str) -> None:
+        """
+        Sauvegarde l'index dans un dossier (un `.npy` par tableau).
+        """
+        os.makedirs(directory, exist_ok=True)
+        for name in self.ARRAYS:
+            np.save(os.path.join(directory, f"{name}.npy"), getattr(self, name))
+        with open(os.path.join(directory, "index.json"), "w", encoding="utf-8") as f:
+            json.dump({"backend": "ivf", "nprobe": self.nprobe, "size": len(self)}, f)
+
+    @classmethod
+    def load(cls, directory: str, mmap: bool = True) -> "IVFIndex":
+        """
+        Recharge un index sauvegardé ; les codes et identifiants sont projetés en mémoire (`mmap_mode='r'`).
+        """
+        mode = "r" if mmap else None
+        arrays = {name: np.load(os.path.join(directory, f"{name}.npy"), mmap_mode=mode if name in ("codes", "ids") else None)
+                  for name in cls.ARRAYS}
+        with open(os.path.join(directory, "index.json"), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        return cls(*(arrays[name] for name in cls.ARRAYS), nprobe=meta.get("nprobe", IVF_NPROBE))
+
+
+class HNSWIndex:
+    """
+    Index HNSW (hnswlib, optionnel) avec la même interface que `IVFIndex`.
+    """
+    def __init__(self, index: Any, size: int) -> None:
+        self.index = index
+        self.size = size
+
+    def __len__(self) -> int:
+        return self.size
+
+    @classmethod
+    def build(cls, vectors: Any, m: int = 16, ef_construction: int = 200, ef: int = 64) -> "HNSWIndex":
+        if hnswlib is None:
+            raise ImportError("hnswlib n'est pas installé.")
+        vectors = normaliser_lignes(vectors)
+        index = hnswlib.Index(space="ip", dim=vectors.shape[1])
+        index.init_index(max_elements=len(vectors), M=m, ef_construction=ef_construction)
+        index.add_items(vectors, np.arange(len(vectors)))
+        index.set_ef(ef)
+        return cls(index, len(vectors))
+
+    def search(self, query: Any, top_k: int = 5, nprobe: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+        labels, distances = self.index.knn_query(normaliser_lignes(query), k=min(top_k, self.size))
+        return labels[0].astype(np.int64), (1 - distances[0]).astype(np.float32)
+
+    def save(self, directory: str) -> None:
+        os.makedirs(directory, exist_ok=True)
+        self.index.save_index(os.path.join(directory, "hnsw.bin"))
+        with open(os.path.join(directory, "index.json"), "w", encoding="utf-8") as f:
+            json.dump({"backend": "hnsw", "size": self.size, "dim": self.index.dim}, f)
+
+    @classmethod
+    def load(cls, directory: str, mmap: bool = True) -> "HNSWIndex":
+        if hnswlib is None:
+            raise ImportError("hnswlib n'est pas installé.")
+        with open(os.path.join(directory, "index.json"), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        index = hnswlib.Index(space="ip", dim=meta["dim"])
+        index.load_index(os.path.join(directory, "hnsw.bin"), max_elements=meta["size"])
+        return cls(index, meta["size"])
+
+
+def build_ann(vectors: Any, backend: str = ANN_BACKEND) -> Any:
+    """
+    Construit un index ANN avec le backend demandé (HNSW si hnswlib est installé, sinon IVF).
+    """
+    if backend == "hnsw" and hnswlib is not None:
+        return HNSWIndex.build(vectors)
+    return IVFIndex.build(vectors)
+
+
+def load_ann(directory: str) -> Any:
+    """
+    Recharge un index ANN sauvegardé, quel que soit son backend.
+    """
+    with open(os.path.join(directory, "index.json"), "r", encoding="utf-8") as f:
+        backend = json.load(f).get("backend", "ivf")
+    return HNSWIndex.load(directory) if backend == "hnsw" else IVFIndex.load(directory)
+
+
+class PassageIndex:
+    """
+    Passages d'une langue et leur index ANN.
+    """
+    def __init__(self, passages: Sequence[Dict[str, Any]], ann: Any) -> None:
+        """
+        Args:
+            passages (Sequence[Dict[str, Any]]): Passages (voir `construire_passages`), en liste
+                ou projetés en mémoire (`MappedRecords`).
+            ann (Any): Index ANN sur les embeddings des passages (même ordre).
+        """
+        self.passages = passages
+        self.ann = ann
+
+    def search(self, query_embedding: Any, top_k: int = 5, odd: Optional[Any] = None) -> List[Dict[str, Any]]:
+        """
+        Passages les plus proches de la question.
+        Args:
+            query_embedding (Any): Embedding de la question.
+            top_k (int): Nombre de passages.
+            odd (Any): Restreint les résultats aux passages d'un ODD.
+        Returns:
+            List[Dict[str, Any]]: Passages avec leur "score", par score décroissant.
+        """
+        # Marge de candidats quand un filtre par ODD est appliqué après la recherche
+        k = top_k if odd is None else min(len(self.passages), top_k * 8)
+        ids, scores = self.ann.search(query_embedding, top_k=k)
+        results = []
+        for i, score in zip(ids, scores):
+            passage = self.passages[int(i)]
+            if odd is None or passage["odd"] == odd:
+                results.append(dict(passage, score=float(score)))
+            if len(results) == top_k:
+                break
+        return results
+
+    def save(self, directory: str) -> None:
+        """
+        Sauvegarde les passages (enregistrements JSON + offsets) et l'index ANN dans un dossier.
+        """
+        self.ann.save(directory)
+        MappedRecords.write(os.path.join(directory, "passages"), self.passages)
+
+    @classmethod
+    def load(cls, directory: str) -> "PassageIndex":
+        """
+        Recharge un index de passages sauvegardé par `save` ; les passages restent sur disque,
+        projetés en mémoire et décodés à la lecture.
+        """
+        return cls(MappedRecords.open(os.path.join(directory, "passages")), load_ann(directory))
+
+
+def benchmark_ann(n: int = 100000, dim: int = 384, queries: int = 1000, top_k: int = 10,
+                  backend: str = ANN_BACKEND, seed: int = 0) -> Dict[str, float]:
+    """
+    Benchmark synthétique : passages regroupés autour de thèmes aléatoires, latence top-k
+    et rappel par rapport à la recherche exacte.
+    Returns:
+        Dict[str, float]: Temps de construction, latences (ms) et rappel@k.
+    """
+    rng = np.random.default_rng(seed)
+    topics = normaliser_lignes(rng.standard_normal((max(1, n // 100), dim)))
+    vectors = normaliser_lignes(topics[rng.integers(0, len(topics), n)] + 0.35 * rng.standard_normal((n, dim)) / np.sqrt(dim) * 4)
+    probes = normaliser_lignes(vectors[rng.integers(0, n, queries)] + 0.1 * rng.standard_normal((queries, dim)) / np.sqrt(dim) * 4)
+    start_time = time.time()
+    index = build_ann(vectors, backend=backend)
+    build_seconds = time.time() - start_time
+    latencies, hits = [], 0
+    for query in probes:
+        t0 = time.perf_counter()
+        ids, _ = index.search(query, top_k=top_k)
+        latencies.append((time.perf_counter() - t0) * 1000)
+        exact = np.argpartition(-(vectors @ query), top_k - 1)[:top_k]
+        hits += len(set(ids.tolist()) & set(exact.tolist()))
+    latencies = np.asarray(latencies)
+    return {
+        "backend": type(index).__name__,
+        "passages": n,
+        "build_seconds": round(build_seconds, 2),
+        "mean_ms": round(float(latencies.mean()), 3),
+        "p50_ms": round(float(np.percentile(latencies, 50)), 3),
+        "p99_ms": round(float(np.percentile(latencies, 99)), 3),
+        "recall_at_k": round(hits / (queries * top_k), 3),
+    }
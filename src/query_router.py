@@ -0,0 +1,133 @@
+"""
+query_router.py - Réponses directes aux questions structurées ("odd 5", "cible 6.3", "SDG liés à 13")
+
+Des index construits au chargement (par numéro d'ODD, par code de cible `cibles[].code` et par
+`related_odds`) et un routeur d'intentions bilingue à expressions régulières précompilées
+permettent de répondre à ces questions sans toucher aux retrievers ni aux modèles.
+"""
+
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+from src.keyword_matcher import normaliser_texte
+
+_GOAL = r"(?:odd|sdg|goal|objectif|objective)s?\s*(?:n\s*[o°]?\s*|#\s*)?(\d{1,2})\b"
+_TARGET_CODE = r"(\d{1,2})\s*\.\s*(\d{1,2}|[a-z])\b"
+
+TARGET_RE = re.compile(r"\b(?:cibles?|targets?)\s*(?:n\s*[o°]?\s*|#\s*)?" + _TARGET_CODE)
+BARE_TARGET_RE = re.compile(r"^\s*" + _TARGET_CODE + r"\s*\??\s*$")
+# "rapport" seul veut surtout dire "report" ou "par rapport à" : seule la locution "en rapport avec" compte
+_RELATED = r"(?:li(?:e|ee|es|ees)|relat\w*|connect\w*|en rapport avec|links?|linked)"
+RELATED_RE = re.compile(r"\b" + _RELATED + r"\b")
+# Numéro placé après la relation sans mot "ODD" devant : "quels ODD sont liés à 13", "linked to 13"
+RELATED_GOAL_RE = re.compile(r"\b" + _RELATED + r"\s+(?:(?:a|au|aux|to|with)\s+)?(?:l[ea]\s+|l')?"
+                             r"(?:(?:odd|sdg|goal|objectif|objective)s?\s*)?(\d{1,2})\b")
+GOAL_RE = re.compile(r"\b" + _GOAL)
+BARE_GOAL_RE = re.compile(r"^\s*(\d{1,2})\s*\??\s*$")
+
+
+class StructuredIndex:
+    """
+    Index directs sur les données ODD : numéro d'objectif, code de cible et objectifs liés.
+    """
+    def __init__(self, odds: List[Dict[str, Any]]) -> None:
+        """
+        Args:
+            odds (List[Dict[str, Any]]): Données ODD (format monolingue ou bilingue).
+        """
+        self.by_goal: Dict[int, Dict[str, Any]] = {}
+        self.by_target: Dict[str, Tuple[Dict[str, Any], Dict[str, Any]]] = {}
+        self.related: Dict[int, List[int]] = {}
+        for odd in odds or []:
+            try:
+                number = int(odd.get("odd"))
+            except (TypeError, ValueError):
+                continue
+            self.by_goal[number] = odd
+            for cible in odd.get("cibles", []) or []:
+                code = str(cible.get("code", "")).strip().lower()
+                if code:
+                    self.by_target[code] = (odd, cible)
+        # Relations dans les deux sens : objectifs cités par un ODD puis ODD qui le citent
+        for number, odd in self.by_goal.items():
+            for other in odd.get("related_odds", []) or []:
+                self.related.setdefault(number, [])
+                if other not in self.related[number]:
+                    self.related[number].append(other)
+        for number, odd in self.by_goal.items():
+            for other in odd.get("related_odds", []) or []:
+                back = self.related.setdefault(other, [])
+                if number not in back:
+                    back.append(number)
+
+    def goal(self, number: int) -> Optional[Dict[str, Any]]:
+        """
+        ODD par numéro.
+        """
+        return self.by_goal.get(number)
+
+    def target(self, code: str) -> Optional[Dict[str, Any]]:
+        """
+        ODD restreint à une cible (type "target"), ou None si le code est inconnu.
+        """
+        found = self.by_target.get(code.strip().lower())
+        if found is None:
+            return None
+        odd, cible = found
+        return dict(odd, type="target", target=cible.get("code"), cibles=[cible])
+
+    def related_to(self, number: int) -> Optional[Dict[str, Any]]:
+        """
+        ODD et ses objectifs liés (type "related"), ou None si le numéro est inconnu.
+        """
+        odd = self.by_goal.get(number)
+        if odd is None:
+            return None
+        related = [
+            {"odd": other, "title": self.by_goal[other].get("title", "")}
+            for other in self.related.get(number, []) if other in self.by_goal
+        ]
+        return {"type": "related", "odd": number, "title": odd.get("title", ""), "related": related}
+
+
+class QueryRouter:
+    """
+    Routeur d'intentions structurées (cible, objectifs liés, ODD) en français et en anglais.
+    """
+    def __init__(self, index: StructuredIndex) -> None:
+        """
+        Args:
+            index (StructuredIndex): Index directs à interroger.
+        """
+        self.index = index
+
+    @classmethod
+    def from_corpus(cls, odds: List[Dict[str, Any]]) -> "QueryRouter":
+        """
+        Construit les index et le routeur à partir des données ODD.
+        """
+        return cls(StructuredIndex(odds))
+
+    def route(self, question: str) -> Optional[Dict[str, Any]]:
+        """
+        Répond directement à une question structurée.
+        Returns:
+            Optional[Dict[str, Any]]: Données ODD, cible ou objectifs liés ; None si la question
+            n'est pas structurée (ou vise un numéro inconnu) et doit passer par la recherche.
+        """
+        text = normaliser_texte(question)
+        match = TARGET_RE.search(text) or BARE_TARGET_RE.match(text)
+        if match:
+            result = self.index.target(f"{int(match.group(1))}.{match.group(2)}")
+            if result is not None:
+                return result
+        related = RELATED_RE.search(text)
+        match = GOAL_RE.search(text) or BARE_GOAL_RE.match(text)
+        if match is None and related:
+            match = RELATED_GOAL_RE.search(text)
+        if match:
+            number = int(match.group(1))
+            if related:
+                return self.index.related_to(number)
+            return self.index.goal(number)
+        return None
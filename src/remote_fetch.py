@@ -0,0 +1,204 @@
+"""
+remote_fetch.py - Téléchargement de ressources distantes avec cache disque
+
+Ce module fournit un client HTTP minimal (bibliothèque standard uniquement) pour les données
+distantes de l'app (ex. CSV SDSN de `charger_classement`) :
+- cache disque du dernier contenu valide (corps + métadonnées ETag/Last-Modified) ; chaque corps
+  est écrit sous un nom propre à son contenu et les métadonnées, écrites en dernier, le désignent :
+  un arrêt entre les deux écritures ne peut pas associer un ETag au mauvais corps,
+- revalidation conditionnelle (If-None-Match / If-Modified-Since, réponse 304),
+- délai strict : l'appelant n'attend jamais plus que `deadline` secondes,
+- rafraîchissement en arrière-plan : une copie périmée est servie immédiatement pendant
+  que la nouvelle version est téléchargée.
+Toute URL http(s) est acceptée, y compris un serveur local de test (http://127.0.0.1:port).
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Any, Dict, Optional
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+
+class CachedFetcher:
+    """
+    Client HTTP avec cache disque, revalidation conditionnelle, délai strict et rafraîchissement
+    en arrière-plan.
+    """
+    def __init__(self, cache_dir: str = None, timeout: float = 10.0, max_age: float = 3600.0,
+                 max_workers: int = 2) -> None:
+        """
+        Initialise le cache et le pool de téléchargement.
+        Args:
+            cache_dir (str): Dossier du cache (par défaut `cache/http`).
+            timeout (float): Timeout réseau d'un téléchargement (secondes).
+            max_age (float): Âge au-delà duquel une copie est revalidée (secondes).
+            max_workers (int): Nombre de téléchargements simultanés en arrière-plan.
+        """
+        if cache_dir is None:
+            cache_dir = os.path.join(PROJECT_ROOT, 'cache', 'http')
+        self.cache_dir = cache_dir
+        self.timeout = timeout
+        self.max_age = max_age
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="fetch")
+        self._inflight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self.stats = {"fresh": 0, "stale": 0, "downloaded": 0, "not_modified": 0, "errors": 0, "timeouts": 0}
+
+    def _count(self, name: str) -> None:
+        # Compteurs mis à jour depuis l'appelant et depuis les threads de rafraîchissement
+        with self._lock:
+            self.stats[name] += 1
+
+    def _paths(self, url: str) -> Dict[str, str]:
+        """
+        Préfixe des corps et chemin des métadonnées en cache pour une URL.
+        """
+        key = hashlib.sha256(url.encode('utf-8')).hexdigest()[:32]
+        return {
+            "key": key,
+            "meta": os.path.join(self.cache_dir, f"{key}.json"),
+        }
+
+    def _read_meta(self, url: str) -> Optional[Dict[str, Any]]:
+        """
+        Relit les métadonnées en cache d'une URL (None si absentes, incohérentes ou si le corps
+        qu'elles désignent a disparu).
+        """
+        try:
+            with open(self._paths(url)["meta"], 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+        except Exception:
+            return None
+        if meta.get("url") != url or not meta.get("body"):
+            return None
+        if not os.path.exists(os.path.join(self.cache_dir, meta["body"])):
+            return None
+        return meta
+
+    def _write_atomic(self, path: str, data: bytes) -> None:
+        """
+        Écrit un fichier via un fichier temporaire puis un renommage atomique.
+        """
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def read_cached(self, url: str) -> Optional[bytes]:
+        """
+        Retourne la dernière copie valide en cache, sans accès réseau.
+        """
+        meta = self._read_meta(url)
+        if meta is None:
+            return None
+        try:
+            with open(os.path.join(self.cache_dir, meta["body"]), 'rb') as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def refresh(self, url: str) -> Optional[bytes]:
+        """
+        Télécharge (ou revalide) une URL de manière synchrone et met le cache à jour.
+        Retourne le contenu à jour, ou la copie en cache si le serveur échoue.
+        """
+        meta = self._read_meta(url) or {}
+        paths = self._paths(url)
+        request = urllib.request.Request(url, headers={"User-Agent": "chatbot-odd/1.0"})
+        if meta.get("etag"):
+            request.add_header("If-None-Match", meta["etag"])
+        if meta.get("last_modified"):
+            request.add_header("If-Modified-Since", meta["last_modified"])
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                body = response.read()
+                new_meta = {
+                    "url": url,
+                    "body": f"{paths['key']}.{hashlib.sha256(body).hexdigest()[:16]}.body",
+                    "etag": response.headers.get("ETag"),
+                    "last_modified": response.headers.get("Last-Modified"),
+                    "fetched_at": time.time(),
+                    "size": len(body),
+                }
+            # Corps d'abord, métadonnées ensuite : le renommage des métadonnées valide la paire
+            self._write_atomic(os.path.join(self.cache_dir, new_meta["body"]), body)
+            self._write_atomic(paths["meta"], json.dumps(new_meta).encode('utf-8'))
+            if meta.get("body") and meta["body"] != new_meta["body"]:
+                try:
+                    os.remove(os.path.join(self.cache_dir, meta["body"]))
+                except OSError:
+                    pass
+            self._count("downloaded")
+            return body
+        except urllib.error.HTTPError as e:
+            if e.code == 304 and meta:
+                meta["fetched_at"] = time.time()
+                self._write_atomic(paths["meta"], json.dumps(meta).encode('utf-8'))
+                self._count("not_modified")
+                return self.read_cached(url)
+            print(f"⚠️  Téléchargement échoué ({url}) : HTTP {e.code}")
+        except Exception as e:
+            print(f"⚠️  Téléchargement échoué ({url}) : {e}")
+        self._count("errors")
+        return self.read_cached(url)
+
+    def refresh_async(self, url: str) -> Future:
+        """
+        Lance (au plus une fois par URL) un rafraîchissement en arrière-plan.
+        """
+        with self._lock:
+            future = self._inflight.get(url)
+            if future is None or future.done():
+                future = self._executor.submit(self.refresh, url)
+                self._inflight[url] = future
+                future.add_done_callback(lambda _f, u=url: self._inflight.pop(u, None))
+            return future
+
+    def get(self, url: str, deadline: float = 3.0) -> Optional[bytes]:
+        """
+        Retourne le contenu d'une URL sans jamais bloquer plus de `deadline` secondes.
+        - copie récente en cache : retournée directement ;
+        - copie périmée : retournée directement, revalidation lancée en arrière-plan ;
+        - pas de copie : téléchargement attendu au plus `deadline` secondes (il se poursuit
+          en arrière-plan en cas de dépassement et alimentera le cache pour l'appel suivant).
+        Returns:
+            Optional[bytes]: Contenu, ou None si rien n'est disponible dans le délai.
+        """
+        meta = self._read_meta(url)
+        if meta is not None:
+            cached = self.read_cached(url)
+            if cached is not None:
+                if time.time() - meta.get("fetched_at", 0) < self.max_age:
+                    self._count("fresh")
+                else:
+                    self._count("stale")
+                    self.refresh_async(url)
+                return cached
+        future = self.refresh_async(url)
+        try:
+            return future.result(timeout=deadline)
+        except FutureTimeoutError:
+            self._count("timeouts")
+            print(f"⏳ Délai dépassé pour {url} ({deadline}s), téléchargement poursuivi en arrière-plan")
+            return None
+
+    def clear(self) -> None:
+        """
+        Supprime toutes les copies en cache.
+        """
+        for filename in os.listdir(self.cache_dir):
+            file_path = os.path.join(self.cache_dir, filename)
+            if os.path.isfile(file_path):
+                os.remove(file_path)
+
+
+# Instance globale
+remote_fetcher = CachedFetcher()
@@ -1,42 +1,378 @@
-import pandas as pd
+"""
+sdg_data.py - Chargement des données SDR (Sustainable Development Report)
+
+Le classeur Excel n'est lu qu'une seule fois : la feuille 'Backdated SDG Index' est convertie en
+DataFrame typé (pays en catégorie, années en entier, scores en float32) gardé en mémoire et
+persisté dans un fichier sidecar Parquet (ou pickle si pyarrow est absent) dans `cache/`.
+Le sidecar est indexé par la taille, la date de modification et le hash SHA-256 du classeur :
+les processus suivants n'ouvrent plus openpyxl tant que le fichier source ne change pas.
+
+Les getters de scores sont servis par un cube dense float32 pays × année × (goal1..goal17 + sdgi_s),
+persisté en `.npy` et ouvert en mémoire partagée (mmap) : plusieurs processus workers
+partagent une seule copie, et les requêtes ponctuelles ou par tranche sont de simples
+indexations de tableau. Les lignes sont rendues dans l'ordre de la feuille ; `get_sdg_scores` sans
+liste d'objectifs rend toutes les colonnes de la feuille, depuis la frame.
+"""
+
+import hashlib
+import json
 import os
+import threading
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+SHEET_NAME = 'Backdated SDG Index'
+
+CUBE_COLUMNS = [f'goal{i}' for i in range(1, 18)] + ['sdgi_s']
+
+# Snapshots et cubes déjà chargés dans ce processus, indexés par hash du classeur
+_SNAPSHOTS: Dict[str, pd.DataFrame] = {}
+_CUBES: Dict[str, "SDGCube"] = {}
+_SNAPSHOTS_LOCK = threading.Lock()
+
+
+def _file_sha256(path: str, chunk_size: int = 1024 * 1024) -> str:
+    """
+    Calcule le hash SHA-256 d'un fichier par blocs.
+    Args:
+        path (str): Chemin du fichier.
+        chunk_size (int): Taille des blocs lus.
+    Returns:
+        str: Hash hexadécimal.
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(chunk_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _typer_colonnes(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Convertit la feuille brute en frame colonnaire typée.
+    Args:
+        df (pd.DataFrame): Feuille telle que lue par pandas.
+    Returns:
+        pd.DataFrame: Frame avec pays/identifiants en catégorie, année en int16 (Int16 nullable si
+            des années manquent) et scores en float32. Toutes les lignes sont conservées, dans l'ordre.
+    """
+    df = df.copy()
+    for col in df.columns:
+        if col == 'year':
+            df[col] = pd.to_numeric(df[col], errors='coerce').astype('Int16')
+        elif pd.api.types.is_numeric_dtype(df[col]):
+            df[col] = df[col].astype('float32')
+        else:
+            df[col] = df[col].astype('category')
+    if 'year' in df.columns and not df['year'].isna().any():
+        df['year'] = df['year'].astype('int16')
+    return df.reset_index(drop=True)
+
+
+class SDGCube:
+    """
+    Cube dense pays × année × colonne de scores, avec index de position.
+    Attributs :
+        values (np.ndarray): Scores float32, NaN si absent (éventuellement memory-mappé).
+        rows (np.ndarray): Position (int32) de la ligne source de chaque couple pays × année, -1 si absente.
+        present (np.ndarray): Masque booléen pays × année des lignes présentes dans la source.
+        countries / years / columns (List): Libellés de chaque axe, triés.
+        country_index / year_index / column_index (Dict): Libellé -> position entière.
+        regions (Dict[str, str]): Région SDSN de chaque pays, si la feuille la fournit.
+    """
+    def __init__(self, values: np.ndarray, rows: np.ndarray, countries: List[str], years: List[int],
+                 columns: List[str], regions: Optional[Dict[str, str]] = None) -> None:
+        self.values = values
+        self.rows = rows
+        self.present = np.asarray(rows) >= 0
+        self.countries = list(countries)
+        self.years = [int(y) for y in years]
+        self.columns = list(columns)
+        self.regions = regions or {}
+        self.country_index = {c: i for i, c in enumerate(self.countries)}
+        self.year_index = {y: i for i, y in enumerate(self.years)}
+        self.column_index = {c: i for i, c in enumerate(self.columns)}
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> "SDGCube":
+        """
+        Construit le cube à partir de la frame longue (une ligne par pays et par année).
+        Les lignes sans année, qui n'ont pas de position dans le cube, sont ignorées.
+        """
+        df = df[df['year'].notna()]
+        columns = [c for c in CUBE_COLUMNS if c in df.columns]
+        country_labels = df['Country'].astype(str)
+        countries = sorted(country_labels.unique())
+        years = sorted(int(y) for y in df['year'].unique())
+        c_pos = pd.Index(countries).get_indexer(country_labels)
+        y_pos = pd.Index(years).get_indexer(df['year'].astype(int))
+        values = np.full((len(countries), len(years), len(columns)), np.nan, dtype=np.float32)
+        values[c_pos, y_pos] = df[columns].to_numpy(dtype=np.float32)
+        rows = np.full((len(countries), len(years)), -1, dtype=np.int32)
+        rows[c_pos, y_pos] = df.index.to_numpy()
+        regions = {}
+        if 'indexreg' in df.columns:
+            regions = dict(zip(country_labels, df['indexreg'].astype(str)))
+        return cls(values, rows, countries, years, columns, regions)
+
+    def save(self, stem: str) -> None:
+        """
+        Persiste le cube sous `stem.cube.npy`, `stem.rows.npy` et `stem.cube.json` (écritures atomiques).
+        """
+        for suffix, array in (('.cube.npy', self.values), ('.rows.npy', self.rows)):
+            with open(stem + suffix + '.tmp', 'wb') as f:
+                np.save(f, np.ascontiguousarray(array))
+            os.replace(stem + suffix + '.tmp', stem + suffix)
+        meta = {"countries": self.countries, "years": self.years, "columns": self.columns, "regions": self.regions}
+        with open(stem + '.cube.json.tmp', 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False)
+        os.replace(stem + '.cube.json.tmp', stem + '.cube.json')
+
+    @classmethod
+    def load(cls, stem: str, mmap: bool = True) -> Optional["SDGCube"]:
+        """
+        Ouvre un cube persisté, en lecture seule et memory-mappé par défaut. Retourne None s'il est absent.
+        """
+        if not os.path.exists(stem + '.cube.json'):
+            return None
+        try:
+            with open(stem + '.cube.json', 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            mode = 'r' if mmap else None
+            values = np.load(stem + '.cube.npy', mmap_mode=mode)
+            rows = np.load(stem + '.rows.npy', mmap_mode=mode)
+            return cls(values, rows, meta["countries"], meta["years"], meta["columns"], meta.get("regions"))
+        except Exception as e:
+            print(f"⚠️  Cube SDR illisible ({stem}) : {e}")
+            return None
+
+    def value(self, country: str, year: int, column: str = 'sdgi_s') -> float:
+        """
+        Score d'un pays pour une année et une colonne (accès direct, NaN si absent).
+        """
+        return float(self.values[self.country_index[country], self.year_index[int(year)], self.column_index[column]])
+
+    def frame(self, countries: Optional[List[str]] = None, years: Optional[List[int]] = None,
+              columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """
+        Vue longue (Country, year, colonnes...) d'une tranche du cube, limitée aux lignes présentes
+        et dans l'ordre des lignes de la feuille source.
+        Les pays ou années inconnus sont ignorés, comme avec un filtre `isin`.
+        """
+        c_pos = np.arange(len(self.countries)) if not countries else \
+            np.array([self.country_index[c] for c in countries if c in self.country_index], dtype=np.intp)
+        y_pos = np.arange(len(self.years)) if not years else \
+            np.array(sorted(self.year_index[int(y)] for y in set(years) if int(y) in self.year_index), dtype=np.intp)
+        columns = list(columns) if columns else self.columns
+        k_pos = [self.column_index[c] for c in columns]
+        cc, yy = np.nonzero(self.present[np.ix_(c_pos, y_pos)])
+        c_sel, y_sel = c_pos[cc], y_pos[yy]
+        order = np.argsort(self.rows[c_sel, y_sel], kind='stable')
+        c_sel, y_sel = c_sel[order], y_sel[order]
+        data = np.asarray(self.values[c_sel, y_sel][:, k_pos])
+        df = pd.DataFrame(data, columns=columns)
+        df.insert(0, 'year', np.asarray(self.years, dtype=np.int16)[y_sel])
+        df.insert(0, 'Country', np.asarray(self.countries, dtype=object)[c_sel])
+        return df
+
 
 class SDGDataLoader:
-    def __init__(self, excel_path):
+    def __init__(self, excel_path, cache_dir: Optional[str] = None):
         # Si le chemin n'est pas absolu, on le base sur la racine du projet
         if not os.path.isabs(excel_path):
-            project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
-            excel_path = os.path.join(project_root, excel_path)
+            excel_path = os.path.join(PROJECT_ROOT, excel_path)
         self.excel_path = excel_path
-        self.sheets = pd.ExcelFile(excel_path).sheet_names
+        if cache_dir is None:
+            cache_dir = os.path.join(PROJECT_ROOT, 'cache')
+        self.cache_dir = cache_dir
+        self._df: Optional[pd.DataFrame] = None
+        self._sheets: Optional[List[str]] = None
+        self._key: Optional[Dict[str, Any]] = None
+        self._cube: Optional[SDGCube] = None
+
+    @property
+    def sheets(self) -> List[str]:
+        """
+        Noms des feuilles du classeur (ouvre le classeur à la première demande uniquement).
+        """
+        if self._sheets is None:
+            self._sheets = pd.ExcelFile(self.excel_path).sheet_names
+        return self._sheets
+
+    def _sidecar_paths(self) -> Dict[str, str]:
+        """
+        Retourne les chemins du sidecar (index JSON et snapshot) associés au classeur.
+        """
+        base = os.path.splitext(os.path.basename(self.excel_path))[0]
+        return {
+            "index": os.path.join(self.cache_dir, f"{base}.snapshot.json"),
+            "dir": self.cache_dir,
+            "base": base,
+        }
+
+    def _fingerprint(self, index: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Calcule l'empreinte (taille, mtime, hash) du classeur.
+        Le hash n'est recalculé que si la taille ou la date de modification ont changé.
+        Args:
+            index (Dict[str, Any]): Dernière empreinte enregistrée (éventuellement vide).
+        Returns:
+            Dict[str, Any]: Empreinte courante.
+        """
+        stat = os.stat(self.excel_path)
+        fingerprint = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+        if index.get("size") == stat.st_size and index.get("mtime_ns") == stat.st_mtime_ns and index.get("sha256"):
+            fingerprint["sha256"] = index["sha256"]
+        else:
+            fingerprint["sha256"] = _file_sha256(self.excel_path)
+        return fingerprint
+
+    def _read_snapshot(self, path: str) -> Optional[pd.DataFrame]:
+        """
+        Relit un snapshot persisté (Parquet ou pickle). Retourne None en cas d'échec.
+        """
+        try:
+            if path.endswith('.parquet'):
+                return pd.read_parquet(path)
+            return pd.read_pickle(path)
+        except Exception as e:
+            print(f"⚠️  Snapshot SDR illisible ({path}) : {e}")
+            return None
+
+    def _write_snapshot(self, df: pd.DataFrame, fingerprint: Dict[str, Any], paths: Dict[str, str]) -> None:
+        """
+        Persiste le snapshot et son index de manière atomique (fichier temporaire puis renommage).
+        """
+        try:
+            os.makedirs(paths["dir"], exist_ok=True)
+            stem = os.path.join(paths["dir"], f"{paths['base']}.{fingerprint['sha256'][:16]}")
+            try:
+                snapshot_path = stem + '.parquet'
+                df.to_parquet(snapshot_path + '.tmp', index=False)
+            except (ImportError, ValueError):
+                snapshot_path = stem + '.pkl'
+                df.to_pickle(snapshot_path + '.tmp')
+            os.replace(snapshot_path + '.tmp', snapshot_path)
+            self._write_index(fingerprint, paths, os.path.basename(snapshot_path))
+            print(f"✅ Snapshot SDR sauvegardé: {snapshot_path}")
+        except Exception as e:
+            print(f"❌ Erreur sauvegarde snapshot SDR: {e}")
+
+    def _write_index(self, fingerprint: Dict[str, Any], paths: Dict[str, str], snapshot: str) -> None:
+        """
+        Écrit l'index du sidecar (empreinte du classeur et nom du snapshot) de manière atomique.
+        """
+        index = dict(fingerprint, snapshot=snapshot, sheet=SHEET_NAME)
+        with open(paths["index"] + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(index, f)
+        os.replace(paths["index"] + '.tmp', paths["index"])
+
+    def _snapshot_key(self) -> Dict[str, Any]:
+        """
+        Lit l'index du sidecar et calcule l'empreinte courante du classeur (une fois par instance).
+        """
+        if self._key is None:
+            paths = self._sidecar_paths()
+            index: Dict[str, Any] = {}
+            if os.path.exists(paths["index"]):
+                try:
+                    with open(paths["index"], 'r', encoding='utf-8') as f:
+                        index = json.load(f)
+                except Exception:
+                    index = {}
+            self._key = {"paths": paths, "index": index, "fingerprint": self._fingerprint(index)}
+        return self._key
+
+    def _load(self) -> pd.DataFrame:
+        """
+        Retourne la frame typée de la feuille 'Backdated SDG Index'.
+        Ordre de résolution : mémoire de l'instance, mémoire du processus, sidecar disque, classeur Excel.
+        La frame est partagée par tout le processus : les getters publics n'en renvoient que des copies.
+        """
+        if self._df is not None:
+            return self._df
+        key_info = self._snapshot_key()
+        paths, index, fingerprint = key_info["paths"], key_info["index"], key_info["fingerprint"]
+        key = fingerprint["sha256"]
+        with _SNAPSHOTS_LOCK:
+            df = _SNAPSHOTS.get(key)
+            if df is None:
+                if index.get("sha256") == key and index.get("snapshot"):
+                    df = self._read_snapshot(os.path.join(paths["dir"], index["snapshot"]))
+                    if df is not None and (index.get("size"), index.get("mtime_ns")) != (fingerprint["size"], fingerprint["mtime_ns"]):
+                        # Classeur touché mais contenu identique : seul l'index (taille, mtime) est réécrit
+                        try:
+                            self._write_index(fingerprint, paths, index["snapshot"])
+                        except OSError as e:
+                            print(f"❌ Erreur mise à jour index snapshot SDR: {e}")
+                if df is None:
+                    print(f"📥 Lecture du classeur SDR : {self.excel_path}")
+                    df = _typer_colonnes(pd.read_excel(self.excel_path, sheet_name=SHEET_NAME))
+                    self._write_snapshot(df, fingerprint, paths)
+                _SNAPSHOTS[key] = df
+        self._df = df
+        return df
+
+    @property
+    def cube(self) -> SDGCube:
+        """
+        Cube pays × année × score, memory-mappé depuis `cache/` s'il existe, sinon construit depuis la frame.
+        """
+        if self._cube is None:
+            key_info = self._snapshot_key()
+            paths, key = key_info["paths"], key_info["fingerprint"]["sha256"]
+            stem = os.path.join(paths["dir"], f"{paths['base']}.{key[:16]}")
+            with _SNAPSHOTS_LOCK:
+                cube = _CUBES.get(key)
+            if cube is None:
+                cube = SDGCube.load(stem)
+            if cube is None:
+                cube = SDGCube.from_frame(self._load())
+                try:
+                    os.makedirs(paths["dir"], exist_ok=True)
+                    cube.save(stem)
+                    # On rouvre la version disque pour partager les pages entre processus
+                    cube = SDGCube.load(stem) or cube
+                except Exception as e:
+                    print(f"❌ Erreur sauvegarde cube SDR: {e}")
+            with _SNAPSHOTS_LOCK:
+                cube = _CUBES.setdefault(key, cube)
+            self._cube = cube
+        return self._cube
 
     def get_years(self):
-        df = pd.read_excel(self.excel_path, sheet_name='Backdated SDG Index')
-        return sorted(df['year'].unique())
+        return list(self.cube.years)
 
     def get_countries(self):
-        df = pd.read_excel(self.excel_path, sheet_name='Backdated SDG Index')
-        return sorted(df['Country'].unique())
+        return list(self.cube.countries)
 
     def get_sdg_scores(self, countries=None, years=None, goals=None):
-        df = pd.read_excel(self.excel_path, sheet_name='Backdated SDG Index')
+        cube = self.cube
+        if goals and all(g in cube.column_index for g in goals):
+            return cube.frame(countries=countries, years=years, columns=goals)
+        # Sans sous-ensemble d'objectifs (toutes les colonnes de la feuille) ou avec des colonnes
+        # hors cube : on filtre la frame complète, dans l'ordre de la feuille
+        df = self._load()
         if countries:
             df = df[df['Country'].isin(countries)]
         if years:
             df = df[df['year'].isin(years)]
         if goals:
-            cols = ['Country', 'year'] + goals
-            df = df[cols]
-        return df
+            df = df[['Country', 'year'] + goals]
+        return df.copy()
 
     def get_goal_columns(self):
-        df = pd.read_excel(self.excel_path, sheet_name='Backdated SDG Index', nrows=1)
-        return [col for col in df.columns if col.startswith('goal')]
+        # En-tête de la feuille (snapshot en cache) : le cube ne porte que goal1..goal17
+        return [col for col in self._load().columns if col.startswith('goal')]
 
     def get_global_score(self, countries=None, years=None):
-        df = pd.read_excel(self.excel_path, sheet_name='Backdated SDG Index')
-        if countries:
-            df = df[df['Country'].isin(countries)]
-        if years:
-            df = df[df['year'].isin(years)]
-        return df[['Country', 'year', 'sdgi_s']]
+        return self.cube.frame(countries=countries, years=years, columns=['sdgi_s'])
+
+    def get_score(self, country: str, year: int, column: str = 'sdgi_s') -> float:
+        """
+        Score ponctuel d'un pays (accès direct dans le cube).
+        """
+        return self.cube.value(country, year, column)
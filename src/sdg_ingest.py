@@ -0,0 +1,337 @@
+"""
+sdg_ingest.py - Ingestion incrémentale des éditions SDR (SDSN)
+
+Chaque édition du Sustainable Development Report (CSV SDR2024, classeur SDR2025, ...) est
+normalisée vers un schéma commun (id, indexreg, Country, year, sdgi_s, goal1..goal17) puis écrite
+dans un store append-only partitionné par édition, par ingestion et par année :
+
+    cache/sdg_store/edition=2025/ingest=1/year=2020/part-00000.parquet
+
+Les sources sont lues par blocs (read_csv en chunks, openpyxl en lecture seule) pour borner la
+mémoire, et une édition n'est ré-ingérée que si l'empreinte de son fichier source a changé.
+Une ré-ingestion ajoute un nouveau dossier `ingest=<n>` et le manifeste pointe vers la dernière :
+les partitions écrites ne sont jamais modifiées ni supprimées, et les ingestions précédentes
+restent listées dans l'historique de l'édition. Les lectures ne chargent que les partitions demandées.
+"""
+
+import json
+import os
+import re
+import shutil
+import time
+from typing import Any, Dict, Iterator, List, Optional
+
+import pandas as pd
+
+from src.sdg_data import PROJECT_ROOT, SHEET_NAME, _file_sha256
+
+STORE_COLUMNS = ['id', 'indexreg', 'Country', 'year', 'sdgi_s'] + [f'goal{i}' for i in range(1, 18)]
+
+_GOAL_RE = re.compile(r'^goal\s*(\d{1,2})(\s*score)?$')
+
+
+def normaliser_colonne(name: Any) -> Optional[str]:
+    """
+    Associe un nom de colonne d'une édition SDR au schéma commun du store.
+    Args:
+        name (Any): Nom de colonne brut ("Goal 1 Score", "2024 SDG Index Score", "sdgi_s", ...).
+    Returns:
+        Optional[str]: Nom normalisé, ou None si la colonne n'est pas conservée.
+    """
+    key = re.sub(r'\s+', ' ', str(name)).strip().lower()
+    if key in ('country', 'country name'):
+        return 'Country'
+    if key == 'year':
+        return 'year'
+    if key in ('id', 'country code iso3', 'iso3'):
+        return 'id'
+    if key in ('indexreg', 'region', 'regions used for the sdr'):
+        return 'indexreg'
+    if key == 'sdgi_s' or key.endswith('sdg index score'):
+        return 'sdgi_s'
+    match = _GOAL_RE.match(key)
+    if match and 1 <= int(match.group(1)) <= 17:
+        return f'goal{int(match.group(1))}'
+    return None
+
+
+def _normaliser_bloc(chunk: pd.DataFrame, edition: int) -> pd.DataFrame:
+    """
+    Renomme, filtre et type un bloc de lignes brutes.
+    """
+    renamed = {}
+    for col in chunk.columns:
+        target = normaliser_colonne(col)
+        if target and target not in renamed.values():
+            renamed[col] = target
+    df = chunk[list(renamed)].rename(columns=renamed)
+    if 'year' not in df.columns:
+        # Éditions transversales (ex. CSV SDR2024) : l'année est celle de l'édition
+        df['year'] = edition
+    df = df.dropna(subset=[c for c in ('Country', 'year') if c in df.columns])
+    df['year'] = pd.to_numeric(df['year'], errors='coerce')
+    df = df.dropna(subset=['year'])
+    df['year'] = df['year'].astype('int16')
+    for col in df.columns:
+        if col in ('Country', 'id', 'indexreg'):
+            df[col] = df[col].astype(str)
+        elif col != 'year':
+            df[col] = pd.to_numeric(df[col], errors='coerce').astype('float32')
+    df = df[[c for c in STORE_COLUMNS if c in df.columns]]
+    df['edition'] = edition
+    df['edition'] = df['edition'].astype('int16')
+    return df.reset_index(drop=True)
+
+
+def normaliser_edition(df: pd.DataFrame, edition: int) -> pd.DataFrame:
+    """
+    Normalise une édition déjà chargée en mémoire (ex. CSV téléchargé) vers le schéma du store.
+    Args:
+        df (pd.DataFrame): Lignes brutes de l'édition.
+        edition (int): Année de l'édition (utilisée comme année si la source n'en a pas).
+    Returns:
+        pd.DataFrame: Colonnes du store (Country, year, sdgi_s, goal1..goal17...) et `edition`.
+    """
+    return _normaliser_bloc(df, edition)
+
+
+def _lire_csv_par_blocs(path: str, chunksize: int) -> Iterator[pd.DataFrame]:
+    """
+    Lit un CSV par blocs de `chunksize` lignes.
+    """
+    for chunk in pd.read_csv(path, chunksize=chunksize, encoding_errors='replace'):
+        yield chunk
+
+
+def _lire_xlsx_par_blocs(path: str, chunksize: int, sheet: Optional[str] = None) -> Iterator[pd.DataFrame]:
+    """
+    Lit une feuille Excel en mode lecture seule (openpyxl) par blocs de `chunksize` lignes.
+    Par défaut : la feuille 'Backdated SDG Index' si elle existe, sinon la première.
+    """
+    from openpyxl import load_workbook
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        if sheet is None:
+            sheet = SHEET_NAME if SHEET_NAME in workbook.sheetnames else workbook.sheetnames[0]
+        rows = workbook[sheet].iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        buffer: List[tuple] = []
+        for row in rows:
+            buffer.append(row)
+            if len(buffer) >= chunksize:
+                yield pd.DataFrame(buffer, columns=header)
+                buffer = []
+        if buffer:
+            yield pd.DataFrame(buffer, columns=header)
+    finally:
+        workbook.close()
+
+
+def _ecrire_partition(df: pd.DataFrame, path: str) -> str:
+    """
+    Écrit une partition en Parquet (pickle si pyarrow est absent). Retourne le chemin écrit.
+    """
+    try:
+        df.to_parquet(path + '.parquet', index=False)
+        return path + '.parquet'
+    except (ImportError, ValueError):
+        df.to_pickle(path + '.pkl')
+        return path + '.pkl'
+
+
+def _lire_partition(path: str, columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """
+    Relit une partition écrite par `_ecrire_partition`.
+    """
+    if path.endswith('.parquet'):
+        return pd.read_parquet(path, columns=columns)
+    df = pd.read_pickle(path)
+    return df[[c for c in columns if c in df.columns]] if columns else df
+
+
+class SDGStore:
+    """
+    Store append-only des éditions SDR, partitionné par édition, ingestion et année.
+    Le manifeste JSON garde pour chaque édition l'empreinte de la source, le numéro de la dernière
+    ingestion, la liste de ses partitions et l'historique des ingestions précédentes.
+    """
+    def __init__(self, store_dir: Optional[str] = None) -> None:
+        """
+        Initialise le répertoire du store.
+        Args:
+            store_dir (str): Dossier du store (par défaut `cache/sdg_store`).
+        """
+        if store_dir is None:
+            store_dir = os.path.join(PROJECT_ROOT, 'cache', 'sdg_store')
+        self.store_dir = store_dir
+        self.manifest_path = os.path.join(store_dir, 'manifest.json')
+        os.makedirs(store_dir, exist_ok=True)
+        self.manifest = self._lire_manifeste()
+
+    def _lire_manifeste(self) -> Dict[str, Any]:
+        """
+        Relit le manifeste du store (vide s'il est absent ou corrompu).
+        """
+        if os.path.exists(self.manifest_path):
+            try:
+                with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                    return json.load(f)
+            except Exception as e:
+                print(f"⚠️  Manifeste du store illisible, il sera reconstruit : {e}")
+        return {"editions": {}}
+
+    def _ecrire_manifeste(self) -> None:
+        """
+        Écrit le manifeste de manière atomique (fichier temporaire puis renommage).
+        """
+        tmp_path = self.manifest_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.manifest, f, indent=2)
+        os.replace(tmp_path, self.manifest_path)
+
+    def editions(self) -> List[int]:
+        """
+        Éditions présentes dans le store, triées.
+        """
+        return sorted(int(e) for e in self.manifest["editions"])
+
+    def is_current(self, edition: int, source: str) -> bool:
+        """
+        Indique si l'édition est déjà ingérée depuis ce fichier source inchangé.
+        Le hash n'est recalculé que si la taille ou la date de modification diffèrent.
+        """
+        entry = self.manifest["editions"].get(str(edition))
+        if not entry or not os.path.exists(source):
+            return False
+        stat = os.stat(source)
+        if entry.get("size") == stat.st_size and entry.get("mtime_ns") == stat.st_mtime_ns:
+            return True
+        return entry.get("size") == stat.st_size and entry.get("sha256") == _file_sha256(source)
+
+    def ingest(self, edition: int, source: str, chunksize: int = 50_000, sheet: Optional[str] = None,
+               force: bool = False) -> bool:
+        """
+        Ingère une édition (CSV ou XLSX) si sa source a changé.
+        Les partitions sont écrites dans un dossier temporaire renommé en `ingest=<n>` (nouvelle
+        ingestion), puis le manifeste bascule vers celle-ci ; aucune partition existante n'est réécrite.
+        Args:
+            edition (int): Année de l'édition (ex. 2025).
+            source (str): Chemin du fichier CSV ou XLSX.
+            chunksize (int): Nombre de lignes lues par bloc.
+            sheet (str): Feuille Excel à lire (optionnel).
+            force (bool): Ré-ingère même si la source est inchangée.
+        Returns:
+            bool: True si l'édition a été (ré)ingérée, False si elle était à jour.
+        """
+        if not os.path.isabs(source):
+            source = os.path.join(PROJECT_ROOT, source)
+        if not force and self.is_current(edition, source):
+            print(f"✅ Édition {edition} déjà à jour dans le store")
+            return False
+        start_time = time.time()
+        if source.lower().endswith(('.xlsx', '.xlsm')):
+            chunks = _lire_xlsx_par_blocs(source, chunksize, sheet)
+        else:
+            chunks = _lire_csv_par_blocs(source, chunksize)
+        previous = self.manifest["editions"].get(str(edition))
+        ingest_no = (previous or {}).get("ingest", 0) + 1
+        edition_dir = os.path.join(self.store_dir, f"edition={edition}")
+        final_dir = os.path.join(edition_dir, f"ingest={ingest_no}")
+        while os.path.exists(final_dir):
+            # Ingestion écrite mais jamais enregistrée (arrêt avant le manifeste) : on ne la réutilise pas
+            ingest_no += 1
+            final_dir = os.path.join(edition_dir, f"ingest={ingest_no}")
+        staging_dir = final_dir + '.tmp'
+        shutil.rmtree(staging_dir, ignore_errors=True)
+        parts: List[str] = []
+        years = set()
+        rows = 0
+        for chunk_no, chunk in enumerate(chunks):
+            df = _normaliser_bloc(chunk, edition)
+            for year, part in df.groupby('year', sort=False):
+                year_dir = os.path.join(staging_dir, f"year={int(year)}")
+                os.makedirs(year_dir, exist_ok=True)
+                written = _ecrire_partition(part.reset_index(drop=True), os.path.join(year_dir, f"part-{chunk_no:05d}"))
+                parts.append(os.path.relpath(written, staging_dir).replace(os.sep, '/'))
+                years.add(int(year))
+            rows += len(df)
+        os.makedirs(staging_dir, exist_ok=True)
+        os.replace(staging_dir, final_dir)
+        stat = os.stat(source)
+        history = []
+        if previous:
+            history = previous.pop("history", [])
+            history.append(previous)
+        self.manifest["editions"][str(edition)] = {
+            "ingest": ingest_no,
+            "source": source,
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "sha256": _file_sha256(source),
+            "years": sorted(years),
+            "rows": rows,
+            "parts": sorted(parts),
+            "ingested_at": time.time(),
+            "history": history,
+        }
+        self._ecrire_manifeste()
+        print(f"✅ Édition {edition} ingérée (ingestion {ingest_no}) : {rows} lignes, {len(years)} années en {time.time() - start_time:.2f}s")
+        return True
+
+    def ingest_all(self, sources: Dict[int, str], **kwargs: Any) -> List[int]:
+        """
+        Ingère plusieurs éditions ; seules celles dont la source a changé sont relues.
+        Returns:
+            List[int]: Éditions effectivement (ré)ingérées.
+        """
+        return [edition for edition, source in sorted(sources.items()) if self.ingest(edition, source, **kwargs)]
+
+    def iter_partitions(self, editions: Optional[List[int]] = None, years: Optional[List[int]] = None,
+                        countries: Optional[List[str]] = None,
+                        columns: Optional[List[str]] = None) -> Iterator[pd.DataFrame]:
+        """
+        Parcourt les partitions correspondant aux éditions/années demandées, une à la fois.
+        Les partitions non concernées ne sont jamais ouvertes : la mémoire reste bornée.
+        """
+        wanted_years = {int(y) for y in years} if years else None
+        read_columns = None
+        if columns:
+            read_columns = list(dict.fromkeys(['Country', 'year', 'edition'] + list(columns)))
+        for edition in editions or self.editions():
+            entry = self.manifest["editions"].get(str(edition))
+            if not entry:
+                continue
+            edition_dir = os.path.join(self.store_dir, f"edition={edition}")
+            if "ingest" in entry:
+                edition_dir = os.path.join(edition_dir, f"ingest={entry['ingest']}")
+            for part in entry["parts"]:
+                year = int(part.split('/')[0].split('=')[1])
+                if wanted_years is not None and year not in wanted_years:
+                    continue
+                df = _lire_partition(os.path.join(edition_dir, *part.split('/')), read_columns)
+                if countries:
+                    df = df[df['Country'].isin(countries)]
+                if not df.empty:
+                    yield df
+
+    def load(self, editions: Optional[List[int]] = None, years: Optional[List[int]] = None,
+             countries: Optional[List[str]] = None, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """
+        Charge la sélection demandée dans une seule frame (colonnes Country, year, edition + colonnes).
+        """
+        frames = list(self.iter_partitions(editions, years, countries, columns))
+        if not frames:
+            return pd.DataFrame(columns=['Country', 'year', 'edition'] + list(columns or []))
+        return pd.concat(frames, ignore_index=True)
+
+    def compare_editions(self, countries: List[str], column: str = 'sdgi_s',
+                         editions: Optional[List[int]] = None) -> pd.DataFrame:
+        """
+        Compare un score entre éditions : une ligne par (pays, année), une colonne par édition.
+        """
+        df = self.load(editions=editions, countries=countries, columns=[column])
+        if df.empty:
+            return df
+        return df.pivot_table(index=['Country', 'year'], columns='edition', values=column, aggfunc='first')
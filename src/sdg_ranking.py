@@ -0,0 +1,164 @@
+"""
+sdg_ranking.py - Moteur de classement précalculé pour les données SDR
+
+Ce module précalcule, à partir du cube pays × année × score de `SDGDataLoader`, l'ordre de
+classement, les rangs, les percentiles, les variations d'une année sur l'autre et les moyennes
+régionales pour chaque année et chaque objectif. Les requêtes "top k" coûtent O(k) et
+"rang du pays X" O(1) : le panneau de classement de l'app ne refait plus ni tri ni filtre.
+"""
+
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from src.sdg_data import SDGCube, SDGDataLoader
+
+
+class SDGRankingEngine:
+    """
+    Classements précalculés sur toutes les années et toutes les colonnes du cube.
+    Attributs (axes pays C, années Y, colonnes K) :
+        order (np.ndarray): (C, Y, K) positions de pays triées par score décroissant, NaN en fin.
+        counts (np.ndarray): (Y, K) nombre de pays classés.
+        ranks (np.ndarray): (C, Y, K) rang à partir de 1 (ex aequo au même rang), 0 si non classé.
+        percentiles (np.ndarray): (C, Y, K) percentile 0-100 (100 = premier), NaN si non classé.
+        deltas (np.ndarray): (C, Y, K) variation par rapport à l'année précédente.
+        regions (List[str]) / region_means (np.ndarray): (R, Y, K) moyennes régionales.
+    """
+    def __init__(self, cube: SDGCube) -> None:
+        self.cube = cube
+        values = np.asarray(cube.values, dtype=np.float32)
+        n_countries = values.shape[0]
+        valid = ~np.isnan(values)
+        # Tri décroissant avec les NaN en fin : on trie -score, NaN remplacés par +inf
+        keys = np.where(valid, -values, np.inf)
+        self.order = np.argsort(keys, axis=0, kind='stable').astype(np.int32)
+        self.counts = valid.sum(axis=0).astype(np.int32)
+        # Classement "compétition" (1, 2, 2, 4) : un ex aequo prend le rang du premier de son groupe
+        sorted_keys = np.take_along_axis(keys, self.order, axis=0)
+        new_group = np.ones(sorted_keys.shape, dtype=bool)
+        new_group[1:] = sorted_keys[1:] != sorted_keys[:-1]
+        positions = np.arange(1, n_countries + 1, dtype=np.int32)[:, None, None]
+        positions = np.maximum.accumulate(np.where(new_group, positions, 0), axis=0).astype(np.int32)
+        ranks = np.empty_like(self.order)
+        np.put_along_axis(ranks, self.order, positions, axis=0)
+        self.ranks = np.where(valid, ranks, 0).astype(np.int32)
+        denom = np.maximum(self.counts - 1, 1).astype(np.float32)
+        with np.errstate(invalid='ignore'):
+            self.percentiles = np.where(valid, 100.0 * (self.counts - self.ranks) / denom, np.nan).astype(np.float32)
+        self.deltas = np.full_like(values, np.nan)
+        if values.shape[1] > 1:
+            self.deltas[:, 1:] = values[:, 1:] - values[:, :-1]
+        self._build_regions(values, valid)
+
+    def _build_regions(self, values: np.ndarray, valid: np.ndarray) -> None:
+        """
+        Calcule les moyennes par région (ignorées si la source ne fournit pas de région).
+        """
+        self.regions: List[str] = sorted(set(self.cube.regions.values()))
+        self.region_index: Dict[str, int] = {r: i for i, r in enumerate(self.regions)}
+        shape = (len(self.regions),) + values.shape[1:]
+        sums = np.zeros(shape, dtype=np.float64)
+        counts = np.zeros(shape, dtype=np.int32)
+        for country, region in self.cube.regions.items():
+            c = self.cube.country_index.get(country)
+            if c is None:
+                continue
+            r = self.region_index[region]
+            sums[r] += np.where(valid[c], values[c], 0.0)
+            counts[r] += valid[c]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            self.region_means = np.where(counts > 0, sums / np.maximum(counts, 1), np.nan).astype(np.float32)
+
+    @classmethod
+    def from_loader(cls, loader: SDGDataLoader) -> "SDGRankingEngine":
+        """
+        Construit le moteur à partir du cube d'un `SDGDataLoader`.
+        """
+        return cls(loader.cube)
+
+    @property
+    def latest_year(self) -> int:
+        """
+        Dernière année disponible.
+        """
+        return self.cube.years[-1]
+
+    def _pos(self, year: int, column: str) -> tuple:
+        """
+        Positions (année, colonne) dans le cube.
+        """
+        return self.cube.year_index[int(year)], self.cube.column_index[column]
+
+    def rank_of(self, country: str, year: int, column: str = 'sdgi_s') -> Optional[int]:
+        """
+        Rang d'un pays (O(1)). Retourne None si le pays n'est pas classé cette année-là.
+        """
+        y, k = self._pos(year, column)
+        rank = int(self.ranks[self.cube.country_index[country], y, k])
+        return rank or None
+
+    def percentile_of(self, country: str, year: int, column: str = 'sdgi_s') -> float:
+        """
+        Percentile d'un pays (O(1)), NaN s'il n'est pas classé.
+        """
+        y, k = self._pos(year, column)
+        return float(self.percentiles[self.cube.country_index[country], y, k])
+
+    def delta_of(self, country: str, year: int, column: str = 'sdgi_s') -> float:
+        """
+        Variation du score par rapport à l'année précédente (O(1)).
+        """
+        y, k = self._pos(year, column)
+        return float(self.deltas[self.cube.country_index[country], y, k])
+
+    def ranked_countries(self, year: int, column: str = 'sdgi_s') -> List[str]:
+        """
+        Pays classés pour une année, dans l'ordre alphabétique.
+        """
+        y, k = self._pos(year, column)
+        return [c for i, c in enumerate(self.cube.countries) if self.ranks[i, y, k]]
+
+    def _rows(self, positions: np.ndarray, y: int, k: int, column: str) -> pd.DataFrame:
+        """
+        Construit la frame de classement pour des positions de pays déjà ordonnées.
+        """
+        year = self.cube.years[y]
+        return pd.DataFrame({
+            'Country': np.asarray(self.cube.countries, dtype=object)[positions],
+            'year': np.full(len(positions), year, dtype=np.int16),
+            column: np.asarray(self.cube.values[positions, y, k], dtype=np.float32),
+            'rank': self.ranks[positions, y, k],
+            'percentile': self.percentiles[positions, y, k],
+            'delta': self.deltas[positions, y, k],
+        })
+
+    def top_k(self, year: int, column: str = 'sdgi_s', k: Optional[int] = 10) -> pd.DataFrame:
+        """
+        Les k premiers pays d'une année (O(k)). `k=None` retourne tout le classement.
+        """
+        y, kk = self._pos(year, column)
+        n = int(self.counts[y, kk])
+        n = n if k is None else min(k, n)
+        return self._rows(self.order[:n, y, kk], y, kk, column)
+
+    def classement(self, year: int, column: str = 'sdgi_s', countries: Optional[List[str]] = None) -> pd.DataFrame:
+        """
+        Classement d'une année, éventuellement restreint à une liste de pays (O(m log m) pour m pays).
+        """
+        if not countries:
+            return self.top_k(year, column, k=None)
+        y, kk = self._pos(year, column)
+        positions = np.array([self.cube.country_index[c] for c in countries if c in self.cube.country_index], dtype=np.intp)
+        positions = positions[self.ranks[positions, y, kk] > 0]
+        positions = positions[np.argsort(self.ranks[positions, y, kk], kind='stable')]
+        return self._rows(positions, y, kk, column)
+
+    def region_scores(self, year: int, column: str = 'sdgi_s') -> pd.DataFrame:
+        """
+        Moyennes régionales d'une année, triées par score décroissant.
+        """
+        y, k = self._pos(year, column)
+        df = pd.DataFrame({'region': self.regions, column: self.region_means[:, y, k]})
+        return df.sort_values(column, ascending=False, ignore_index=True)
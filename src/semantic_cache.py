@@ -0,0 +1,148 @@
+"""
+semantic_cache.py - Cache sémantique des réponses pour les questions reformulées
+
+Un cache exact ne reconnaît pas "what is SDG 4" et "tell me about goal 4 education". Ce cache
+compare l'embedding (normalisé) d'une nouvelle question à ceux des questions déjà traitées, en un
+produit matrice-vecteur, et réutilise la réponse stockée quand la similarité cosinus dépasse un
+seuil ET que la recherche a retenu le même document (même langue, même version du corpus).
+La taille est bornée ; l'entrée évincée est la moins fréquemment (LFU) ou la moins récemment (LRU)
+utilisée.
+"""
+
+import os
+import threading
+import time
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+import numpy as np
+
+SEMANTIC_CACHE_SIZE = int(os.environ.get("ODD_SEMANTIC_CACHE_SIZE", "512"))
+SEMANTIC_THRESHOLD = float(os.environ.get("ODD_SEMANTIC_THRESHOLD", "0.92"))
+SEMANTIC_POLICY = os.environ.get("ODD_SEMANTIC_CACHE_POLICY", "lfu")
+
+
+class SemanticCache:
+    """
+    Cache de réponses indexé par embedding de question et par document retenu.
+    """
+    def __init__(self, max_size: int = SEMANTIC_CACHE_SIZE, threshold: float = SEMANTIC_THRESHOLD,
+                 policy: str = SEMANTIC_POLICY, name: str = "semantic-answers") -> None:
+        """
+        Args:
+            max_size (int): Nombre maximal d'entrées (0 = cache désactivé).
+            threshold (float): Similarité cosinus minimale pour réutiliser une réponse.
+            policy (str): Politique d'éviction, "lfu" ou "lru".
+            name (str): Nom affiché dans les statistiques.
+        """
+        if policy not in ("lfu", "lru"):
+            raise ValueError("policy doit valoir 'lfu' ou 'lru'.")
+        self.max_size = max_size
+        self.threshold = threshold
+        self.policy = policy
+        self.name = name
+        self._matrix: Optional[np.ndarray] = None
+        self._scopes: List[Optional[Hashable]] = []
+        self._values: List[Any] = []
+        self._uses = np.zeros(max_size, dtype=np.int64)
+        self._last_used = np.zeros(max_size, dtype=np.float64)
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    @staticmethod
+    def _normaliser(embedding: Any) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32).ravel()
+        return vector / max(float(np.linalg.norm(vector)), 1e-12)
+
+    def get(self, embedding: Any, scope: Hashable) -> Optional[Tuple[Any, float]]:
+        """
+        Cherche une question proche déjà traitée pour le même document.
+        Args:
+            embedding (Any): Embedding de la question.
+            scope (Hashable): Document retenu, langue et version du corpus (doivent être identiques).
+        Returns:
+            Optional[Tuple[Any, float]]: (valeur stockée, similarité) ou None.
+        """
+        if self.max_size <= 0:
+            return None
+        query = self._normaliser(embedding)
+        with self._lock:
+            if self._size == 0 or self._matrix is None or self._matrix.shape[1] != query.size:
+                self.misses += 1
+                return None
+            similarities = self._matrix[:self._size] @ query
+            candidates = [i for i in np.flatnonzero(similarities >= self.threshold) if self._scopes[i] == scope]
+            if not candidates:
+                self.misses += 1
+                return None
+            best = max(candidates, key=lambda i: similarities[i])
+            self._uses[best] += 1
+            self._last_used[best] = time.time()
+            self.hits += 1
+            return self._values[best], float(similarities[best])
+
+    def _victim(self) -> int:
+        """
+        Indice de l'entrée à évincer selon la politique (LFU : moins utilisée, puis plus ancienne).
+        """
+        if self.policy == "lfu":
+            return int(np.lexsort((self._last_used[:self._size], self._uses[:self._size]))[0])
+        return int(np.argmin(self._last_used[:self._size]))
+
+    def put(self, embedding: Any, scope: Hashable, value: Any) -> None:
+        """
+        Enregistre la réponse d'une question (évince une entrée si le cache est plein).
+        """
+        if self.max_size <= 0:
+            return
+        vector = self._normaliser(embedding)
+        with self._lock:
+            if self._matrix is None or self._matrix.shape[1] != vector.size:
+                self._matrix = np.zeros((self.max_size, vector.size), dtype=np.float32)
+                self._scopes, self._values, self._size = [], [], 0
+            if self._size < self.max_size:
+                slot = self._size
+                self._size += 1
+                self._scopes.append(scope)
+                self._values.append(value)
+            else:
+                slot = self._victim()
+                self.evictions += 1
+                self._scopes[slot] = scope
+                self._values[slot] = value
+            self._matrix[slot] = vector
+            self._uses[slot] = 0
+            self._last_used[slot] = time.time()
+
+    def clear(self) -> None:
+        """
+        Vide le cache et remet les compteurs à zéro.
+        """
+        with self._lock:
+            self._matrix = None
+            self._scopes, self._values, self._size = [], [], 0
+            self._uses[:] = 0
+            self._last_used[:] = 0
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Statistiques d'usage du cache.
+        """
+        lookups = self.hits + self.misses
+        return {
+            "name": self.name,
+            "size": self._size,
+            "max_size": self.max_size,
+            "threshold": self.threshold,
+            "policy": self.policy,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else None,
+        }
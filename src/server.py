@@ -0,0 +1,289 @@
+"""
+server.py - Mode serveur HTTP (sans interface Streamlit) pour le Chatbot ODD
+
+Ce module expose la recherche et la mise en forme des réponses (`ChatbotEngine.repondre`, avec
+cache des questions répétées) via un petit serveur HTTP asyncio (bibliothèque standard uniquement) :
+
+- GET  /health     : état du moteur (idle, loading, ready, error), de chaque étape du démarrage et charge courante
+- POST /ask        : {"question": "...", "lang": "Français"|"English"} -> réponse formatée
+- POST /ask/batch  : {"questions": [...], "lang": ...} -> liste de réponses
+
+Le travail CPU (encodage, BM25, génération) s'exécute dans un pool de threads borné : la boucle
+d'événements ne bloque jamais, et les requêtes au-delà de `max_pending` reçoivent un 503.
+Lancement : `python main.py serve --host 0.0.0.0 --port 8000 --workers 2`.
+"""
+
+import asyncio
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+from src.chat_bot import ChatbotEngine, get_engine
+from src.model_registry import model_registry
+
+MAX_BODY_BYTES = 1024 * 1024
+LANGS = ("Français", "English")
+
+_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+            413: "Payload Too Large", 500: "Internal Server Error", 503: "Service Unavailable"}
+
+
+class HTTPError(Exception):
+    """
+    Erreur renvoyée telle quelle au client (code HTTP + message).
+    """
+    def __init__(self, status: int, message: str) -> None:
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+class ChatbotServer:
+    """
+    Serveur HTTP asyncio autour du moteur partagé du chatbot.
+    """
+    def __init__(self, engine: Optional[ChatbotEngine] = None, host: str = "127.0.0.1", port: int = 8000,
+                 max_workers: int = 2, max_pending: int = 64, max_batch: int = 32) -> None:
+        """
+        Args:
+            engine (ChatbotEngine): Moteur à servir (par défaut celui du processus).
+            host (str): Adresse d'écoute.
+            port (int): Port d'écoute.
+            max_workers (int): Threads dédiés au travail CPU (modèles).
+            max_pending (int): Nombre maximal de questions en cours ou en attente.
+            max_batch (int): Nombre maximal de questions par appel /ask/batch.
+        """
+        self.engine = engine or get_engine()
+        self.host = host
+        self.port = port
+        self.max_pending = max_pending
+        self.max_batch = max_batch
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="odd-worker")
+        self.pending = 0
+        self.stats = {"requests": 0, "questions": 0, "rejected": 0, "errors": 0}
+        # Compteurs partagés : la boucle d'événements les met à jour, /health et les appelants
+        # extérieurs (autres threads) les lisent
+        self._lock = threading.Lock()
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    def _count(self, name: str, n: int = 1) -> None:
+        with self._lock:
+            self.stats[name] += n
+
+    # --- Logique métier (exécutée dans le pool de threads) ---
+
+    def _repondre(self, question: str, lang: str) -> Dict[str, Any]:
+        """
+        Recherche et met en forme la réponse à une question (bloquant, hors boucle d'événements).
+        """
+        start_time = time.perf_counter()
+        # Réponse dès que les données sont chargées (mode dégradé pendant le reste du démarrage)
+        self.engine.wait_stage("data")
+        response = self.engine.repondre(question, lang=lang)
+        return {
+            "question": question,
+            "lang": lang,
+            **response,
+            "elapsed_ms": round((time.perf_counter() - start_time) * 1000, 2),
+        }
+
+    async def _run_questions(self, questions: List[str], lang: str) -> List[Dict[str, Any]]:
+        """
+        Soumet des questions au pool de threads, en refusant au-delà de `max_pending`.
+        """
+        with self._lock:
+            if self.pending + len(questions) > self.max_pending:
+                self.stats["rejected"] += 1
+                raise HTTPError(503, "Serveur saturé, réessayez plus tard.")
+            self.pending += len(questions)
+        loop = asyncio.get_running_loop()
+        try:
+            futures = [loop.run_in_executor(self.executor, self._repondre, q, lang) for q in questions]
+            return list(await asyncio.gather(*futures))
+        finally:
+            with self._lock:
+                self.pending -= len(questions)
+                self.stats["questions"] += len(questions)
+
+    # --- Routes ---
+
+    @staticmethod
+    def _parse_lang(payload: Dict[str, Any]) -> str:
+        """
+        Valide la langue demandée (Français par défaut).
+        """
+        lang = payload.get("lang", "Français")
+        if lang not in LANGS:
+            raise HTTPError(400, f"'lang' doit valoir {' ou '.join(LANGS)}.")
+        return lang
+
+    async def route(self, method: str, path: str, body: bytes) -> Tuple[int, Dict[str, Any]]:
+        """
+        Aiguille une requête vers son endpoint.
+        Returns:
+            Tuple[int, Dict[str, Any]]: Code HTTP et corps JSON de la réponse.
+        """
+        path = path.split("?", 1)[0].rstrip("/") or "/"
+        if path == "/health":
+            if method != "GET":
+                raise HTTPError(405, "Méthode non autorisée.")
+            with self._lock:
+                pending, stats = self.pending, dict(self.stats)
+            return 200, {
+                "status": self.engine.status,
+                "ready": self.engine.status == "ready",
+                "error": self.engine.error,
+                "stages": self.engine.stages(),
+                "pending": pending,
+                "stats": stats,
+                "embedding_batches": self.engine.query_encoder.stats() if self.engine.query_encoder else None,
+                "generation_batches": self.engine.llm.queue.stats() if getattr(self.engine.llm, "queue", None) else None,
+                "models": model_registry.memory_report(),
+                "caches": self.engine.cache_stats(),
+            }
+        if path not in ("/ask", "/ask/batch"):
+            raise HTTPError(404, "Endpoint inconnu.")
+        if method != "POST":
+            raise HTTPError(405, "Méthode non autorisée.")
+        try:
+            payload = json.loads(body.decode("utf-8") or "{}")
+        except (UnicodeDecodeError, json.JSONDecodeError):
+            raise HTTPError(400, "Corps JSON invalide.")
+        if not isinstance(payload, dict):
+            raise HTTPError(400, "Le corps doit être un objet JSON.")
+        lang = self._parse_lang(payload)
+        if path == "/ask":
+            question = payload.get("question")
+            if not isinstance(question, str) or not question.strip():
+                raise HTTPError(400, "'question' doit être une chaîne non vide.")
+            return 200, (await self._run_questions([question], lang))[0]
+        questions = payload.get("questions")
+        if not isinstance(questions, list) or not questions or not all(isinstance(q, str) and q.strip() for q in questions):
+            raise HTTPError(400, "'questions' doit être une liste de chaînes non vides.")
+        if len(questions) > self.max_batch:
+            raise HTTPError(413, f"Au plus {self.max_batch} questions par lot.")
+        return 200, {"answers": await self._run_questions(questions, lang)}
+
+    # --- Protocole HTTP/1.1 minimal ---
+
+    @staticmethod
+    def _content_length(headers: Dict[str, str]) -> int:
+        """
+        Valide l'en-tête Content-Length (absent = 0).
+        Raises:
+            HTTPError: 400 si la valeur n'est pas un entier positif ou nul, 413 si elle dépasse MAX_BODY_BYTES.
+        """
+        value = headers.get("content-length", "").strip()
+        if not value:
+            return 0
+        if not value.isdigit():
+            raise HTTPError(400, "En-tête Content-Length invalide.")
+        length = int(value)
+        if length > MAX_BODY_BYTES:
+            raise HTTPError(413, "Corps trop volumineux.")
+        return length
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """
+        Traite les requêtes d'une connexion (keep-alive HTTP/1.1 supporté).
+        """
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                try:
+                    method, path, version = request_line.decode("latin-1").strip().split(" ", 2)
+                except ValueError:
+                    await self._send(writer, 400, {"error": "Requête invalide."}, keep_alive=False)
+                    break
+                headers: Dict[str, str] = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                keep_alive = headers.get("connection", "").lower() != "close" and version == "HTTP/1.1"
+                try:
+                    length = self._content_length(headers)
+                except HTTPError as e:
+                    # Corps de taille inconnue : impossible de resynchroniser la connexion
+                    await self._send(writer, e.status, {"error": e.message}, keep_alive=False)
+                    break
+                body = await reader.readexactly(length) if length else b""
+                self._count("requests")
+                try:
+                    status, payload = await self.route(method.upper(), path, body)
+                except HTTPError as e:
+                    status, payload = e.status, {"error": e.message}
+                except Exception as e:
+                    self._count("errors")
+                    print(f"[ERREUR] Requête {method} {path} échouée : {e}")
+                    status, payload = 500, {"error": str(e)}
+                await self._send(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        except ValueError:
+            # Ligne de requête ou d'en-tête au-delà de la limite du StreamReader
+            try:
+                await self._send(writer, 400, {"error": "En-têtes trop longs."}, keep_alive=False)
+            except ConnectionError:
+                pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def _send(writer: asyncio.StreamWriter, status: int, payload: Dict[str, Any], keep_alive: bool) -> None:
+        """
+        Écrit une réponse JSON complète sur la connexion.
+        """
+        data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        head = (
+            f"HTTP/1.1 {status} {_REASONS.get(status, '')}\r\n"
+            "Content-Type: application/json; charset=utf-8\r\n"
+            f"Content-Length: {len(data)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+        )
+        writer.write(head.encode("latin-1") + data)
+        await writer.drain()
+
+    async def start(self) -> None:
+        """
+        Démarre l'écoute et lance l'initialisation du moteur en arrière-plan.
+        """
+        self.engine.start()
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        print(f"🌐 Serveur ODD à l'écoute sur http://{self.host}:{self.port} (/ask, /ask/batch, /health)")
+
+    async def serve_forever(self) -> None:
+        """
+        Démarre le serveur et le fait tourner jusqu'à interruption.
+        """
+        await self.start()
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def stop(self) -> None:
+        """
+        Arrête l'écoute et libère le pool de threads.
+        """
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        self.executor.shutdown(wait=False)
+
+
+def run_server(host: str = "127.0.0.1", port: int = 8000, max_workers: int = 2, max_pending: int = 64) -> None:
+    """
+    Lance le serveur HTTP (bloquant, Ctrl+C pour arrêter).
+    """
+    server = ChatbotServer(host=host, port=port, max_workers=max_workers, max_pending=max_pending)
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        print("🛑 Serveur arrêté")
@@ -0,0 +1,105 @@
+"""
+warmup.py - Démarrage par étapes : graphe de dépendances exécuté en parallèle
+
+Chaque étape (chargement des données, du modèle d'embeddings, de l'index BM25, du LLM...) déclare
+les étapes dont elle dépend. `WarmupGraph.run` lance chaque étape dans son propre thread dès que
+ses dépendances sont terminées : les étapes indépendantes se chargent en même temps. L'état de
+chaque étape ("pending", "loading", "ready", "error") est publié au fil de l'eau, ce qui permet au
+moteur de servir des requêtes en mode dégradé avant la fin du démarrage.
+
+Une étape s'exécute même si une dépendance a échoué : c'est à elle de se contenter de ce qui est
+disponible (ex. pas d'embeddings sans modèle).
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+
+class _Stage:
+    def __init__(self, name: str, fn: Callable[[], None], deps: Iterable[str]) -> None:
+        self.name = name
+        self.fn = fn
+        self.deps = tuple(deps)
+        self.status = "pending"
+        self.error: Optional[str] = None
+        self.seconds: Optional[float] = None
+        self.done = threading.Event()
+
+
+class WarmupGraph:
+    """
+    Étapes de démarrage et leurs dépendances, exécutées en parallèle par `run`.
+    """
+    def __init__(self, name: str = "warmup") -> None:
+        """
+        Args:
+            name (str): Préfixe des noms de threads.
+        """
+        self.name = name
+        self._stages: Dict[str, _Stage] = {}
+
+    def add(self, name: str, fn: Callable[[], None], deps: Iterable[str] = ()) -> None:
+        """
+        Déclare une étape.
+        Args:
+            name (str): Nom de l'étape.
+            fn (Callable[[], None]): Fonction de chargement.
+            deps (Iterable[str]): Étapes à terminer avant celle-ci (déjà déclarées).
+        """
+        deps = tuple(deps)
+        unknown = [dep for dep in deps if dep not in self._stages]
+        if unknown:
+            # Imposer l'ordre de déclaration garantit l'absence de cycle
+            raise ValueError(f"Étape {name} : dépendances inconnues {unknown}")
+        self._stages[name] = _Stage(name, fn, deps)
+
+    def _run_stage(self, stage: _Stage) -> None:
+        for dep in stage.deps:
+            self._stages[dep].done.wait()
+        stage.status = "loading"
+        start_time = time.perf_counter()
+        try:
+            stage.fn()
+            stage.status = "ready"
+        except Exception as e:
+            print(f"[ERREUR] Étape de démarrage {stage.name} échouée : {e}")
+            stage.error = str(e)
+            stage.status = "error"
+        finally:
+            stage.seconds = round(time.perf_counter() - start_time, 3)
+            stage.done.set()
+
+    def run(self) -> None:
+        """
+        Exécute toutes les étapes (un thread par étape) et attend la fin de la dernière.
+        """
+        with ThreadPoolExecutor(max_workers=max(1, len(self._stages)), thread_name_prefix=self.name) as executor:
+            for future in [executor.submit(self._run_stage, stage) for stage in self._stages.values()]:
+                future.result()
+
+    def ready(self, name: str) -> bool:
+        """
+        True si l'étape s'est terminée avec succès.
+        """
+        return self._stages[name].status == "ready"
+
+    def wait(self, name: str, timeout: Optional[float] = None) -> bool:
+        """
+        Attend la fin d'une étape.
+        Returns:
+            bool: True si l'étape s'est terminée avec succès dans le délai.
+        """
+        stage = self._stages[name]
+        return stage.done.wait(timeout) and stage.status == "ready"
+
+    def names(self) -> List[str]:
+        return list(self._stages)
+
+    def status(self) -> Dict[str, Dict[str, Any]]:
+        """
+        État de chaque étape : {"status", "seconds", "error"}.
+        """
+        return {name: {"status": stage.status, "seconds": stage.seconds, "error": stage.error}
+                for name, stage in self._stages.items()}
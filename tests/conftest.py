@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Permet `import src...` quel que soit le dossier depuis lequel pytest est lancé
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
@@ -0,0 +1,95 @@
+import threading
+
+import pytest
+
+from src.batching import MicroBatcher
+
+
+class Recorder:
+    def __init__(self, fn=lambda items: [item * 10 for item in items]):
+        self.fn = fn
+        self.batches = []
+
+    def __call__(self, items):
+        self.batches.append(list(items))
+        return self.fn(items)
+
+
+def submit_concurrently(batcher, items):
+    start = threading.Barrier(len(items))
+    results = {}
+
+    def worker(item):
+        start.wait()
+        results[item] = batcher(item, timeout=5)
+    threads = [threading.Thread(target=worker, args=(item,)) for item in items]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+    return results
+
+
+def test_concurrent_submits_share_one_batch():
+    recorder = Recorder()
+    batcher = MicroBatcher(recorder, max_batch_size=4, max_wait_ms=2000)
+    try:
+        results = submit_concurrently(batcher, [1, 2, 3, 4])
+    finally:
+        batcher.close()
+    assert results == {1: 10, 2: 20, 3: 30, 4: 40}
+    assert len(recorder.batches) == 1 and sorted(recorder.batches[0]) == [1, 2, 3, 4]
+
+
+def test_max_wait_flushes_partial_batch():
+    recorder = Recorder()
+    batcher = MicroBatcher(recorder, max_batch_size=16, max_wait_ms=20)
+    try:
+        futures = [batcher.submit(i) for i in range(3)]
+        assert [f.result(timeout=2) for f in futures] == [0, 10, 20]
+    finally:
+        batcher.close()
+    assert recorder.batches == [[0, 1, 2]]
+
+
+@pytest.mark.parametrize("fn,error", [
+    (lambda items: (_ for _ in ()).throw(RuntimeError("encodeur indisponible")), RuntimeError),
+    (lambda items: items[:-1], ValueError),
+])
+def test_batch_errors_reach_every_future(fn, error):
+    batcher = MicroBatcher(Recorder(fn), max_batch_size=3, max_wait_ms=1000)
+    try:
+        futures = [batcher.submit(i) for i in range(3)]
+        for future in futures:
+            with pytest.raises(error):
+                future.result(timeout=2)
+    finally:
+        batcher.close()
+
+
+def test_close_drains_pending_then_rejects_submit():
+    recorder = Recorder()
+    batcher = MicroBatcher(recorder, max_batch_size=16, max_wait_ms=10_000)
+    futures = [batcher.submit(i) for i in range(3)]
+    batcher.close()
+    assert [f.result(timeout=0) for f in futures] == [0, 10, 20]
+    with pytest.raises(RuntimeError):
+        batcher.submit(4)
+
+
+def test_stats_fill_ratio_and_queue_ms():
+    batcher = MicroBatcher(Recorder(), max_batch_size=4, max_wait_ms=30)
+    try:
+        submit_concurrently(batcher, [1, 2, 3, 4])
+        assert [f.result(timeout=2) for f in [batcher.submit(5), batcher.submit(6)]] == [50, 60]
+        stats = batcher.stats()
+    finally:
+        batcher.close()
+    assert stats["items"] == 6
+    # Un lot plein (4/4) et un lot partiel (2/4)
+    assert stats["batches"] == 2
+    assert stats["avg_batch_size"] == 3.0 and stats["avg_fill_ratio"] == 0.75
+    # Le lot partiel attend le délai maximal avant de partir
+    assert stats["max_queue_ms"] >= 25
+    assert 0 < stats["avg_queue_ms"] <= stats["max_queue_ms"]
+    assert stats["pending"] == 0
@@ -0,0 +1,86 @@
+import math
+
+import numpy as np
+import pytest
+
+from src.bm25 import BM25_B, BM25_K1, BM25Index, analyser, raciniser
+
+CORPUS = {
+    "fr": [
+        "Éliminer la pauvreté sous toutes ses formes et partout dans le monde",
+        "Éliminer la faim, assurer la sécurité alimentaire et promouvoir l'agriculture durable",
+        "Permettre à tous de vivre en bonne santé et promouvoir le bien-être de tous à tout âge",
+        "Garantir l'accès de tous à l'eau et à l'assainissement, eau potable et gestion durable de l'eau",
+        "Prendre d'urgence des mesures pour lutter contre les changements climatiques",
+    ],
+    "en": [
+        "End poverty in all its forms everywhere",
+        "End hunger, achieve food security and promote sustainable agriculture",
+        "Ensure healthy lives and promote well-being for all at all ages",
+        "Ensure availability and sustainable management of water and sanitation, clean water",
+        "Take urgent action to combat climate change and its impacts",
+    ],
+}
+
+
+def reference_scores(texts, question, lang, k1=BM25_K1, b=BM25_B):
+    """BM25 (Lucene) calculé terme à terme, sans matrice creuse."""
+    docs = [analyser(t, lang) for t in texts]
+    avg = sum(len(d) for d in docs) / len(docs)
+    n = len(docs)
+    scores = []
+    for doc in docs:
+        score = 0.0
+        for term in analyser(question, lang):
+            df = sum(term in d for d in docs)
+            if df == 0:
+                continue
+            idf = math.log1p((n - df + 0.5) / (df + 0.5))
+            tf = doc.count(term)
+            score += idf * tf * (k1 + 1) / (tf + k1 * (1 - b + b * len(doc) / avg))
+        scores.append(score)
+    return np.asarray(scores)
+
+
+@pytest.fixture(scope="module")
+def index():
+    return BM25Index.build(CORPUS)
+
+
+def test_analyser_normalise_et_retire_les_mots_vides():
+    assert analyser("L'eau et les Changements climatiques", "fr") == ["eau", "chang", "climat"]
+    assert raciniser("sanitation", "en") == "sanit"
+    assert raciniser("eau", "fr") == "eau"
+
+
+@pytest.mark.parametrize("lang,question", [
+    ("fr", "gestion durable de l'eau potable"),
+    ("fr", "faim et agriculture durable"),
+    ("en", "clean water and sanitation"),
+    ("en", "sustainable agriculture food"),
+])
+def test_scores_match_reference_bm25(index, lang, question):
+    expected = reference_scores(CORPUS[lang], question, lang)
+    np.testing.assert_allclose(index.scores(question, lang), expected, rtol=1e-5, atol=1e-6)
+
+
+def test_search_ranks_by_score_and_skips_zero(index):
+    hits = index.search("accès à l'eau potable", top_k=3, lang="fr")
+    assert hits[0][0] == 3
+    assert all(score > 0 for _, score in hits)
+    assert index.search("xyz inconnu", lang="fr") == []
+
+
+def test_unknown_lang_falls_back_to_first(index):
+    np.testing.assert_allclose(index.scores("pauvreté", "de"), index.scores("pauvreté", "fr"))
+
+
+def test_save_load_round_trip(index, tmp_path):
+    path = tmp_path / "bm25.npz"
+    index.save(str(path))
+    loaded = BM25Index.load(str(path))
+    assert loaded.n_documents == index.n_documents
+    for lang in CORPUS:
+        assert loaded.vocabularies[lang] == index.vocabularies[lang]
+        np.testing.assert_array_equal(loaded.scores("eau durable water", lang),
+                                      index.scores("eau durable water", lang))
@@ -0,0 +1,72 @@
+import numpy as np
+import pytest
+
+from src import chat_bot
+from src.chat_bot import ChatbotEngine
+from src.lru_cache import LRUCache
+from src.semantic_cache import SemanticCache
+
+QUESTION = "Comment lutter contre la pauvreté ?"
+
+
+class FlakyLLM:
+    """LLM factice : échoue au premier appel, répond ensuite."""
+    def __init__(self):
+        self.calls = 0
+
+    def _next(self):
+        self.calls += 1
+        if self.calls == 1:
+            raise RuntimeError("timeout du générateur")
+        return "Une reformulation suffisamment longue."
+
+    def generate_response(self, prompt):
+        return self._next()
+
+    def stream_response(self, prompt):
+        yield self._next()
+
+
+@pytest.fixture
+def engine(monkeypatch):
+    engine = ChatbotEngine(use_bundle=False)
+    engine._stage_data()
+    engine._ready.set()
+    engine.answer_cache = LRUCache(16, None)
+    engine.semantic_cache = SemanticCache(max_size=16, threshold=0.9)
+    engine.llm = FlakyLLM()
+    # Modèle factice : active le cache sémantique sans charger d'encodeur
+    monkeypatch.setattr(ChatbotEngine, "model", property(lambda self: object()))
+    engine.encode_query = lambda question, lang: np.ones(4, dtype=np.float32)
+    monkeypatch.setattr(chat_bot, "_engine", engine)
+    return engine
+
+
+def test_llm_failure_is_not_cached(engine):
+    first = engine.repondre(QUESTION)
+    assert "[ERREUR LLM integration]" in first["answer"]
+    assert first["degraded"] is True
+    assert len(engine.answer_cache) == 0 and len(engine.semantic_cache) == 0
+    second = engine.repondre(QUESTION)
+    assert engine.llm.calls == 2
+    assert second["cached"] is False and "degraded" not in second
+    assert "Reformulation IA" in second["answer"]
+    third = engine.repondre(QUESTION)
+    assert third["cached"] is True and engine.llm.calls == 2
+
+
+def test_stream_llm_failure_is_not_cached(engine):
+    first = "".join(engine.repondre_stream(QUESTION))
+    assert "[ERREUR LLM integration]" in first
+    assert len(engine.answer_cache) == 0
+    second = "".join(engine.repondre_stream(QUESTION))
+    assert engine.llm.calls == 2
+    assert "Reformulation IA" in second
+    assert len(engine.answer_cache) == 1 and len(engine.semantic_cache) == 1
+
+
+def test_formatter_reports_llm_error(engine):
+    etat = {}
+    answer = chat_bot.formater_reponse_odd(engine.chercher_odd(QUESTION), QUESTION, etat=etat)
+    assert etat["llm_error"] == "timeout du générateur"
+    assert "[ERREUR LLM integration]" in answer
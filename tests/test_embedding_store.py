@@ -0,0 +1,72 @@
+import json
+import os
+
+import numpy as np
+import pytest
+
+from src.embedding_store import DOCUMENTS_FILE, EmbeddingStore, MappedRecords
+
+
+@pytest.fixture
+def store():
+    matrix = np.arange(12, dtype=np.float16).reshape(3, 4)
+    return EmbeddingStore(matrix, ["odd:1", "odd:2", "faq:0"], ["un", "deux", "trois"])
+
+
+def test_save_load_round_trip_is_mapped(store, tmp_path):
+    store.save(str(tmp_path))
+    loaded = EmbeddingStore.load(str(tmp_path))
+    assert loaded.is_mapped and not store.is_mapped
+    assert loaded.matrix.dtype == np.float16
+    np.testing.assert_array_equal(loaded.matrix, store.matrix)
+    assert loaded.ids == store.ids and loaded.texts == store.texts
+    assert loaded.matches(["odd:1", "odd:2", "faq:0"]) and not loaded.matches(["odd:1"])
+    assert not EmbeddingStore.load(str(tmp_path), mmap=False).is_mapped
+
+
+def test_ids_must_match_rows(store, tmp_path):
+    with pytest.raises(ValueError):
+        EmbeddingStore(store.matrix, ["odd:1", "odd:2"])
+    store.save(str(tmp_path))
+    path = os.path.join(tmp_path, DOCUMENTS_FILE)
+    with open(path, encoding="utf-8") as f:
+        meta = json.load(f)
+    meta["ids"].append("faq:1")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(meta, f)
+    with pytest.raises(ValueError):
+        EmbeddingStore.load(str(tmp_path))
+
+
+def test_tensor_shares_memory_with_memmap(store, tmp_path):
+    torch = pytest.importorskip("torch")
+    store.save(str(tmp_path))
+    loaded = EmbeddingStore.load(str(tmp_path))
+    tensor = loaded.tensor()
+    assert isinstance(tensor, torch.Tensor)
+    assert tensor.data_ptr() == loaded.matrix.ctypes.data
+    assert tensor.shape == loaded.matrix.shape
+
+
+def test_mapped_records_round_trip(tmp_path):
+    records = [{"text": "Éliminer la pauvreté — partout", "odd": 1}, {"text": "水と衛生", "odd": 6},
+               {"text": "", "odd": None}]
+    prefix = str(tmp_path / "passages")
+    MappedRecords.write(prefix, records)
+    mapped = MappedRecords.open(prefix)
+    assert len(mapped) == 3
+    assert list(mapped) == records
+    assert mapped[-1] == records[-1] and mapped[-3] == records[0]
+    for i in (3, -4):
+        with pytest.raises(IndexError):
+            mapped[i]
+
+
+def test_mapped_records_empty(tmp_path):
+    prefix = str(tmp_path / "vide")
+    MappedRecords.write(prefix, [])
+    assert os.path.getsize(f"{prefix}.bin") == 0
+    mapped = MappedRecords.open(prefix)
+    assert len(mapped) == 0 and list(mapped) == []
+    with pytest.raises(IndexError):
+        mapped[0]
@@ -0,0 +1,27 @@
+import numpy as np
+
+import src.hybrid_retrieval as hybrid_retrieval
+from src.hybrid_retrieval import HybridRetriever, normaliser_lignes
+
+
+def test_float16_matrix_scored_in_float32_chunks(monkeypatch):
+    monkeypatch.setattr(hybrid_retrieval, "SCORE_CHUNK_ROWS", 7)
+    rng = np.random.default_rng(0)
+    matrix = normaliser_lignes(rng.standard_normal((50, 16)))
+    query = rng.standard_normal(16)
+    retriever = HybridRetriever([{}] * 50, {"fr": matrix.astype(np.float16)})
+    scores = retriever.dense_scores(query)
+    assert scores.dtype == np.float32
+    np.testing.assert_allclose(scores, matrix @ normaliser_lignes(query)[0], atol=2e-3)
+
+
+def test_reciprocal_rank_fusion_and_weight():
+    docs = [{"id": i} for i in range(3)]
+    matrix = np.eye(3, dtype=np.float32)
+    retriever = HybridRetriever(docs, {"fr": matrix}, sparse_search=lambda q, k, lang: [2, 1])
+    query = np.array([1.0, 0.0, 0.0])
+    assert retriever.search("q", query, top_k=1, dense_weight=1.0)[0]["index"] == 0
+    assert retriever.search("q", query, top_k=1, dense_weight=0.0)[0]["index"] == 2
+    fused = retriever.search("q", query, top_k=3, dense_weight=0.5)
+    assert [r["index"] for r in fused][0] == 2
+    assert fused[0]["sparse_rank"] == 1 and fused[0]["dense_rank"] == 3
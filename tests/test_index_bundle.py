@@ -0,0 +1,103 @@
+import hashlib
+import json
+import os
+import shutil
+
+import numpy as np
+import pytest
+
+from src import chat_bot
+from src.chat_bot import ChatbotEngine
+from src.index_bundle import (BUNDLE_FORMAT, CURRENT_FILE, MANIFEST_FILE, PROJECT_ROOT, _file_sha256, _supprimer,
+                              build_bundle, open_bundle)
+from src.model_cache import ModelCache
+
+
+class StubEncoder:
+    """Encodeur factice : vecteur déterministe dérivé du texte."""
+    def encode(self, texts, convert_to_numpy=True, **kwargs):
+        single = isinstance(texts, str)
+        rows = [np.frombuffer(hashlib.sha256(t.encode("utf-8")).digest(), dtype=np.uint8)[:16].astype(np.float32) - 127
+                for t in ([texts] if single else texts)]
+        return rows[0] if single else np.stack(rows)
+
+
+@pytest.fixture
+def bundle_dir(tmp_path, monkeypatch):
+    encoder = StubEncoder()
+
+    def stage_model(self):
+        self._use_model = True
+    monkeypatch.setattr(ChatbotEngine, "_stage_model", stage_model)
+    monkeypatch.setattr(ChatbotEngine, "model", property(lambda self: encoder if self._use_model else None))
+    monkeypatch.setattr(chat_bot, "model_cache", ModelCache(str(tmp_path / "cache"), max_size_mb=0))
+    return str(tmp_path / "bundle")
+
+
+@pytest.fixture
+def built(bundle_dir):
+    return build_bundle(bundle_dir, workbook=None)
+
+
+def test_build_writes_current_and_manifest(bundle_dir, built):
+    with open(os.path.join(bundle_dir, CURRENT_FILE)) as f:
+        assert f.read() == built.version
+    manifest = built.manifest
+    assert manifest["format"] == BUNDLE_FORMAT and manifest["data_file"] == chat_bot.DATA_FILE
+    assert manifest["model"]["included"] is False and manifest["sdr_cube"] is None
+    assert manifest["documents"] == len(built.corpus()["documents"])
+    for rel, entry in manifest["sources"].items():
+        assert entry["sha256"] == _file_sha256(os.path.join(PROJECT_ROOT, rel))
+    assert {"corpus.json", "bm25.npz"} <= set(manifest["files"])
+    for rel, entry in manifest["files"].items():
+        assert entry["sha256"] == _file_sha256(os.path.join(built.path, rel))
+    assert set(built.embedding_stores()) == {"fr", "en"}
+    assert all(store.is_mapped for store in built.embedding_stores().values())
+    assert built.bm25().n_documents == manifest["documents"]
+
+
+def test_same_sources_same_version(bundle_dir, built):
+    again = build_bundle(bundle_dir, workbook=None)
+    assert again.version == built.version
+    assert open_bundle(bundle_dir).version == built.version
+
+
+def write_bundle(bundle_dir, manifest):
+    path = os.path.join(bundle_dir, "v1")
+    os.makedirs(path)
+    with open(os.path.join(path, MANIFEST_FILE), "w") as f:
+        json.dump(dict({"version": "v1", "data_hash": "h"}, **manifest), f)
+    with open(os.path.join(bundle_dir, CURRENT_FILE), "w") as f:
+        f.write("v1")
+
+
+@pytest.mark.parametrize("manifest,data_file,accepted", [
+    ({"format": BUNDLE_FORMAT, "data_file": "odd.json"}, "odd.json", True),
+    ({"format": BUNDLE_FORMAT + 1, "data_file": "odd.json"}, "odd.json", False),
+    ({"format": BUNDLE_FORMAT, "data_file": "autre.json"}, "odd.json", False),
+])
+def test_open_bundle_checks_format_and_data_file(tmp_path, manifest, data_file, accepted):
+    write_bundle(str(tmp_path), manifest)
+    assert (open_bundle(str(tmp_path), data_file=data_file) is not None) is accepted
+
+
+def test_open_bundle_without_current(tmp_path):
+    assert open_bundle(str(tmp_path)) is None
+
+
+def test_verify_sources_reports_edited_source(tmp_path, built):
+    root = tmp_path / "root"
+    shutil.copytree(os.path.join(PROJECT_ROOT, "data"), root / "data")
+    assert built.verify_sources(str(root)) == []
+    edited = next(iter(built.manifest["sources"]))
+    with open(root / edited, "a", encoding="utf-8") as f:
+        f.write("\n")
+    assert built.verify_sources(str(root)) == [edited]
+
+
+def test_bundle_is_read_only_and_removable(built):
+    for rel in built.manifest["files"]:
+        assert os.stat(os.path.join(built.path, rel)).st_mode & 0o222 == 0
+    assert os.stat(built.path).st_mode & 0o222 == 0
+    _supprimer(built.path)
+    assert not os.path.exists(built.path)
@@ -0,0 +1,81 @@
+import time
+
+from src.keyword_matcher import AhoCorasick, KeywordMatcher, normaliser_texte
+
+ODDS = [
+    {"odd": 1, "keywords": {"fr": ["pauvreté", "revenu"], "en": ["poverty", "income"]}},
+    {"odd": 6, "keywords": {"fr": ["eau", "eau potable", "assainissement"], "en": ["water", "drinking water"]}},
+    {"odd": 13, "keywords": {"fr": ["climat", "changement climatique"], "en": ["climate", "climate change"]}},
+]
+FAQ = [{"type": "faq", "keywords": ["ODD", "objectifs"]}]
+
+
+def test_normalisation_removes_accents_and_case():
+    assert normaliser_texte("Pauvreté ÉNERGIE") == "pauvrete energie"
+
+
+def test_aho_corasick_finds_overlapping_patterns():
+    automaton = AhoCorasick(["he", "she", "his", "hers"])
+    hits = sorted((end, automaton.patterns[i]) for end, i in automaton.find_all("ushers"))
+    assert hits == [(4, "he"), (4, "she"), (6, "hers")]
+
+
+def test_accent_insensitive_match():
+    matcher = KeywordMatcher.from_corpus(ODDS, FAQ)
+    assert matcher.best("comment reduire la pauvrete ?") == ("odd", 0)
+
+
+def test_specificity_beats_list_order():
+    matcher = KeywordMatcher.from_corpus(ODDS, FAQ)
+    ranked = matcher.match("L'ODD sur l'eau potable et le climat")
+    assert (ranked[0]["type"], ranked[0]["index"]) == ("odd", 1)
+    assert ranked[0]["keywords"] == ["eau", "eau potable"]
+    assert {(h["type"], h["index"]) for h in ranked} == {("odd", 1), ("odd", 2), ("faq", 0)}
+
+
+def test_languages_are_separate():
+    matcher = KeywordMatcher.from_corpus(ODDS, FAQ)
+    assert matcher.best("climate change adaptation", "English") == ("odd", 2)
+    assert matcher.best("climate change adaptation", "Français", whole_word=True) is None
+
+
+def test_whole_word_filter():
+    matcher = KeywordMatcher.from_corpus(ODDS, FAQ)
+    assert matcher.best("il y a beaucoup à faire") == ("odd", 1)
+    assert matcher.best("il y a beaucoup à faire", whole_word=True) is None
+
+
+def test_latency_flat_with_large_vocabulary():
+    small = KeywordMatcher.from_corpus(ODDS, FAQ)
+    large_odds = ODDS + [{"odd": 100 + i, "keywords": [f"terme{i}x{j}" for j in range(100)]} for i in range(300)]
+    large = KeywordMatcher.from_corpus(large_odds, FAQ)
+    question = "Quels sont les liens entre pauvreté, eau potable et changement climatique ? " * 4
+
+    def timing(matcher):
+        start = time.perf_counter()
+        for _ in range(200):
+            matcher.match(question)
+        return time.perf_counter() - start
+    timing(small), timing(large)
+    assert large.best(question) == small.best(question)
+    assert timing(large) < 5 * timing(small)
+
+
+def test_engine_keyword_stage_runs_before_hybrid_retrieval():
+    from src.chat_bot import ChatbotEngine
+
+    class Retriever:
+        has_dense = False
+        calls = 0
+
+        def search(self, *args, **kwargs):
+            Retriever.calls += 1
+            return [{"document": {"odd": 17}}]
+
+    engine = ChatbotEngine(use_bundle=False)
+    engine._stage_data()
+    engine.hybrid = Retriever()
+    assert engine.chercher_odd("Comment lutter contre la pauvreté ?")["odd"] == 1
+    assert Retriever.calls == 0
+    assert engine.chercher_odd("Et ensuite ?")["odd"] == 17
+    assert Retriever.calls == 1
@@ -0,0 +1,79 @@
+import pytest
+
+from src import lru_cache
+from src.lru_cache import LRUCache, normaliser_question
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(lru_cache.time, "time", lambda: now[0])
+    return now
+
+
+def test_normaliser_question():
+    assert normaliser_question("  Qu'est-ce  que\tl'ODD 4 ? ") == "qu'est-ce que l'odd 4 ?"
+    assert normaliser_question("ODD") == normaliser_question("odd")
+
+
+def test_get_put_and_counters():
+    cache = LRUCache(max_size=4)
+    assert cache.get("a", "absent") == "absent"
+    cache.put("a", 1)
+    assert cache.get("a") == 1
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["hit_rate"]) == (1, 1, 0.5)
+
+
+def test_evicts_least_recently_used():
+    cache = LRUCache(max_size=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.get("a")
+    cache.put("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    assert cache.evictions == 1 and len(cache) == 2
+
+
+def test_ttl_expires_entries(clock):
+    cache = LRUCache(max_size=4, ttl=10)
+    cache.put("a", 1)
+    clock[0] += 5
+    assert cache.get("a") == 1
+    clock[0] += 6
+    assert cache.get("a") is None
+    assert len(cache) == 0
+
+
+def test_disabled_cache_stores_nothing():
+    cache = LRUCache(max_size=0)
+    cache.put("a", 1)
+    assert cache.get("a", "absent") == "absent"
+    assert len(cache) == 0
+
+
+def test_disk_tier_survives_restart(tmp_path):
+    LRUCache(max_size=4, disk_dir=str(tmp_path)).put(("q", "fr"), [0.1, 0.2])
+    cache = LRUCache(max_size=4, disk_dir=str(tmp_path))
+    assert cache.get(("q", "fr")) == [0.1, 0.2]
+    assert cache.disk_hits == 1
+    # L'entrée est remontée en mémoire
+    assert cache.get(("q", "fr")) == [0.1, 0.2]
+    assert cache.hits == 1
+
+
+def test_disk_tier_respects_ttl(tmp_path, clock):
+    LRUCache(max_size=4, ttl=10, disk_dir=str(tmp_path)).put("a", 1)
+    clock[0] += 11
+    assert LRUCache(max_size=4, ttl=10, disk_dir=str(tmp_path)).get("a") is None
+
+
+def test_clear_empties_memory_and_disk(tmp_path):
+    cache = LRUCache(max_size=4, disk_dir=str(tmp_path))
+    cache.put("a", 1)
+    cache.get("a")
+    cache.clear()
+    assert list(tmp_path.glob("*.pkl")) == []
+    assert cache.get("a") is None
+    assert cache.stats()["hits"] == 0
@@ -0,0 +1,100 @@
+import json
+import os
+
+import pytest
+
+from src import model_cache as model_cache_module
+from src.model_cache import MANIFEST_FILE, ModelCache
+
+
+def write_text(text):
+    def writer(path):
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+    return writer
+
+
+def manifest_on_disk(cache):
+    with open(os.path.join(cache.cache_dir, MANIFEST_FILE), encoding="utf-8") as f:
+        return json.load(f)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(model_cache_module.time, "time", lambda: now[0])
+    return now
+
+
+def test_put_and_get_round_trip(tmp_path):
+    cache = ModelCache(str(tmp_path), max_size_mb=0)
+    target = cache._put("bm25:v1", "bm25", "v1", write_text("index"), suffix=".txt")
+    assert cache._get("bm25:v1") == target
+    assert open(target).read() == "index"
+    assert cache._get("bm25:absent") is None
+
+
+def test_reads_do_not_rewrite_manifest(tmp_path, clock):
+    cache = ModelCache(str(tmp_path), max_size_mb=0)
+    cache._put("bm25:v1", "bm25", "v1", write_text("index"))
+    path = os.path.join(cache.cache_dir, MANIFEST_FILE)
+    stamp = os.stat(path).st_mtime_ns, os.stat(path).st_ino
+    clock[0] += 5
+    for _ in range(10):
+        assert cache._get("bm25:v1") is not None
+    assert (os.stat(path).st_mtime_ns, os.stat(path).st_ino) == stamp
+    assert manifest_on_disk(cache)["entries"]["bm25:v1"]["last_used"] == 1000.0
+    assert cache.get_cache_info()["files"][0]["last_used"] == 1005.0
+    cache.flush_touches()
+    assert manifest_on_disk(cache)["entries"]["bm25:v1"]["last_used"] == 1005.0
+
+
+def test_touches_flushed_after_interval(tmp_path, clock):
+    cache = ModelCache(str(tmp_path), max_size_mb=0)
+    cache._put("bm25:v1", "bm25", "v1", write_text("index"))
+    clock[0] += model_cache_module.TOUCH_FLUSH_SECONDS + 1
+    cache._get("bm25:v1")
+    assert manifest_on_disk(cache)["entries"]["bm25:v1"]["last_used"] == clock[0]
+
+
+def test_eviction_sees_pending_touches(tmp_path, clock):
+    cache = ModelCache(str(tmp_path), max_size_mb=1500 / (1024 * 1024))
+    cache._put("emb:v1", "emb", "v1", write_text("a" * 600))
+    clock[0] += 1
+    cache._put("ix:v1", "ix", "v1", write_text("b" * 600))
+    clock[0] += 1
+    cache._put("emb:v2", "emb", "v2", write_text("A" * 10))
+    cache._put("ix:v2", "ix", "v2", write_text("B" * 10))
+    clock[0] += 1
+    # Lecture non encore reportée : "emb:v1" devient plus récent que "ix:v1"
+    cache._get("emb:v1")
+    clock[0] += 1
+    cache._put("other:v1", "other", "v1", write_text("c" * 600))
+    entries = manifest_on_disk(cache)["entries"]
+    assert "ix:v1" not in entries
+    assert entries["emb:v1"]["last_used"] == 1003.0
+
+
+def test_missing_object_drops_entry(tmp_path):
+    cache = ModelCache(str(tmp_path), max_size_mb=0)
+    target = cache._put("bm25:v1", "bm25", "v1", write_text("index"))
+    os.remove(target)
+    assert cache._get("bm25:v1") is None
+    assert manifest_on_disk(cache)["entries"] == {}
+
+
+def test_clear_cache_only_removes_manifest_objects(tmp_path):
+    cache = ModelCache(str(tmp_path), max_size_mb=0)
+    target = cache._put("bm25:v1", "bm25", "v1", write_text("index"))
+    kept = ["sdg_store/edition=2025/part-00000.parquet", "http/abc.json", "onnx/model.onnx",
+            "queries/q.pkl", "SDR-2025.xlsx.cube.npy"]
+    for rel in kept:
+        path = tmp_path / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text("x")
+    cache.clear_cache()
+    assert not os.path.exists(target)
+    assert not (tmp_path / MANIFEST_FILE).exists()
+    assert all((tmp_path / rel).exists() for rel in kept)
+    assert (tmp_path / "locks").is_dir()
+    assert cache.get_cache_info()["file_count"] == 0
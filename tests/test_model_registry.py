@@ -0,0 +1,82 @@
+import threading
+import time
+
+import src.onnx_backend as onnx_backend
+from src.model_cache import ModelCache
+from src.model_registry import ModelRegistry
+
+
+class Weights:
+    """
+    Modèle factice dont la taille est déclarée (comme les modèles ONNX).
+    """
+    def __init__(self, mb):
+        self.model_bytes = int(mb * 1024 * 1024)
+
+
+def test_concurrent_gets_load_once():
+    registry = ModelRegistry()
+    calls = []
+
+    def loader():
+        calls.append(1)
+        time.sleep(0.05)
+        return Weights(1)
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(registry.get("m", "t", loader))) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(calls) == 1
+    assert len({id(r) for r in results}) == 1
+    assert registry.memory_report()[0]["size_mb"] == 1.0
+
+
+def test_budget_unloads_least_recently_used():
+    registry = ModelRegistry(memory_budget_mb=2.5)
+    registry.get("a", "t", lambda: Weights(1))
+    registry.get("b", "t", lambda: Weights(1))
+    registry.get("a", "t", lambda: Weights(1))
+    registry.get("c", "t", lambda: Weights(1))
+    assert [registry.is_loaded(m, "t") for m in "abc"] == [True, False, True]
+
+
+def test_unload_idle_and_reload():
+    registry = ModelRegistry()
+    registry.get("a", "t", lambda: Weights(1))
+    registry._entries[("a", "t", "cpu")].last_used -= 100
+    registry.get("b", "t", lambda: Weights(1))
+    assert registry.unload_idle(50) == [("a", "t", "cpu")]
+    assert registry.get("a", "t", lambda: Weights(1)) is not None
+    assert registry.memory_report()[0]["loads"] == 2
+
+
+def test_idle_reaper_runs_in_background():
+    registry = ModelRegistry(max_idle_seconds=0.05)
+    registry.start_idle_reaper(0.05, interval=0.02)
+    registry.get("a", "t", lambda: Weights(1))
+    deadline = time.time() + 2
+    while registry.is_loaded("a", "t") and time.time() < deadline:
+        time.sleep(0.01)
+    assert not registry.is_loaded("a", "t")
+
+
+def test_onnx_fallback_resolved_once(monkeypatch, capsys):
+    monkeypatch.setattr(onnx_backend, "is_available", lambda: False)
+    registry = ModelRegistry()
+    assert [registry.resolve_backend("onnx") for _ in range(3)] == ["torch"] * 3
+    assert capsys.readouterr().out.count("[ERREUR]") == 1
+
+
+def test_model_cache_entries_are_keyed_by_model_id(tmp_path):
+    cache = ModelCache(str(tmp_path))
+
+    def writer(path):
+        with open(path, "w") as f:
+            f.write("poids")
+    cache._put("model:all-MiniLM-L6-v2", "model", None, writer)
+    assert cache.model_path("all-MiniLM-L6-v2") is not None
+    assert cache.model_path("paraphrase-multilingual-MiniLM-L12-v2") is None
+    assert cache.load_model("paraphrase-multilingual-MiniLM-L12-v2") is None
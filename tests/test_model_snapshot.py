@@ -0,0 +1,68 @@
+from collections import namedtuple
+
+import pytest
+
+from src import model_snapshot
+from src.model_snapshot import SAFETENSORS_FILE, _map_weights
+
+LoadResult = namedtuple("LoadResult", "missing_keys unexpected_keys")
+
+
+class FakeAutoModel:
+    def __init__(self, keys, result=None):
+        self.keys = keys
+        self.result = result
+        self.loaded = None
+        self.evaluated = False
+
+    def state_dict(self):
+        return {key: None for key in self.keys}
+
+    def load_state_dict(self, weights, strict=True, assign=False):
+        self.loaded = (weights, strict, assign)
+        return self.result or LoadResult([], [])
+
+    def eval(self):
+        self.evaluated = True
+
+
+class FakeTransformer:
+    def __init__(self, auto_model):
+        self.auto_model = auto_model
+
+
+@pytest.fixture
+def model_dir(tmp_path, monkeypatch):
+    (tmp_path / SAFETENSORS_FILE).write_bytes(b"")
+    monkeypatch.setattr(model_snapshot, "charger_safetensors_mmap",
+                        lambda path: {"embeddings.weight": "w", "encoder.bias": "b"})
+    return str(tmp_path)
+
+
+def test_maps_weights_when_keys_match(model_dir):
+    auto_model = FakeAutoModel(["embeddings.weight", "encoder.bias"])
+    assert _map_weights([FakeTransformer(auto_model)], model_dir) is True
+    assert auto_model.loaded[2] is True
+    assert auto_model.evaluated
+
+
+@pytest.mark.parametrize("keys", [
+    ["embeddings.weight", "encoder.bias", "pooler.weight"],
+    ["embeddings.weight"],
+])
+def test_keeps_copied_weights_on_key_mismatch(model_dir, keys):
+    auto_model = FakeAutoModel(keys)
+    assert _map_weights([FakeTransformer(auto_model)], model_dir) is False
+    assert auto_model.loaded is None
+    assert not auto_model.evaluated
+
+
+def test_keeps_copied_weights_when_load_reports_mismatch(model_dir):
+    auto_model = FakeAutoModel(["embeddings.weight", "encoder.bias"],
+                               result=LoadResult(["pooler.weight"], []))
+    assert _map_weights([FakeTransformer(auto_model)], model_dir) is False
+    assert not auto_model.evaluated
+
+
+def test_no_safetensors_file(tmp_path):
+    assert _map_weights([FakeTransformer(FakeAutoModel([]))], str(tmp_path)) is False
@@ -0,0 +1,94 @@
+import numpy as np
+import pytest
+
+from src.embedding_store import MappedRecords
+from src.hybrid_retrieval import normaliser_lignes
+from src.passage_index import IVFIndex, PassageIndex, construire_passages, load_ann
+
+MONOLINGUE = [{
+    "odd": 6, "title": "Eau propre", "description": "Garantir l'accès à l'eau.",
+    "cibles": [{"code": "6.1", "description": "Eau potable pour tous"}],
+    "indicateurs": [{"code": "6.1.1", "description": "Population utilisant l'eau potable"}, "Stress hydrique"],
+    "actions": ["Économiser l'eau", "Protéger les nappes"],
+}]
+BILINGUE = [{
+    "odd": 6, "title": {"fr": "Eau propre", "en": "Clean Water"},
+    "description": {"fr": "Garantir l'accès à l'eau.", "en": "Ensure access to water."},
+    "cibles": [{"code": "6.1", "description": {"fr": "Eau potable pour tous", "en": "Safe drinking water for all"}}],
+    "actions": {"fr": ["Économiser l'eau"], "en": ["Save water"]},
+}]
+FAQ = [{"question": "Que sont les ODD ?", "answer": "17 objectifs."}]
+
+
+def random_vectors(n, dim=16, seed=0):
+    return normaliser_lignes(np.random.default_rng(seed).standard_normal((n, dim)).astype(np.float32))
+
+
+def test_construire_passages_monolingue():
+    passages = construire_passages(MONOLINGUE, FAQ)
+    assert [p["kind"] for p in passages] == ["goal", "target", "indicator", "indicator", "action", "action", "faq"]
+    assert passages[0]["text"] == "ODD 6: Eau propre. Garantir l'accès à l'eau."
+    assert passages[1]["code"] == "6.1" and passages[2]["code"] == "6.1.1" and passages[3]["code"] is None
+    assert all(p["doc"] == 0 and p["odd"] == 6 for p in passages[:-1])
+    assert passages[-1]["doc"] == 1 and passages[-1]["odd"] is None
+
+
+@pytest.mark.parametrize("lang,title,action", [
+    ("Français", "ODD 6: Eau propre.", "Économiser l'eau"),
+    ("English", "SDG 6: Clean Water.", "Save water"),
+])
+def test_construire_passages_bilingue(lang, title, action):
+    passages = construire_passages(BILINGUE, lang=lang)
+    assert [p["kind"] for p in passages] == ["goal", "target", "action"]
+    assert passages[0]["text"].startswith(title)
+    assert passages[2]["text"].endswith(action)
+
+
+def test_single_list_search_is_exact():
+    vectors = random_vectors(200)
+    index = IVFIndex.build(vectors)
+    assert len(index.centroids) == 1 and len(index) == 200
+    for query in random_vectors(20, seed=1):
+        exact = vectors @ query
+        ids, scores = index.search(query, top_k=5)
+        assert set(ids.tolist()) == set(np.argsort(-exact)[:5].tolist())
+        np.testing.assert_allclose(scores, exact[ids], atol=0.02)
+        assert np.all(np.diff(scores) <= 0)
+
+
+def test_multi_list_search_finds_itself():
+    vectors = random_vectors(2000, dim=32)
+    index = IVFIndex.build(vectors, nprobe=4)
+    assert len(index.centroids) > 1
+    assert sorted(index.ids.tolist()) == list(range(2000))
+    ids, _ = index.search(vectors[123], top_k=1)
+    assert ids.tolist() == [123]
+
+
+def test_ivf_save_load_memory_maps(tmp_path):
+    vectors = random_vectors(300)
+    index = IVFIndex.build(vectors)
+    index.save(str(tmp_path))
+    loaded = load_ann(str(tmp_path))
+    assert isinstance(loaded, IVFIndex)
+    assert isinstance(loaded.codes, np.memmap) and isinstance(loaded.ids, np.memmap)
+    assert not isinstance(loaded.centroids, np.memmap)
+    for name in IVFIndex.ARRAYS:
+        np.testing.assert_array_equal(getattr(loaded, name), getattr(index, name))
+    for a, b in zip(loaded.search(vectors[7], top_k=3), index.search(vectors[7], top_k=3)):
+        np.testing.assert_array_equal(a, b)
+
+
+def test_passage_index_filters_by_odd_and_round_trips(tmp_path):
+    passages = [{"kind": "target", "doc": i % 3, "odd": i % 3 + 1, "code": None, "text": f"passage {i}"}
+                for i in range(30)]
+    vectors = random_vectors(30)
+    index = PassageIndex(passages, IVFIndex.build(vectors))
+    results = index.search(vectors[4], top_k=3, odd=2)
+    assert len(results) == 3 and all(p["odd"] == 2 for p in results)
+    assert results[0]["text"] == "passage 4"
+    assert index.search(vectors[4], top_k=1)[0]["text"] == "passage 4"
+    index.save(str(tmp_path))
+    loaded = PassageIndex.load(str(tmp_path))
+    assert isinstance(loaded.passages, MappedRecords)
+    assert loaded.search(vectors[4], top_k=3, odd=2) == results
@@ -0,0 +1,76 @@
+import pytest
+
+from src.query_router import QueryRouter
+
+ODDS = [
+    {"odd": 5, "title": "Égalité entre les sexes", "related_odds": [4, 10],
+     "cibles": [{"code": "5.1", "description": "Discriminations"}]},
+    {"odd": 6, "title": "Eau propre", "related_odds": [3],
+     "cibles": [{"code": "6.3", "description": "Qualité de l'eau"}, {"code": "6.a", "description": "Coopération"}]},
+    {"odd": 13, "title": "Climat", "related_odds": [7, 14]},
+    {"odd": 14, "title": "Vie aquatique", "related_odds": []},
+    {"odd": 4, "title": "Éducation"},
+    {"odd": 7, "title": "Énergie"},
+    {"odd": 10, "title": "Inégalités"},
+]
+
+
+@pytest.fixture
+def router():
+    return QueryRouter.from_corpus(ODDS)
+
+
+@pytest.mark.parametrize("question, number", [
+    ("odd 5", 5),
+    ("Parle-moi de l'ODD n°6", 6),
+    ("What is SDG 13?", 13),
+    ("objectif 14", 14),
+    ("13", 13),
+    ("rapport sur l'ODD 5", 5),
+    ("Où en est la France par rapport à l'ODD 6 ?", 6),
+    ("Quel est le rapport 2024 sur le goal 13", 13),
+])
+def test_goal_questions(router, question, number):
+    result = router.route(question)
+    assert result.get("type") != "related"
+    assert result["odd"] == number
+
+
+@pytest.mark.parametrize("question, related", [
+    ("quels ODD sont liés à 13", [7, 14]),
+    ("Quels objectifs sont liés à l'ODD 13 ?", [7, 14]),
+    ("what relates to SDG 13", [7, 14]),
+    ("which goals are linked to 13?", [7, 14]),
+    ("ODD en rapport avec le 14", [13]),
+    ("objectifs liés au 5", [4, 10]),
+])
+def test_related_questions(router, question, related):
+    result = router.route(question)
+    assert result["type"] == "related"
+    assert [r["odd"] for r in result["related"]] == related
+
+
+@pytest.mark.parametrize("question, code", [
+    ("cible 6.3", "6.3"),
+    ("Target 6.a", "6.a"),
+    ("5.1", "5.1"),
+])
+def test_target_questions(router, question, code):
+    result = router.route(question)
+    assert result["type"] == "target"
+    assert [c["code"] for c in result["cibles"]] == [code]
+
+
+@pytest.mark.parametrize("question", [
+    "Comment lutter contre la pauvreté ?",
+    "Quels ODD sont liés à l'eau ?",
+    "odd 42",
+    "rapport annuel",
+])
+def test_unstructured_questions_fall_through(router, question):
+    assert router.route(question) is None
+
+
+def test_related_index_is_symmetric(router):
+    related = router.index.related_to(14)
+    assert [r["odd"] for r in related["related"]] == [13]
@@ -0,0 +1,119 @@
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from src.remote_fetch import CachedFetcher
+
+
+class StandIn(BaseHTTPRequestHandler):
+    """
+    Serveur de test : `/data` répond avec un ETag (304 si If-None-Match correspond),
+    `/slow` attend `delay` secondes ; toutes les routes répondent 500 si `failing`.
+    """
+    body = b"Country,SDG Index Score\nFinland,86.4\n"
+    etag = '"v1"'
+    delay = 0.0
+    failing = False
+    requests = []
+
+    def do_GET(self):
+        type(self).requests.append((self.path, self.headers.get("If-None-Match")))
+        if type(self).failing:
+            self.send_response(500)
+            self.end_headers()
+            return
+        if self.path == "/slow":
+            time.sleep(type(self).delay)
+        if self.headers.get("If-None-Match") == type(self).etag:
+            self.send_response(304)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("ETag", type(self).etag)
+        self.send_header("Content-Length", str(len(type(self).body)))
+        self.end_headers()
+        self.wfile.write(type(self).body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    StandIn.requests = []
+    StandIn.body, StandIn.etag, StandIn.delay = b"Country,SDG Index Score\nFinland,86.4\n", '"v1"', 0.0
+    StandIn.failing = False
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), StandIn)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_download_then_fresh_hit(server, tmp_path):
+    fetcher = CachedFetcher(str(tmp_path), max_age=60)
+    assert fetcher.get(server + "/data") == StandIn.body
+    assert fetcher.get(server + "/data") == StandIn.body
+    assert len(StandIn.requests) == 1
+    assert fetcher.stats["downloaded"] == 1 and fetcher.stats["fresh"] == 1
+
+
+def test_stale_copy_served_and_revalidated(server, tmp_path):
+    fetcher = CachedFetcher(str(tmp_path), max_age=0)
+    url = server + "/data"
+    fetcher.get(url)
+    assert fetcher.get(url) == StandIn.body
+    fetcher.refresh_async(url).result(timeout=5)
+    assert StandIn.requests[-1] == ("/data", '"v1"')
+    assert fetcher.stats["not_modified"] >= 1 and fetcher.stats["stale"] == 1
+
+
+def test_new_version_replaces_body_and_meta_together(server, tmp_path):
+    fetcher = CachedFetcher(str(tmp_path))
+    url = server + "/data"
+    fetcher.refresh(url)
+    StandIn.body, StandIn.etag = b"Country,SDG Index Score\nFinland,87.0\n", '"v2"'
+    assert fetcher.refresh(url) == StandIn.body
+    meta = fetcher._read_meta(url)
+    assert meta["etag"] == '"v2"'
+    assert fetcher.read_cached(url) == StandIn.body
+    bodies = [name for name in os.listdir(tmp_path) if name.endswith(".body")]
+    assert bodies == [meta["body"]]
+
+
+def test_orphan_body_does_not_change_cached_pair(server, tmp_path):
+    fetcher = CachedFetcher(str(tmp_path))
+    url = server + "/data"
+    fetcher.refresh(url)
+    # Arrêt simulé entre l'écriture d'un nouveau corps et celle de ses métadonnées
+    key = fetcher._paths(url)["key"]
+    with open(os.path.join(tmp_path, f"{key}.0123456789abcdef.body"), "wb") as f:
+        f.write(b"partial")
+    assert fetcher._read_meta(url)["etag"] == '"v1"'
+    assert fetcher.read_cached(url) == StandIn.body
+
+
+def test_deadline_returns_none_and_download_continues(server, tmp_path):
+    StandIn.delay = 0.5
+    fetcher = CachedFetcher(str(tmp_path))
+    url = server + "/slow"
+    start = time.perf_counter()
+    assert fetcher.get(url, deadline=0.05) is None
+    assert time.perf_counter() - start < 0.4
+    assert fetcher.stats["timeouts"] == 1
+    fetcher.refresh_async(url).result(timeout=5)
+    assert fetcher.get(url, deadline=0.05) == StandIn.body
+
+
+def test_server_error_keeps_last_good_copy(server, tmp_path):
+    fetcher = CachedFetcher(str(tmp_path))
+    url = server + "/data"
+    assert fetcher.refresh(url) == StandIn.body
+    StandIn.failing = True
+    assert fetcher.refresh(url) == StandIn.body
+    assert fetcher.refresh(server + "/other") is None
+    assert fetcher.stats["errors"] == 2
@@ -0,0 +1,72 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import src.sdg_data as sdg_data
+from src.sdg_data import SHEET_NAME, SDGDataLoader
+
+pytest.importorskip("openpyxl")
+
+
+@pytest.fixture(autouse=True)
+def caches_processus(monkeypatch):
+    # Chaque test part de caches de processus vides (les classeurs de test ont le même contenu)
+    monkeypatch.setattr(sdg_data, "_SNAPSHOTS", {})
+    monkeypatch.setattr(sdg_data, "_CUBES", {})
+
+
+@pytest.fixture
+def workbook(tmp_path):
+    rows = []
+    for country, region in [("France", "OECD"), ("Chad", "Africa"), ("Brazil", "LAC")]:
+        for year in (2022, 2023):
+            row = {"id": country[:3].upper(), "Country": country, "year": year, "indexreg": region}
+            for i in range(1, 18):
+                row[f"goal{i}"] = float(i + year % 10)
+            row["sdgi_s"] = float(len(country) + year % 10)
+            rows.append(row)
+    rows.append({"id": "XXX", "Country": "Nowhere", "year": None, "indexreg": "?", "sdgi_s": 1.0})
+    path = tmp_path / "SDR.xlsx"
+    pd.DataFrame(rows).to_excel(path, sheet_name=SHEET_NAME, index=False)
+    return str(path)
+
+
+def test_full_sheet_in_sheet_order(workbook, tmp_path):
+    raw = pd.read_excel(workbook, sheet_name=SHEET_NAME)
+    df = SDGDataLoader(workbook, cache_dir=str(tmp_path / "cache")).get_sdg_scores()
+    assert list(df.columns) == list(raw.columns)
+    assert list(df["Country"]) == list(raw["Country"])
+
+
+def test_goal_columns_follow_sheet_header(workbook, tmp_path):
+    df = pd.read_excel(workbook, sheet_name=SHEET_NAME)
+    df.insert(4, "goal_trend", 1.0)
+    df.to_excel(workbook, sheet_name=SHEET_NAME, index=False)
+    loader = SDGDataLoader(workbook, cache_dir=str(tmp_path / "cache"))
+    assert loader.get_goal_columns() == ["goal_trend"] + [f"goal{i}" for i in range(1, 18)]
+    assert "goal_trend" not in loader.cube.columns
+    assert list(loader.get_sdg_scores(goals=["goal_trend", "goal1"]).columns) == ["Country", "year", "goal_trend", "goal1"]
+
+
+def test_cube_views_keep_sheet_order(workbook, tmp_path):
+    loader = SDGDataLoader(workbook, cache_dir=str(tmp_path / "cache"))
+    df = loader.get_global_score(years=[2023])
+    assert list(df["Country"]) == ["France", "Chad", "Brazil"]
+    assert list(df.columns) == ["Country", "year", "sdgi_s"]
+    assert loader.get_score("Chad", 2023) == pytest.approx(7.0)
+
+
+def test_getters_return_copies(workbook, tmp_path):
+    loader = SDGDataLoader(workbook, cache_dir=str(tmp_path / "cache"))
+    df = loader.get_sdg_scores()
+    df["sdgi_s"] = np.nan
+    assert not loader.get_sdg_scores()["sdgi_s"].isna().all()
+
+
+def test_warm_start_skips_excel(workbook, tmp_path, monkeypatch):
+    cache_dir = str(tmp_path / "cache")
+    expected = SDGDataLoader(workbook, cache_dir=cache_dir).get_sdg_scores(goals=["goal1", "id"])
+    monkeypatch.setattr(sdg_data, "_SNAPSHOTS", {})
+    monkeypatch.setattr(sdg_data.pd, "read_excel", lambda *a, **k: pytest.fail("classeur relu"))
+    df = SDGDataLoader(workbook, cache_dir=cache_dir).get_sdg_scores(goals=["goal1", "id"])
+    pd.testing.assert_frame_equal(df.astype(str), expected.astype(str))
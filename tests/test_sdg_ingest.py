@@ -0,0 +1,44 @@
+import os
+
+import pandas as pd
+
+from src.sdg_ingest import SDGStore, normaliser_colonne
+
+
+def write_csv(path, score):
+    pd.DataFrame({
+        "Country Code ISO3": ["FRA", "TCD"],
+        "Country": ["France", "Chad"],
+        "2024 SDG Index Score": [score, 50.0],
+        "Goal 1 Score": [99.0, 10.0],
+    }).to_csv(path, index=False)
+
+
+def test_normaliser_colonne():
+    assert normaliser_colonne("Goal 12 Score") == "goal12"
+    assert normaliser_colonne("2024 SDG Index Score") == "sdgi_s"
+    assert normaliser_colonne("Country Code ISO3") == "id"
+    assert normaliser_colonne("Spillover Score") is None
+
+
+def test_ingest_is_incremental_and_append_only(tmp_path):
+    source = tmp_path / "SDR2024.csv"
+    write_csv(source, 80.0)
+    store = SDGStore(str(tmp_path / "store"))
+    assert store.ingest(2024, str(source))
+    assert not store.ingest(2024, str(source))
+    first = [os.path.join(root, f) for root, _, files in os.walk(tmp_path / "store") for f in files
+             if "ingest=1" in root]
+    assert first
+
+    write_csv(source, 81.0)
+    assert store.ingest(2024, str(source))
+    entry = store.manifest["editions"]["2024"]
+    assert entry["ingest"] == 2
+    assert [h["ingest"] for h in entry["history"]] == [1]
+    assert all(os.path.exists(path) for path in first)
+
+    reopened = SDGStore(str(tmp_path / "store"))
+    df = reopened.load(editions=[2024], countries=["France"], columns=["sdgi_s", "goal1"])
+    assert df["sdgi_s"].tolist() == [81.0]
+    assert df["year"].tolist() == [2024]
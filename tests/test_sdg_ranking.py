@@ -0,0 +1,38 @@
+import numpy as np
+import pandas as pd
+
+from src.sdg_data import SDGCube
+from src.sdg_ranking import SDGRankingEngine
+
+
+def make_engine():
+    df = pd.DataFrame({
+        "Country": ["A", "B", "C", "D", "E", "A", "B"],
+        "year": [2023, 2023, 2023, 2023, 2023, 2022, 2022],
+        "indexreg": ["X", "X", "Y", "Y", "Y", "X", "X"],
+        "sdgi_s": [70.0, 80.0, 80.0, 60.0, np.nan, 65.0, 81.0],
+    })
+    return SDGRankingEngine(SDGCube.from_frame(df))
+
+
+def test_competition_ranking_for_ties():
+    engine = make_engine()
+    assert [engine.rank_of(c, 2023) for c in "ABCDE"] == [3, 1, 1, 4, None]
+    assert list(engine.top_k(2023, k=2)["rank"]) == [1, 1]
+    assert engine.percentile_of("B", 2023) == engine.percentile_of("C", 2023) == 100.0
+
+
+def test_deltas_and_regions():
+    engine = make_engine()
+    assert engine.delta_of("A", 2023) == 5.0
+    assert np.isnan(engine.delta_of("C", 2023))
+    regions = engine.region_scores(2023)
+    assert list(regions["region"]) == ["X", "Y"]
+    assert regions["sdgi_s"].iloc[1] == 70.0
+
+
+def test_classement_restricted_to_countries():
+    engine = make_engine()
+    df = engine.classement(2023, countries=["D", "A", "Z", "E"])
+    assert list(df["Country"]) == ["A", "D"]
+    assert list(df["rank"]) == [3, 4]
@@ -0,0 +1,101 @@
+import numpy as np
+import pytest
+
+from src import semantic_cache
+from src.semantic_cache import SemanticCache
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+
+    def tick():
+        now[0] += 1
+        return now[0]
+    monkeypatch.setattr(semantic_cache.time, "time", tick)
+    return now
+
+
+def unit(*values):
+    return np.asarray(values, dtype=np.float32)
+
+
+def test_reuses_answer_for_close_question_same_scope():
+    cache = SemanticCache(max_size=4, threshold=0.9)
+    cache.put(unit(1, 0, 0), ("doc4", "fr", 1), "réponse ODD 4")
+    value, similarity = cache.get(unit(0.99, 0.05, 0), ("doc4", "fr", 1))
+    assert value == "réponse ODD 4"
+    assert similarity > 0.9
+    assert cache.stats()["hits"] == 1
+
+
+def test_misses_on_other_scope_or_low_similarity():
+    cache = SemanticCache(max_size=4, threshold=0.9)
+    cache.put(unit(1, 0, 0), ("doc4", "fr", 1), "réponse")
+    assert cache.get(unit(1, 0, 0), ("doc5", "fr", 1)) is None
+    assert cache.get(unit(1, 0, 0), ("doc4", "fr", 2)) is None
+    assert cache.get(unit(0, 1, 0), ("doc4", "fr", 1)) is None
+    assert cache.misses == 3
+
+
+def test_embeddings_are_normalised():
+    cache = SemanticCache(max_size=2, threshold=0.99)
+    cache.put([10.0, 0.0], "s", "v")
+    assert cache.get([0.5, 0.0], "s")[1] == pytest.approx(1.0)
+
+
+def test_best_candidate_wins():
+    cache = SemanticCache(max_size=4, threshold=0.5)
+    cache.put(unit(1, 0.4), "s", "loin")
+    cache.put(unit(1, 0.01), "s", "proche")
+    assert cache.get(unit(1, 0), "s")[0] == "proche"
+
+
+def test_lfu_evicts_least_used(clock):
+    cache = SemanticCache(max_size=2, threshold=0.99, policy="lfu")
+    cache.put(unit(1, 0), "s", "a")
+    cache.put(unit(0, 1), "s", "b")
+    cache.get(unit(0, 1), "s")
+    cache.get(unit(1, 0), "s")
+    cache.get(unit(1, 0), "s")
+    cache.put(unit(1, 1), "s", "c")
+    assert cache.get(unit(0, 1), "s") is None
+    assert cache.get(unit(1, 0), "s")[0] == "a"
+    assert cache.evictions == 1
+
+
+def test_lru_evicts_least_recent(clock):
+    cache = SemanticCache(max_size=2, threshold=0.99, policy="lru")
+    cache.put(unit(1, 0), "s", "a")
+    cache.put(unit(0, 1), "s", "b")
+    cache.get(unit(1, 0), "s")
+    cache.put(unit(1, 1), "s", "c")
+    assert cache.get(unit(0, 1), "s") is None
+    assert cache.get(unit(1, 0), "s")[0] == "a"
+
+
+def test_dimension_change_resets_cache():
+    cache = SemanticCache(max_size=2, threshold=0.9)
+    cache.put(unit(1, 0), "s", "a")
+    assert cache.get(unit(1, 0, 0), "s") is None
+    cache.put(unit(1, 0, 0), "s", "b")
+    assert len(cache) == 1
+    assert cache.get(unit(1, 0, 0), "s")[0] == "b"
+
+
+def test_disabled_and_invalid_policy():
+    cache = SemanticCache(max_size=0)
+    cache.put(unit(1, 0), "s", "a")
+    assert cache.get(unit(1, 0), "s") is None
+    with pytest.raises(ValueError):
+        SemanticCache(policy="fifo")
+
+
+def test_clear_resets_everything():
+    cache = SemanticCache(max_size=2, threshold=0.9)
+    cache.put(unit(1, 0), "s", "a")
+    cache.get(unit(1, 0), "s")
+    cache.clear()
+    assert len(cache) == 0
+    assert cache.get(unit(1, 0), "s") is None
+    assert cache.stats()["hits"] == 0
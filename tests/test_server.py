@@ -0,0 +1,114 @@
+import asyncio
+import json
+import threading
+
+import pytest
+
+from src.server import MAX_BODY_BYTES, ChatbotServer
+
+
+class FakeEngine:
+    """
+    Moteur minimal : répond instantanément, sans modèle.
+    """
+    status = "ready"
+    error = None
+    query_encoder = None
+    llm = None
+
+    def __init__(self, release=None):
+        self.release = release
+
+    def start(self):
+        return self
+
+    def stages(self):
+        return {}
+
+    def cache_stats(self):
+        return {}
+
+    def wait_stage(self, name="data", timeout=None):
+        return True
+
+    def repondre(self, question, lang="Français"):
+        if self.release is not None:
+            self.release.wait(5)
+        if question == "boom":
+            raise RuntimeError("panne")
+        return {"answer": f"réponse à {question}", "source": "test"}
+
+
+async def exchange(port, raw):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(raw)
+    await writer.drain()
+    head = await reader.readuntil(b"\r\n\r\n")
+    status = int(head.split(b" ", 2)[1])
+    length = int([line for line in head.split(b"\r\n") if line.lower().startswith(b"content-length")][0].split(b":")[1])
+    body = json.loads(await reader.readexactly(length))
+    writer.close()
+    return status, body
+
+
+def post(path, payload=None, body=None, headers=""):
+    data = body if body is not None else json.dumps(payload).encode("utf-8")
+    return (f"POST {path} HTTP/1.1\r\nHost: x\r\nContent-Length: {len(data)}\r\n{headers}\r\n").encode() + data
+
+
+def run_with_server(scenario, engine=None, **kwargs):
+    async def main():
+        server = ChatbotServer(engine=engine or FakeEngine(), port=0, **kwargs)
+        await server.start()
+        try:
+            return await scenario(server, server._server.sockets[0].getsockname()[1])
+        finally:
+            await server.stop()
+    return asyncio.run(main())
+
+
+def test_ask_and_health():
+    async def scenario(server, port):
+        status, body = await exchange(port, post("/ask", {"question": "odd 5"}))
+        assert (status, body["answer"]) == (200, "réponse à odd 5")
+        status, body = await exchange(port, b"GET /health HTTP/1.1\r\n\r\n")
+        assert status == 200 and body["stats"]["questions"] == 1 and body["pending"] == 0
+    run_with_server(scenario)
+
+
+@pytest.mark.parametrize("raw, expected", [
+    (b"POST /ask HTTP/1.1\r\nContent-Length: abc\r\n\r\n", 400),
+    (b"POST /ask HTTP/1.1\r\nContent-Length: -5\r\n\r\n", 400),
+    (f"POST /ask HTTP/1.1\r\nContent-Length: {MAX_BODY_BYTES + 1}\r\n\r\n".encode(), 413),
+    (b"NONSENSE\r\n\r\n", 400),
+    (post("/ask", body=b"{not json"), 400),
+    (post("/ask", ["liste"]), 400),
+    (post("/ask", {"question": "  "}), 400),
+    (post("/ask", {"question": "q", "lang": "Deutsch"}), 400),
+    (post("/ask/batch", {"questions": ["a", 3]}), 400),
+    (post("/ask/batch", {"questions": ["q"] * 40}), 413),
+    (post("/nowhere", {}), 404),
+    (b"GET /ask HTTP/1.1\r\n\r\n", 405),
+    (post("/ask", {"question": "boom"}), 500),
+])
+def test_error_paths(raw, expected):
+    async def scenario(server, port):
+        status, body = await exchange(port, raw)
+        assert status == expected
+        assert "error" in body
+    run_with_server(scenario)
+
+
+def test_overload_returns_503():
+    release = threading.Event()
+
+    async def scenario(server, port):
+        first = asyncio.ensure_future(exchange(port, post("/ask/batch", {"questions": ["a", "b"]})))
+        while server.pending < 2:
+            await asyncio.sleep(0.01)
+        status, body = await exchange(port, post("/ask", {"question": "c"}))
+        assert status == 503 and server.stats["rejected"] == 1
+        release.set()
+        status, body = await first
+        assert status == 200 and len(body["answers"]) == 2
+    run_with_server(scenario, engine=FakeEngine(release), max_pending=2)
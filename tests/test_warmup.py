@@ -0,0 +1,77 @@
+import threading
+import time
+
+import pytest
+
+from src.warmup import WarmupGraph
+
+
+def test_independent_stages_run_in_parallel():
+    graph = WarmupGraph()
+    barrier = threading.Barrier(3, timeout=5)
+    for name in ("data", "model", "llm"):
+        # Chaque étape attend les deux autres : ne passe que si les trois tournent en même temps
+        graph.add(name, barrier.wait)
+    graph.run()
+    assert all(stage["status"] == "ready" for stage in graph.status().values())
+
+
+def test_dependent_stage_waits_for_deps():
+    graph = WarmupGraph()
+    order = []
+
+    def slow(name):
+        def fn():
+            time.sleep(0.05)
+            order.append(name)
+        return fn
+    graph.add("data", slow("data"))
+    graph.add("model", slow("model"))
+    graph.add("embeddings", lambda: order.append("embeddings"), deps=("data", "model"))
+    graph.run()
+    assert order[-1] == "embeddings"
+    assert graph.ready("embeddings")
+
+
+def test_failing_stage_reports_error_and_dependents_still_run():
+    graph = WarmupGraph()
+    ran = []
+
+    def fail():
+        raise RuntimeError("modèle introuvable")
+    graph.add("model", fail)
+    graph.add("embeddings", lambda: ran.append("embeddings"), deps=("model",))
+    graph.run()
+    status = graph.status()
+    assert status["model"]["status"] == "error"
+    assert status["model"]["error"] == "modèle introuvable"
+    assert status["model"]["seconds"] is not None
+    assert status["embeddings"]["status"] == "ready" and ran == ["embeddings"]
+
+
+def test_add_rejects_unknown_deps():
+    graph = WarmupGraph()
+    graph.add("data", lambda: None)
+    with pytest.raises(ValueError):
+        graph.add("bm25", lambda: None, deps=("data", "model"))
+    assert graph.names() == ["data"]
+
+
+def test_wait_returns_false_for_failed_or_unfinished_stage():
+    graph = WarmupGraph()
+    release = threading.Event()
+
+    def fail():
+        raise RuntimeError("boom")
+    graph.add("llm", fail)
+    graph.add("data", release.wait)
+    runner = threading.Thread(target=graph.run)
+    runner.start()
+    try:
+        assert graph.wait("llm", timeout=5) is False
+        assert graph.wait("data", timeout=0.05) is False
+        assert graph.status()["data"]["status"] == "loading"
+    finally:
+        release.set()
+        runner.join(5)
+    assert graph.wait("data", timeout=1) is True